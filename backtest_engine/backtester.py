@@ -1,35 +1,256 @@
+import numpy as np
 import pandas as pd
 
+from backtest_engine import metrics, stops, trade_log
+
+# Số ô (nến × chiến lược) tối đa xử lý mỗi lần trong run_batch, giới hạn bộ nhớ tạm
+# (các mảng tạm float64 cho đường vốn và chỉ số nằm gọn trong cache CPU, ~512 KB mỗi mảng)
+_BATCH_CELLS = 1 << 16
+
+
+def positions_from_signals(signals):
+    """
+    Trạng thái nắm giữ sau mỗi nến (1: đang giữ, 0: không) theo máy trạng thái long-only:
+    1 khi chưa giữ thì mua, -1 khi đang giữ thì bán, giá trị khác bỏ qua. Vì vậy trạng thái
+    chính là tín hiệu 1/-1 gần nhất (chưa có tín hiệu nào thì 0).
+    signals: mảng (n,) hoặc (n, k), mỗi cột một chuỗi tín hiệu
+    """
+    signals = np.asarray(signals)
+    buy = signals == 1
+    sell = signals == -1
+    if not sell.any():
+        # Chỉ có tín hiệu mua (như tín hiệu 0/1): giữ từ lần mua đầu tiên tới cuối kỳ
+        return np.logical_or.accumulate(buy, axis=0).view(np.int8)
+    # Đang giữ khi lần mua gần nhất sau lần bán gần nhất
+    t = np.arange(1, signals.shape[0] + 1, dtype=np.int32).reshape((-1,) + (1,) * (signals.ndim - 1))
+    last_buy = np.maximum.accumulate(np.where(buy, t, 0), axis=0)
+    last_sell = np.maximum.accumulate(np.where(sell, t, 0), axis=0)
+    return (last_buy > last_sell).view(np.int8)
+
+
+def trade_points(position):
+    """
+    Chỉ số nến mua và nến bán của chuỗi trạng thái 1 chiều.
+    Vị thế còn mở cuối kỳ được chốt tại nến cuối cùng.
+    """
+    change = np.diff(position, prepend=0)
+    entries = np.flatnonzero(change == 1)
+    exits = np.flatnonzero(change == -1)
+    if len(exits) < len(entries):
+        exits = np.append(exits, len(position) - 1)
+    return entries, exits
+
+
+def bar_pnl(prices, position):
+    """
+    Lãi/lỗ theo từng nến khi giữ 1 đơn vị theo chuỗi trạng thái (đánh giá theo giá đóng cửa):
+    pnl[t] = position[t-1] * (prices[t] - prices[t-1]), pnl[0] = 0. Tổng bằng lợi nhuận của
+    run() (vị thế còn mở được tính tới nến cuối). prices, position: (n,) hoặc (n, k).
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    pnl = np.zeros(np.broadcast_shapes(prices.shape, np.shape(position)))
+    pnl[1:] = position[:-1] * np.diff(prices, axis=0)
+    return pnl
+
+
 class BacktestEngine:
-    def __init__(self, df, signals, initial_balance=10000):
+    def __init__(self, df, signals, initial_balance=10000, periods_per_year=None, costs=None, mode="long",
+                 stop_loss=None, take_profit=None, trailing_stop=None):
         """
-        df: DataFrame giá và chỉ báo
+        df: DataFrame giá và chỉ báo (cần High/Low khi dùng stop)
         signals: Series tín hiệu (1: mua, 0: không làm gì, -1: bán)
         initial_balance: số dư ban đầu
+        periods_per_year: số nến mỗi năm để quy đổi Sharpe/Sortino/Calmar
+                          (mặc định suy ra từ index thời gian của df, không có thì 365)
+        costs: CostModel (phí, trượt giá, khối lượng lệnh); None: 1 đơn vị, không chi phí
+        mode: "long" (chỉ mua, -1 là bán ra) hoặc "long_short" (-1 mở vị thế short)
+        stop_loss, take_profit, trailing_stop: thoát lệnh theo High/Low, tỉ lệ so với giá vào lệnh
+                                               hoặc đỉnh/đáy (0.05 = 5%), xem stops.py
         """
+        if mode not in stops.MODES:
+            raise ValueError(f"mode phải là một trong {stops.MODES}, nhận {mode!r}")
         self.df = df
         self.signals = signals
         self.initial_balance = initial_balance
+        self.periods_per_year = periods_per_year
+        self.costs = costs
+        self.mode = mode
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.trailing_stop = trailing_stop
+        # TradeLog của lần run() gần nhất (mọi lệnh, mọi cột Close)
+        self.trade_log = None
 
     def run(self):
-        # Giả lập backtest đơn giản: chỉ tính lợi nhuận khi mua/bán theo tín hiệu
-        balance = self.initial_balance
-        position = 0  # 0: không nắm giữ, 1: đang nắm giữ
-        entry_price = 0
-        for i in range(len(self.df)):
-            signal = self.signals.iloc[i]
-            price = self.df['Close'].iloc[i]
-            if signal == 1 and position == 0:
-                position = 1
-                entry_price = price
-            elif signal == -1 and position == 1:
-                balance += (price - entry_price)
-                position = 0
-        # Nếu còn vị thế cuối kỳ, chốt giá cuối cùng
-        if position == 1:
-            balance += (self.df['Close'].iloc[-1] - entry_price)
-        profit = balance - self.initial_balance
-        return {"profit": profit}
+        """
+        Giả lập backtest đơn giản: chỉ tính lợi nhuận khi mua/bán theo tín hiệu.
+        Vector hóa: trạng thái = tín hiệu 1/-1 gần nhất, lãi/lỗ = giá bán - giá mua
+        (có costs thì sau phí, trượt giá và theo khối lượng lệnh; short lãi khi giá giảm).
+        Trả về dict các chỉ số trong metrics.METRICS (profit, trades, winrate, profit_factor,
+        exposure, max_drawdown, sharpe, sortino, calmar).
+        Danh sách lệnh được giữ lại trong self.trade_log (TradeLog, xem trade_log.py).
+        """
+        close = self.df['Close']
+        prices = close.to_numpy()
+        signals = np.asarray(self.signals)[:len(prices)]
+        # Số cột ghi rõ: reshape(n, -1) lỗi khi Close rỗng
+        block = prices.reshape(len(prices), 1 if prices.ndim == 1 else prices.shape[1]).astype(np.float64)
+        position, exit_price = self._positions(signals, block)
+        ppy = self.periods_per_year or metrics.periods_per_year(self.df.index)
+        bars, trades = self._simulate(block, position, self.initial_balance, self.costs, exit_price)
+        values = metrics.performance(bars, position, trades["column"], trades["pnl"], self.initial_balance, ppy)
+        self.trade_log = trade_log.TradeLog(trade_log.records(**trades), self.df.index,
+                                            close.columns if prices.ndim > 1 else None)
+        # Long-only không chi phí: profit cộng dồn tuần tự để giống hệt vòng lặp cũ
+        exact = (self.costs is None or self.costs.is_free) and self.mode == "long" and exit_price is None
+        if prices.ndim == 1:
+            result = {name: column[0] for name, column in values.items()}
+            if exact:
+                result["profit"] = self._profit(prices, position[:, 0])
+        else:
+            # Close là DataFrame (cột MultiIndex từ yf.download): một kết quả cho mỗi cột
+            result = {name: pd.Series(column, index=close.columns) for name, column in values.items()}
+            if exact:
+                result["profit"] = pd.Series([self._profit(prices[:, j], position[:, j])
+                                              for j in range(prices.shape[1])], index=close.columns)
+        return result
+
+    def trade_pnl(self):
+        """Lãi/lỗ từng lệnh theo thứ tự thời gian (sau chi phí) của cột Close đầu tiên."""
+        if self.trade_log is None:
+            self.run()
+        return self.trade_log.column(0).pnl
+
+    def _positions(self, signals, prices):
+        """Trạng thái (n, c) cho từng cột giá và giá thoát bằng stop (n, c) (None nếu không dùng stop)."""
+        n, c = prices.shape
+        if self.stop_loss is None and self.take_profit is None and self.trailing_stop is None:
+            if self.mode == "long":
+                position = positions_from_signals(signals)
+            else:
+                position = stops.long_short_positions(signals)
+            return np.repeat(position[:, None], c, axis=1), None
+        high = self.df['High'].to_numpy(dtype=np.float64).reshape(n, c)
+        low = self.df['Low'].to_numpy(dtype=np.float64).reshape(n, c)
+        columns = [stops.stop_positions(prices[:, j], high[:, j], low[:, j], signals, self.mode,
+                                        self.stop_loss, self.take_profit, self.trailing_stop)
+                   for j in range(c)]
+        return (np.stack([position for position, _ in columns], axis=1),
+                np.stack([exit_price for _, exit_price in columns], axis=1))
+
+    def _profit(self, prices, position):
+        entries, exits = trade_points(position)
+        # Cộng dồn tuần tự như vòng lặp (cumsum) để cho đúng cùng kết quả làm tròn
+        steps = np.concatenate([[self.initial_balance], prices[exits] - prices[entries]])
+        balance = np.cumsum(steps)[-1]
+        return balance - self.initial_balance
+
+    @classmethod
+    def pnl(cls, prices, position, initial_balance=10000, costs=None, exit_price=None):
+        """
+        Lãi/lỗ của block (n, k): (lãi/lỗ theo nến (n, k), cột của từng lệnh, lãi/lỗ từng lệnh).
+        prices: (n, 1) dùng chung hoặc (n, k); position: trạng thái nắm giữ (n, k), 1 long, -1 short
+        costs: CostModel hoặc None (1 đơn vị, không chi phí)
+        exit_price: (n, k) giá thoát tại các nến thoát bằng stop (NaN: thoát ở Close), xem stops.py
+        """
+        bars, trades = cls._simulate(prices, position, initial_balance, costs, exit_price)
+        return bars, trades["column"], trades["pnl"]
+
+    @classmethod
+    def _simulate(cls, prices, position, initial_balance=10000, costs=None, exit_price=None):
+        """
+        Như pnl nhưng trả về (lãi/lỗ theo nến, dict các mảng theo lệnh) với khóa là các trường
+        của trade_log.TRADE_DTYPE (trừ bars_held), dùng để dựng TradeLog.
+        """
+        cols, entry_t, exit_t, side, closed = cls._trades(position)
+        price_cols = cols if prices.shape[1] > 1 else np.zeros_like(cols)
+        entry_price = prices[entry_t, price_cols]
+        close_at_exit = prices[exit_t, price_cols]
+        exit_px = close_at_exit
+        stopped = np.zeros(len(cols), dtype=bool)
+        if exit_price is not None:
+            override = exit_price[exit_t, cols]
+            stopped = closed & ~np.isnan(override)
+            exit_px = np.where(stopped, override, close_at_exit)
+        # Chỉ số trong trade_log.EXIT_REASONS: 0 tín hiệu, 1 stop, 2 còn mở tới nến cuối
+        reason = np.where(stopped, 1, np.where(closed, 0, 2))
+        if costs is not None and not costs.is_free:
+            entry_fill, exit_fill, units, trade_pnl = costs.fills(prices, cols, entry_t, exit_t, initial_balance,
+                                                                  side=side, exit_price=exit_px)
+            bars = costs.bar_pnl(prices, position, cols, entry_t, exit_t, side, entry_fill, exit_fill, units)
+        else:
+            entry_fill, exit_fill, units = entry_price, exit_px, 1.0
+            trade_pnl = side * (exit_px - entry_price)
+            bars = bar_pnl(prices, position)
+            if exit_price is not None:
+                # Nến thoát bằng stop: giá thoát là mức stop thay vì Close
+                bars[exit_t[stopped], cols[stopped]] += side[stopped] * (exit_px - close_at_exit)[stopped]
+        return bars, {"column": cols, "side": side, "entry_index": entry_t, "exit_index": exit_t,
+                      "entry_price": entry_fill, "exit_price": exit_fill, "units": units, "pnl": trade_pnl,
+                      "exit_reason": reason}
+
+    @classmethod
+    def _performance(cls, prices, position, initial_balance, periods_per_year, costs=None, exit_price=None):
+        """Mọi chỉ số của block (n, k) trong một lần: lãi/lỗ theo nến và danh sách lệnh."""
+        bars, cols, trade_pnl = cls.pnl(prices, position, initial_balance, costs, exit_price)
+        return metrics.performance(bars, position, cols, trade_pnl, initial_balance, periods_per_year)
+
+    @classmethod
+    def run_batch(cls, close, signals_2d, initial_balance=10000, periods_per_year=None, costs=None):
+        """
+        Backtest nhiều chiến lược trong một lần tính.
+        close: giá đóng cửa (n,) dùng chung, hoặc (n, k) riêng cho từng cột
+        signals_2d: DataFrame/mảng (n, k), mỗi cột là tín hiệu của một bộ tham số
+        periods_per_year: như run() (mặc định suy ra từ index của close hoặc signals_2d)
+        costs: CostModel áp dụng cho mọi cột (như run())
+        Trả về DataFrame mỗi dòng một cột tín hiệu, mỗi cột một chỉ số trong metrics.METRICS.
+        profit giống run() cho từng cột (sai khác làm tròn do cộng theo khối).
+        """
+        if periods_per_year is None:
+            index = getattr(close, "index", getattr(signals_2d, "index", None))
+            periods_per_year = metrics.periods_per_year(index)
+        labels = signals_2d.columns if isinstance(signals_2d, pd.DataFrame) else None
+        signals = np.asarray(signals_2d)
+        if signals.ndim == 1:
+            signals = signals[:, None]
+        prices = np.asarray(close, dtype=np.float64)
+        if prices.ndim == 1:
+            prices = prices[:, None]
+        n, k = signals.shape
+        results = {name: np.zeros(k, dtype=np.int64 if name == "trades" else np.float64)
+                   for name in metrics.METRICS}
+        step = max(1, _BATCH_CELLS // max(n, 1))
+        for start in range(0, k, step):
+            stop = min(start + step, k)
+            block_prices = prices if prices.shape[1] == 1 else prices[:, start:stop]
+            values = cls._performance(block_prices, positions_from_signals(signals[:, start:stop]),
+                                      initial_balance, periods_per_year, costs)
+            for name, column in values.items():
+                results[name][start:stop] = column
+        return pd.DataFrame(results, index=labels if labels is not None else pd.RangeIndex(k))
+
+    @staticmethod
+    def _trades(position):
+        """
+        Danh sách lệnh của block trạng thái (n, k) (1 long, -1 short, 0 đứng ngoài):
+        (cột, nến vào, nến thoát, chiều lệnh, đã thoát trước nến cuối hay chưa), sắp theo cột rồi thời gian.
+        Chỉ xử lý các nến đổi trạng thái nên chi phí tỉ lệ với số lệnh.
+        """
+        n = position.shape[0]
+        # Chuyển vị để các lần đổi trạng thái của cùng một cột nằm liền nhau theo thời gian
+        state = np.ascontiguousarray(position.T).ravel()
+        flat = np.flatnonzero(np.diff(position, axis=0, prepend=0).T)
+        cols, t = np.divmod(flat, n)
+        # Mỗi lần đổi sang trạng thái khác 0 mở một lệnh, lệnh đóng ở lần đổi kế tiếp (cùng cột)
+        # hoặc được chốt tại nến cuối cùng
+        new_state = state[flat]
+        entries = np.flatnonzero(new_state)
+        following = entries + 1
+        closed = following < flat.size
+        closed[closed] = cols[following[closed]] == cols[entries[closed]]
+        exit_t = np.full(entries.size, n - 1)
+        exit_t[closed] = t[following[closed]]
+        return cols[entries], t[entries], exit_t, new_state[entries], closed
 
     def default_backtest_func(self, df_ind, params):
         sma_col = f"SMA_{params['SMA']}"
@@ -41,4 +262,4 @@ class BacktestEngine:
             signals = pd.Series(0, index=df_ind.index)
         bt = BacktestEngine(df_ind, signals)
         result = bt.run()
-        return result.get(self.metric, 0)
\ No newline at end of file
+        return result.get(self.metric, 0)
@@ -0,0 +1,159 @@
+"""
+Mô hình chi phí giao dịch cho BacktestEngine: phí maker/taker, trượt giá và khối lượng lệnh.
+
+Mọi phép tính chỉ làm trên danh sách lệnh (vài mảng theo số lệnh) và vài phép toán trên cả
+block (nến × chiến lược), không có vòng lặp Python theo nến hay theo lệnh.
+
+- Phí: tỉ lệ bps trên giá trị khớp ở cả lệnh mua và lệnh bán.
+- Trượt giá: mua khớp ở giá * (1 + s), bán ở giá * (1 - s) với
+  s = slippage_bps / 1e4 + slippage_vol * độ lệch chuẩn lợi suất vol_window nến gần nhất.
+- Khối lượng: sizing="units" giữ size đơn vị mỗi lệnh (có thể lẻ, ví dụ 0.05 BTC);
+  sizing="equity" dùng size phần vốn hiện có (0.5 = 50%) cho mỗi lệnh, vốn cộng dồn qua các lệnh.
+"""
+
+import numpy as np
+
+SIZING = ("units", "equity")
+ORDER_TYPES = ("taker", "maker")
+
+
+class CostModel:
+    def __init__(self, maker_bps=0.0, taker_bps=0.0, order_type="taker", slippage_bps=0.0,
+                 slippage_vol=0.0, vol_window=20, sizing="units", size=1.0):
+        """
+        maker_bps, taker_bps: phí maker/taker (bps, 10 = 0.1%)
+        order_type: loại lệnh dùng cho mọi lần khớp ("taker": lệnh thị trường, "maker": lệnh limit)
+        slippage_bps: trượt giá cố định (bps)
+        slippage_vol: hệ số trượt giá theo biến động (0.1 = 10% độ lệch chuẩn lợi suất một nến)
+        vol_window: số nến tính độ lệch chuẩn lợi suất
+        sizing, size: cách tính khối lượng lệnh (xem đầu module)
+        """
+        if order_type not in ORDER_TYPES:
+            raise ValueError(f"order_type phải là một trong {ORDER_TYPES}, nhận {order_type!r}")
+        if sizing not in SIZING:
+            raise ValueError(f"sizing phải là một trong {SIZING}, nhận {sizing!r}")
+        if min(maker_bps, taker_bps, slippage_bps, slippage_vol) < 0 or size <= 0 or vol_window < 2:
+            raise ValueError("Phí, trượt giá phải >= 0, size > 0 và vol_window >= 2")
+        self.maker_bps = maker_bps
+        self.taker_bps = taker_bps
+        self.order_type = order_type
+        self.slippage_bps = slippage_bps
+        self.slippage_vol = slippage_vol
+        self.vol_window = vol_window
+        self.sizing = sizing
+        self.size = size
+
+    def __repr__(self):
+        # Dùng trong khóa của TrialStore nên phải cố định theo tham số
+        return (f"CostModel(maker_bps={self.maker_bps!r}, taker_bps={self.taker_bps!r}, "
+                f"order_type={self.order_type!r}, slippage_bps={self.slippage_bps!r}, "
+                f"slippage_vol={self.slippage_vol!r}, vol_window={self.vol_window!r}, "
+                f"sizing={self.sizing!r}, size={self.size!r})")
+
+    @property
+    def fee_rate(self):
+        return (self.taker_bps if self.order_type == "taker" else self.maker_bps) / 1e4
+
+    @property
+    def is_free(self):
+        """Không phí, không trượt giá, giữ 1 đơn vị: giống hệt backtest không có chi phí."""
+        return (self.fee_rate == 0 and self.slippage_bps == 0 and self.slippage_vol == 0
+                and self.sizing == "units" and self.size == 1)
+
+    def slippage(self, prices, t, cols):
+        """
+        Tỉ lệ trượt giá tại các nến t (cột giá cols) của prices (n, c).
+        Độ lệch chuẩn lợi suất lấy từ tổng cộng dồn nên chỉ tính ở các nến có lệnh.
+        """
+        slip = np.full(np.shape(t), self.slippage_bps / 1e4)
+        if self.slippage_vol == 0 or len(t) == 0:
+            return slip
+        # Chỉ tính các nến có giá: giá NaN (chưa niêm yết, xem portfolio.price_matrix) không được lan
+        # qua tổng cộng dồn sang các nến sau. Nến có giá đầu tiên có lợi suất 0 như nến 0
+        valid = np.isfinite(prices)
+        returns = np.zeros_like(prices)
+        with np.errstate(invalid="ignore"):
+            np.divide(np.diff(prices, axis=0), prices[:-1], out=returns[1:],
+                      where=valid[1:] & valid[:-1] & (prices[:-1] != 0))
+        sums = np.zeros((len(prices) + 1, prices.shape[1]))
+        sumsq = np.zeros_like(sums)
+        counts = np.zeros(sums.shape, dtype=np.int64)
+        np.cumsum(returns, axis=0, out=sums[1:])
+        np.cumsum(returns * returns, axis=0, out=sumsq[1:])
+        np.cumsum(valid, axis=0, out=counts[1:])
+        # Cửa sổ (t - w, t], các nến đầu dùng mọi nến đã có
+        start = np.maximum(t + 1 - self.vol_window, 0)
+        count = counts[t + 1, cols] - counts[start, cols]
+        total = sums[t + 1, cols] - sums[start, cols]
+        total_sq = sumsq[t + 1, cols] - sumsq[start, cols]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = np.where(count > 1, (total_sq - total * total / count) / (count - 1), 0.0)
+        return slip + self.slippage_vol * np.sqrt(np.maximum(var, 0.0))
+
+    def pnl(self, prices, position, cols, entry_t, exit_t, initial_balance=10000, side=None, exit_price=None):
+        """
+        Lãi/lỗ sau chi phí của block (n, k).
+        prices: (n, 1) dùng chung hoặc (n, k); position: trạng thái nắm giữ (n, k)
+        cols, entry_t, exit_t: danh sách lệnh sắp theo cột rồi thời gian (BacktestEngine._trades)
+        side: chiều từng lệnh (1 long, -1 short), mặc định long
+        exit_price: giá thoát trước trượt giá của từng lệnh (mặc định Close của nến thoát)
+        Trả về (lãi/lỗ theo nến (n, k), lãi/lỗ từng lệnh); tổng theo nến của mỗi cột bằng
+        tổng lãi/lỗ các lệnh của cột đó.
+        """
+        side = np.ones(len(cols)) if side is None else side
+        entry_fill, exit_fill, units, trade_pnl = self.fills(prices, cols, entry_t, exit_t, initial_balance,
+                                                             side, exit_price)
+        bars = self.bar_pnl(prices, position, cols, entry_t, exit_t, side, entry_fill, exit_fill, units)
+        return bars, trade_pnl
+
+    def fills(self, prices, cols, entry_t, exit_t, initial_balance=10000, side=None, exit_price=None):
+        """
+        Giá khớp vào/thoát (sau trượt giá), khối lượng và lãi/lỗ sau chi phí của từng lệnh
+        (tham số như pnl).
+        """
+        side = np.ones(len(cols)) if side is None else side.astype(np.float64)
+        price_cols = cols if prices.shape[1] > 1 else np.zeros_like(cols)
+        entry_price = prices[entry_t, price_cols]
+        exit_price = prices[exit_t, price_cols] if exit_price is None else exit_price
+        # Trượt giá của nến vào và nến thoát tính chung một lần; luôn theo hướng bất lợi
+        slip = self.slippage(prices, np.concatenate([entry_t, exit_t]), np.concatenate([price_cols, price_cols]))
+        entry_fill = entry_price * (1.0 + side * slip[:len(cols)])
+        exit_fill = exit_price * (1.0 - side * slip[len(cols):])
+        fee = self.fee_rate
+        units = self._units(cols, side, entry_fill, exit_fill, fee, initial_balance)
+        trade_pnl = units * (side * (exit_fill - entry_fill) - fee * (entry_fill + exit_fill))
+        return entry_fill, exit_fill, units, trade_pnl
+
+    def bar_pnl(self, prices, position, cols, entry_t, exit_t, side, entry_fill, exit_fill, units):
+        """Lãi/lỗ theo nến (n, k) của các lệnh đã khớp (kết quả của fills)."""
+        n, k = position.shape
+        side = side.astype(np.float64)
+        price_cols = cols if prices.shape[1] > 1 else np.zeros_like(cols)
+        fee = self.fee_rate
+        # Khối lượng (có dấu) đang giữ sau mỗi nến: +units tại nến vào, -units tại nến thoát.
+        # Mỗi (nến, cột) có nhiều nhất một lệnh vào và một lệnh thoát nên gán trực tiếp được
+        held = np.zeros((n, k))
+        held[entry_t, cols] = side * units
+        held[exit_t, cols] -= side * units
+        np.cumsum(held, axis=0, out=held)
+        bars = np.zeros((n, k))
+        np.multiply(held[:-1], np.diff(prices, axis=0), out=bars[1:])
+        # Chênh lệch giá khớp so với Close và phí ghi vào nến vào/thoát
+        bars[entry_t, cols] -= units * (side * (entry_fill - prices[entry_t, price_cols]) + fee * entry_fill)
+        bars[exit_t, cols] += units * (side * (exit_fill - prices[exit_t, price_cols]) - fee * exit_fill)
+        return bars
+
+    def _units(self, cols, side, entry_fill, exit_fill, fee, initial_balance):
+        """Khối lượng từng lệnh; sizing="equity" cộng dồn vốn theo từng cột qua các lệnh."""
+        if self.sizing == "units":
+            return np.full(len(cols), float(self.size))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Vốn nhân với growth sau mỗi lệnh (growth <= 0: cháy tài khoản, các lệnh sau khối lượng 0)
+            ratio = exit_fill / entry_fill
+            growth = 1.0 + self.size * (side * (ratio - 1.0) - fee * (1.0 + ratio))
+            log_growth = np.log(np.maximum(growth, np.finfo(np.float64).tiny))
+        # Tích lũy loại trừ (các lệnh trước trong cùng cột) bằng cumsum của log
+        before = np.cumsum(log_growth) - log_growth
+        before -= before[np.searchsorted(cols, cols)]
+        equity = initial_balance * np.exp(before)
+        return self.size * equity / entry_fill
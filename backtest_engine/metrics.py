@@ -0,0 +1,84 @@
+"""
+Chỉ số hiệu suất của backtest, tính vector hóa cho nhiều chiến lược cùng lúc.
+
+Đầu vào là lãi/lỗ theo từng nến (đường vốn) và danh sách lệnh của block (nến × chiến lược).
+Mọi chỉ số theo quy ước "càng lớn càng tốt" để optimizer chọn làm mục tiêu:
+max_drawdown là số âm (-0.25 nghĩa là sụt 25% từ đỉnh).
+"""
+
+import numpy as np
+import pandas as pd
+
+METRICS = ("profit", "trades", "winrate", "profit_factor", "exposure",
+           "max_drawdown", "sharpe", "sortino", "calmar")
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+
+def periods_per_year(index, default=365):
+    """Số nến mỗi năm suy ra từ khoảng cách thời gian (trung vị) của index, crypto giao dịch 24/7."""
+    if isinstance(index, pd.DatetimeIndex) and len(index) > 1:
+        step = np.median(np.diff(index.values).astype("timedelta64[ns]").astype(np.int64)) / 1e9
+        if step > 0:
+            return SECONDS_PER_YEAR / step
+    return default
+
+
+def performance(pnl, position, trade_cols, trade_pnl, initial_balance=10000, periods_per_year=365):
+    """
+    pnl: lãi/lỗ theo nến (n, k) (xem backtester.bar_pnl)
+    position: trạng thái nắm giữ (n, k), 1 long, -1 short, 0 đứng ngoài
+    trade_cols, trade_pnl: cột và lãi/lỗ của từng lệnh (xem BacktestEngine.pnl)
+    Trả về dict {chỉ số: mảng (k,)} theo METRICS.
+    """
+    n, k = pnl.shape
+    # Mỗi bước ghi đè vào mảng tạm có sẵn để giảm số lần duyệt (n, k)
+    equity = np.cumsum(pnl, axis=0)
+    equity += initial_balance
+    returns = np.zeros_like(pnl)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(pnl[1:], equity[:-1], out=returns[1:], where=equity[:-1] > 0)
+
+    # Sụt giảm so với đỉnh trước đó (tính cả vốn ban đầu)
+    ratio = np.maximum.accumulate(equity, axis=0)
+    np.maximum(ratio, initial_balance, out=ratio)
+    np.divide(equity, ratio, out=ratio)
+    max_drawdown = ratio.min(axis=0) - 1.0 if n else np.zeros(k)
+
+    # Trung bình, độ lệch chuẩn (ddof=1) và độ lệch phía giảm từ tổng và tổng bình phương
+    mean = returns.sum(axis=0) / max(n, 1)
+    sumsq = np.einsum("ij,ij->j", returns, returns)
+    std = np.sqrt(np.maximum(sumsq - n * mean ** 2, 0.0) / (n - 1)) if n > 1 else np.zeros(k)
+    np.minimum(returns, 0.0, out=returns)
+    downside = np.sqrt(np.einsum("ij,ij->j", returns, returns) / max(n, 1))
+    scale = np.sqrt(periods_per_year)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / std * scale, 0.0)
+        sortino = np.where(downside > 0, mean / downside * scale, 0.0)
+
+    final = equity[-1] if n else np.full(k, float(initial_balance))
+    years = max(n - 1, 1) / periods_per_year
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        cagr = np.where(final > 0, (final / initial_balance) ** (1.0 / years) - 1.0, -1.0)
+        calmar = np.where(max_drawdown < 0, cagr / -max_drawdown, np.where(cagr > 0, np.inf, 0.0))
+
+    trades = np.bincount(trade_cols, minlength=k)
+    wins = np.bincount(trade_cols[trade_pnl > 0], minlength=k)
+    gross_profit = np.bincount(trade_cols, weights=np.maximum(trade_pnl, 0.0), minlength=k)
+    gross_loss = np.bincount(trade_cols, weights=np.maximum(-trade_pnl, 0.0), minlength=k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        winrate = np.where(trades > 0, wins / trades, 0.0)
+        profit_factor = np.where(gross_loss > 0, gross_profit / gross_loss,
+                                 np.where(gross_profit > 0, np.inf, 0.0))
+
+    return {
+        "profit": np.bincount(trade_cols, weights=trade_pnl, minlength=k),
+        "trades": trades,
+        "winrate": winrate,
+        "profit_factor": profit_factor,
+        "exposure": (position != 0).mean(axis=0) if n else np.zeros(k),
+        "max_drawdown": max_drawdown,
+        "sharpe": sharpe,
+        "sortino": sortino,
+        "calmar": calmar,
+    }
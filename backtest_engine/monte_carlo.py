@@ -0,0 +1,115 @@
+"""
+Kiểm tra độ vững của kết quả backtest bằng Monte Carlo (bootstrap lãi/lỗ từng lệnh).
+
+Bộ tham số thắng trong optimizer có thể chỉ nhờ thứ tự lệnh may mắn. Ở đây các lệnh được lấy
+mẫu lại có hoàn lại (bootstrap) hoặc theo khối liền nhau (block bootstrap, giữ tương quan giữa
+các lệnh gần nhau) hàng nghìn lần. Mọi lần lấy mẫu là các dòng của một ma trận (lần × lệnh),
+đường vốn và chỉ số tính bằng cumsum/cummax theo trục lệnh, không lặp theo từng lần.
+
+Các chỉ số tính trên đường vốn theo lệnh (vốn sau mỗi lệnh), khác run() tính theo nến:
+- profit: tổng lãi/lỗ
+- max_drawdown: sụt giảm lớn nhất so với đỉnh (số âm, như metrics)
+- sharpe: trung bình / độ lệch chuẩn lợi suất từng lệnh, quy đổi theo năm bằng trades_per_year
+"""
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import metrics
+
+MC_METRICS = ("profit", "max_drawdown", "sharpe")
+
+# Số ô (lần lấy mẫu × lệnh) tối đa mỗi khối, giới hạn bộ nhớ tạm
+_CHUNK_CELLS = 1 << 21
+
+
+def _sample_index(rng, n_rows, n_trades, block_size):
+    """Ma trận chỉ số lệnh (n_rows, n_trades); block_size > 1: các khối liền nhau, nối vòng."""
+    if not block_size or block_size <= 1:
+        return rng.integers(0, n_trades, size=(n_rows, n_trades))
+    n_blocks = -(-n_trades // block_size)
+    starts = rng.integers(0, n_trades, size=(n_rows, n_blocks, 1))
+    index = (starts + np.arange(block_size)) % n_trades
+    return index.reshape(n_rows, -1)[:, :n_trades]
+
+
+def path_metrics(pnl, initial_balance=10000, trades_per_year=None):
+    """
+    Các chỉ số MC_METRICS cho từng dòng của pnl (lần × lệnh).
+    Trả về dict {chỉ số: mảng (lần,)}.
+    """
+    pnl = np.atleast_2d(np.asarray(pnl, dtype=np.float64))
+    rows, n = pnl.shape
+    if n == 0:
+        return {name: np.zeros(rows) for name in MC_METRICS}
+    equity = np.cumsum(pnl, axis=1)
+    equity += initial_balance
+    peak = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peak, initial_balance, out=peak)
+    max_drawdown = (equity / peak).min(axis=1) - 1.0
+
+    # Lợi suất từng lệnh so với vốn trước lệnh
+    before = np.empty_like(equity)
+    before[:, 0] = initial_balance
+    before[:, 1:] = equity[:, :-1]
+    returns = np.zeros_like(pnl)
+    np.divide(pnl, before, out=returns, where=before > 0)
+    mean = returns.mean(axis=1)
+    std = returns.std(axis=1, ddof=1) if n > 1 else np.zeros(rows)
+    scale = np.sqrt(trades_per_year) if trades_per_year else 1.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / std * scale, 0.0)
+    return {"profit": equity[:, -1] - initial_balance,
+            "max_drawdown": max_drawdown, "sharpe": sharpe}
+
+
+def resample_metrics(trade_pnl, n_resamples=10000, block_size=None, seed=None, initial_balance=10000,
+                     trades_per_year=None):
+    """
+    Chỉ số của n_resamples lần lấy mẫu lại trade_pnl (lãi/lỗ từng lệnh theo thứ tự thời gian).
+    block_size: None/1 bootstrap từng lệnh, > 1 block bootstrap với khối block_size lệnh liền nhau
+    Trả về dict {chỉ số: mảng (n_resamples,)}.
+    """
+    trade_pnl = np.asarray(trade_pnl, dtype=np.float64)
+    n = len(trade_pnl)
+    results = {name: np.zeros(n_resamples) for name in MC_METRICS}
+    if n == 0:
+        return results
+    rng = np.random.default_rng(seed)
+    step = max(1, _CHUNK_CELLS // n)
+    for start in range(0, n_resamples, step):
+        stop = min(start + step, n_resamples)
+        sample = trade_pnl[_sample_index(rng, stop - start, n, block_size)]
+        for name, values in path_metrics(sample, initial_balance, trades_per_year).items():
+            results[name][start:stop] = values
+    return results
+
+
+def confidence_intervals(trade_pnl, n_resamples=10000, block_size=None, level=0.95, seed=None,
+                         initial_balance=10000, trades_per_year=None):
+    """
+    Khoảng tin cậy (percentile) của MC_METRICS.
+    Trả về DataFrame mỗi dòng một chỉ số, các cột: observed (thứ tự lệnh thật), mean, lower, upper,
+    prob_below_zero (tỉ lệ lần lấy mẫu có chỉ số < 0, ví dụ xác suất thua lỗ với profit).
+    """
+    observed = path_metrics(trade_pnl, initial_balance, trades_per_year)
+    samples = resample_metrics(trade_pnl, n_resamples, block_size, seed, initial_balance, trades_per_year)
+    tail = (1 - level) / 2 * 100
+    rows = {}
+    for name in MC_METRICS:
+        lower, upper = np.percentile(samples[name], [tail, 100 - tail])
+        rows[name] = {"observed": observed[name][0], "mean": samples[name].mean(), "lower": lower,
+                      "upper": upper, "prob_below_zero": (samples[name] < 0).mean()}
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def monte_carlo(engine, n_resamples=10000, block_size=None, level=0.95, seed=None):
+    """
+    confidence_intervals cho các lệnh của một BacktestEngine (cùng chi phí, mode, stop).
+    Số lệnh mỗi năm suy ra từ số lệnh và độ dài dữ liệu.
+    """
+    trade_pnl = engine.trade_pnl()
+    ppy = engine.periods_per_year or metrics.periods_per_year(engine.df.index)
+    years = max(len(engine.df) - 1, 1) / ppy
+    return confidence_intervals(trade_pnl, n_resamples, block_size, level, seed, engine.initial_balance,
+                                len(trade_pnl) / years if len(trade_pnl) else None)
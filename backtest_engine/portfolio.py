@@ -0,0 +1,176 @@
+"""
+Backtest danh mục nhiều tài sản trên ma trận (thời gian × tài sản).
+
+Danh mục chỉ thay đổi tại các nến tái cân bằng (event): chọn tài sản đang có tín hiệu giữ,
+chia vốn theo quy tắc phân bổ và giới hạn vốn, rồi giữ nguyên số lượng tới event sau (tỉ trọng
+trôi theo giá). Giữa hai event, giá trị danh mục là tích vô hướng số lượng × giá của từng nến,
+vốn tại các event là tích lũy (cumprod) các hệ số tăng trưởng, nên không có vòng lặp Python
+theo tài sản hay theo nến.
+"""
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import metrics
+from backtest_engine.backtester import positions_from_signals
+
+# Số ô (nến × tài sản) tối đa mỗi lần gom số lượng theo nến khi định giá danh mục
+_CHUNK_CELLS = 1 << 20
+
+
+def price_matrix(frames, column="Close", symbols=None):
+    """
+    Ghép dict {mã: DataFrame OHLCV} thành DataFrame (thời gian × mã) của cột `column`,
+    căn theo hợp các index thời gian. Giá sau khi ngừng giao dịch được giữ bằng giá cuối
+    (ffill), trước khi niêm yết là NaN (không giao dịch được).
+    symbols: thứ tự cột, ví dụ TierOnePriceFetcher.create_tier1_universe()["symbol"] (xếp theo rank)
+    """
+    symbols = [s for s in (symbols if symbols is not None else frames) if s in frames]
+    matrix = pd.concat({s: frames[s][column].squeeze() for s in symbols}, axis=1, sort=True)
+    return matrix.ffill()
+
+
+class PortfolioBacktester:
+    def __init__(self, prices, signals, initial_balance=10000, rebalance=24, max_positions=None,
+                 max_weight=1.0, max_gross=1.0, scores=None, costs=None, periods_per_year=None):
+        """
+        prices: DataFrame/mảng (n, m) giá đóng cửa đã căn thời gian (xem price_matrix); NaN: không giao dịch
+        signals: (n, m) tín hiệu từng tài sản (1: mua, -1: bán, 0: giữ trạng thái), như BacktestEngine
+        rebalance: số nến giữa hai lần tái cân bằng, hoặc "signal": tái cân bằng khi tập tài sản được chọn đổi
+        max_positions: số tài sản tối đa cùng lúc (chọn theo scores); None: không giới hạn
+        max_weight: tỉ trọng tối đa của một tài sản
+        max_gross: tổng tỉ trọng tối đa (giới hạn vốn, 1.0 = không dùng đòn bẩy, phần còn lại giữ tiền mặt)
+        scores: (n, m) điểm xếp hạng khi vượt max_positions (lớn hơn được chọn trước);
+                mặc định theo thứ tự cột (cột đầu ưu tiên, như universe xếp theo rank)
+        costs: backtest_engine.costs.CostModel, phí và trượt giá tính trên giá trị mua/bán khi
+               tái cân bằng (sizing của CostModel không dùng, tỉ trọng do quy tắc trên quyết định)
+        periods_per_year: như BacktestEngine (mặc định suy ra từ index của prices)
+        """
+        if rebalance != "signal" and (not isinstance(rebalance, (int, np.integer)) or rebalance <= 0):
+            raise ValueError(f"rebalance phải là số nến > 0 hoặc 'signal', nhận {rebalance!r}")
+        if max_weight <= 0 or max_gross <= 0 or (max_positions is not None and max_positions <= 0):
+            raise ValueError("max_weight, max_gross và max_positions phải lớn hơn 0")
+        self.index = getattr(prices, "index", None)
+        self.columns = getattr(prices, "columns", None)
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.signals = np.asarray(signals)
+        if self.prices.ndim != 2 or self.signals.shape != self.prices.shape:
+            raise ValueError(f"prices và signals phải cùng kích thước (n, m): {self.prices.shape}, "
+                             f"{self.signals.shape}")
+        self.scores = None if scores is None else np.asarray(scores, dtype=np.float64)
+        self.initial_balance = initial_balance
+        self.rebalance = rebalance
+        self.max_positions = max_positions
+        self.max_weight = max_weight
+        self.max_gross = max_gross
+        self.costs = costs
+        self.periods_per_year = periods_per_year
+
+    def run(self):
+        """
+        Trả về dict:
+            equity: Series vốn theo nến (sau phí)
+            weights: DataFrame tỉ trọng mục tiêu tại mỗi event (dòng: nến tái cân bằng, cột: tài sản)
+            turnover: Series tổng |thay đổi tỉ trọng| tại mỗi event
+            metrics: dict các chỉ số trong metrics.METRICS; "trades" là số kỳ giữ vị thế (giữa hai
+                     event), winrate/profit_factor tính trên lãi/lỗ từng kỳ
+        """
+        n, m = self.prices.shape
+        tradable = ~np.isnan(self.prices)
+        px = np.where(tradable, self.prices, 0.0)
+        held = positions_from_signals(self.signals).view(bool) & tradable
+        events, weights = self._targets(held)
+
+        # Số lượng trên mỗi đơn vị vốn của từng kỳ: tỉ trọng / giá tại event
+        units = np.zeros_like(weights)
+        np.divide(weights, px[events], out=units, where=weights > 0)
+        cash = 1.0 - weights.sum(axis=1)
+
+        # Hệ số tăng trưởng của từng kỳ định giá tại event kế tiếp (trước khi tái cân bằng)
+        growth = np.ones(len(events))
+        growth[1:] = cash[:-1] + np.einsum("ij,ij->i", units[:-1], px[events[1:]])
+        drifted = np.zeros_like(weights)
+        drifted[1:] = units[:-1] * px[events[1:]]
+        np.divide(drifted[1:], growth[1:, None], out=drifted[1:], where=growth[1:, None] > 0)
+        change = np.abs(weights - drifted)
+        turnover = change.sum(axis=1)
+        factor = growth * (1.0 - self._cost(events, change))
+        balance = self.initial_balance * np.cumprod(factor)
+
+        # Vốn theo nến: vốn sau event gần nhất (<= t) × giá trị danh mục của kỳ đó tại t
+        segment = np.searchsorted(events, np.arange(n), side="right") - 1
+        equity = np.full(n, float(self.initial_balance))
+        step = max(1, _CHUNK_CELLS // max(m, 1))
+        for start in range(int(np.searchsorted(segment, 0)), n, step):
+            rows = segment[start:start + step]
+            value = cash[rows] + np.einsum("ij,ij->i", units[rows], px[start:start + step])
+            equity[start:start + step] = balance[rows] * value
+
+        index = self.index if self.index is not None else pd.RangeIndex(n)
+        columns = self.columns if self.columns is not None else pd.RangeIndex(m)
+        return {
+            "equity": pd.Series(equity, index=index, name="equity"),
+            "weights": pd.DataFrame(weights, index=index[events], columns=columns),
+            "turnover": pd.Series(turnover, index=index[events], name="turnover"),
+            "metrics": self._metrics(equity, events, balance, weights, segment),
+        }
+
+    def _select(self, held, rows):
+        """Tài sản được chọn tại các nến rows: đang giữ và nằm trong max_positions điểm cao nhất."""
+        chosen = held[rows]
+        m = chosen.shape[1]
+        if self.max_positions is None or self.max_positions >= m:
+            return chosen
+        if self.scores is not None:
+            scores = self.scores[rows]
+        else:
+            scores = np.broadcast_to(-np.arange(m, dtype=np.float64), chosen.shape)
+        key = np.where(chosen & ~np.isnan(scores), scores, -np.inf)
+        top = np.argpartition(-key, self.max_positions - 1, axis=1)[:, :self.max_positions]
+        mask = np.zeros_like(chosen)
+        np.put_along_axis(mask, top, True, axis=1)
+        return mask & chosen
+
+    def _targets(self, held):
+        """(nến tái cân bằng, tỉ trọng mục tiêu (event × m)) theo quy tắc rebalance và giới hạn vốn."""
+        n = held.shape[0]
+        if self.rebalance == "signal":
+            chosen = self._select(held, slice(None))
+            changed = np.empty(n, dtype=bool)
+            changed[0] = chosen[0].any()
+            np.any(chosen[1:] != chosen[:-1], axis=1, out=changed[1:])
+            events = np.flatnonzero(changed)
+            chosen = chosen[events]
+        else:
+            events = np.arange(0, n, self.rebalance)
+            chosen = self._select(held, events)
+        # Chia đều max_gross cho các tài sản được chọn, mỗi tài sản không quá max_weight
+        count = chosen.sum(axis=1, keepdims=True)
+        with np.errstate(divide="ignore"):
+            weight = np.minimum(self.max_gross / count, self.max_weight)
+        return events, np.where(chosen, weight, 0.0)
+
+    def _cost(self, events, change):
+        """Tỉ lệ vốn mất do phí và trượt giá tại mỗi event (trên phần tỉ trọng mua/bán)."""
+        if self.costs is None:
+            return np.zeros(len(events))
+        rows, cols = np.nonzero(change)
+        rate = self.costs.fee_rate + self.costs.slippage(self.prices, events[rows], cols)
+        return np.bincount(rows, weights=rate * change[rows, cols], minlength=len(events))
+
+    def _metrics(self, equity, events, balance, weights, segment):
+        n = len(equity)
+        pnl = np.zeros((n, 1))
+        pnl[1:, 0] = np.diff(equity)
+        invested = weights.sum(axis=1) > 0
+        position = np.zeros((n, 1), dtype=np.int8)
+        position[segment >= 0, 0] = invested[segment[segment >= 0]]
+        # Mỗi kỳ giữ vị thế (giữa hai event) tính như một lệnh
+        period_end = np.append(equity[events[1:]], equity[-1]) if len(events) else np.array([])
+        period_pnl = (period_end - balance)[invested]
+        ppy = self.periods_per_year or metrics.periods_per_year(self.index)
+        values = metrics.performance(pnl, position, np.zeros(len(period_pnl), dtype=np.int64), period_pnl,
+                                     self.initial_balance, ppy)
+        result = {name: column[0] for name, column in values.items()}
+        result["profit"] = equity[-1] - self.initial_balance if n else 0.0
+        return result
@@ -0,0 +1,153 @@
+"""
+Vị thế long/short và thoát lệnh bằng stop-loss, take-profit, trailing stop theo High/Low.
+
+Thoát lệnh bằng stop phụ thuộc đường giá sau lúc vào lệnh nên không tính được bằng một phép
+toán trên cả chuỗi. Kernel ở đây tách làm hai bước:
+1. Với mọi nến có thể vào lệnh, tìm nến chạm stop đầu tiên cùng lúc bằng bảng thưa (sparse table:
+   min Low, max High và mức sụt từ đỉnh bên trong của mọi đoạn dài 2^k) và nhảy nhị phân:
+   log2(n) bước NumPy trên mảng các nến vào lệnh, không duyệt từng nến.
+2. Nối các lệnh thật theo thứ tự thời gian (lệnh sau bắt đầu ở tín hiệu kế tiếp sau khi lệnh trước
+   đóng): lệnh kế tiếp của mọi nến vào lệnh tính trước bằng searchsorted, vòng lặp chỉ đi theo
+   con trỏ; trạng thái dựng lại bằng cumsum.
+
+Mọi so sánh làm trên log giá nhân chiều lệnh (short: -log giá), nên long và short dùng chung
+công thức "mức dừng lỗ nằm dưới giá, chốt lời nằm trên giá".
+
+Quy ước:
+- Vào lệnh và thoát theo tín hiệu tại giá Close của nến tín hiệu.
+- Stop chỉ kiểm tra từ nến sau nến vào lệnh, kể cả nến có tín hiệu thoát (chạm trong nến trước
+  khi đóng cửa). Cùng một nến chạm cả stop và take-profit thì tính stop (thận trọng).
+- Trailing stop dựa trên đỉnh (long) / đáy (short) của High/Low tới nến trước đó.
+- Giá thoát là mức stop, nếu cả nến đã vượt qua mức đó (gap) thì lấy High/Low của nến.
+- Sau khi bị stop, đứng ngoài tới tín hiệu vào lệnh tiếp theo (không vào lại trong cùng nến).
+"""
+
+import numpy as np
+
+MODES = ("long", "long_short")
+
+
+def long_short_positions(signals):
+    """Trạng thái long/short: tín hiệu khác 0 gần nhất (1: long, -1: short), chưa có thì 0."""
+    signals = np.asarray(signals)
+    side = np.where(signals == 1, 1, np.where(signals == -1, -1, 0)).astype(np.int8)
+    t = np.arange(signals.shape[0]).reshape((-1,) + (1,) * (signals.ndim - 1))
+    last = np.maximum.accumulate(np.where(side != 0, t, 0), axis=0)
+    return np.take_along_axis(side, np.broadcast_to(last, side.shape), axis=0)
+
+
+def _next_index(mask):
+    """next[t] = chỉ số nhỏ nhất >= t có mask True (không có thì len(mask))."""
+    n = len(mask)
+    index = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(index[::-1])[::-1]
+
+
+def _gap(ratio, side, sign, default):
+    """Ngưỡng của tỉ lệ ratio trong log giá nhân chiều lệnh (sign -1: dưới giá, 1: trên giá)."""
+    return default if ratio is None else side * np.log1p(sign * side * ratio)
+
+
+def _sparse_tables(favorable, adverse):
+    """
+    Bảng thưa theo từng mức k, mỗi mức là các mảng cho đoạn [i, i + 2^k):
+    (min adverse, max favorable, min(adverse[t] - max favorable trước t trong đoạn)).
+    """
+    tables = [(adverse, favorable, np.full(len(adverse), np.inf))]
+    length = 1
+    while 2 * length <= len(adverse):
+        low, high, drop = tables[-1]
+        m = len(low) - length
+        # Ghép hai nửa [i, i + L) và [i + L, i + 2L)
+        tables.append((np.fmin(low[:m], low[length:]), np.fmax(high[:m], high[length:]),
+                       np.fmin(np.fmin(drop[:m], drop[length:]), low[length:] - high[:m])))
+        length *= 2
+    return tables
+
+
+def _first_stops(entries, limits, entry_level, favorable, adverse, stop_gap, target_gap, trail_gap):
+    """
+    Nến chạm stop đầu tiên trong [entry + 1, limit] của từng lệnh và mức giá thoát (log giá nhân
+    chiều lệnh, NaN nếu không chạm). Nhảy nhị phân: thử bỏ qua các đoạn 2^k từ dài tới ngắn.
+    """
+    stop_level = entry_level + stop_gap
+    target_level = entry_level + target_gap
+    position = entries + 1
+    peak = entry_level.copy()
+    tables = _sparse_tables(favorable, adverse)
+    for k in range(len(tables) - 1, -1, -1):
+        low, high, drop = tables[k]
+        length = 1 << k
+        fits = position + length - 1 <= limits
+        i = np.where(fits, position, 0)
+        # Bỏ qua cả đoạn nếu không có nến nào chạm stop, take-profit hay trailing stop
+        clear = (fits & (low[i] > stop_level) & (high[i] < target_level)
+                 & (low[i] - peak > trail_gap) & (drop[i] > trail_gap))
+        position = np.where(clear, position + length, position)
+        peak = np.where(clear, np.fmax(peak, high[i]), peak)
+    hit = position <= limits
+    at = np.where(hit, position, 0)
+    level = np.maximum(stop_level, peak + trail_gap)
+    stopped = adverse[at] <= level
+    price = np.where(stopped, np.minimum(level, favorable[at]), np.maximum(target_level, adverse[at]))
+    return position, np.where(hit, price, np.nan)
+
+
+def stop_positions(close, high, low, signals, mode="long", stop_loss=None, take_profit=None,
+                   trailing_stop=None):
+    """
+    Trạng thái nắm giữ (n,) kiểu int8 (1 long, -1 short, 0 đứng ngoài) và giá thoát (n,)
+    tại các nến thoát bằng stop (NaN ở nến khác).
+    stop_loss, take_profit, trailing_stop: tỉ lệ so với giá vào lệnh / đỉnh (0.05 = 5%), None: không dùng
+    """
+    close = np.asarray(close, dtype=np.float64)
+    signals = np.asarray(signals)
+    n = len(close)
+    position = np.zeros(n, dtype=np.int8)
+    exit_price = np.full(n, np.nan)
+    buy, sell = signals == 1, signals == -1
+    entries = np.flatnonzero(buy | sell if mode == "long_short" else buy)
+    if not len(entries):
+        return position, exit_price
+    side = np.where(buy[entries], 1, -1)
+    # Nến tín hiệu ngược chiều kế tiếp: thoát long khi gặp -1, thoát short khi gặp 1
+    after = np.minimum(entries + 1, n - 1)
+    exit_bar = np.where(side == 1, _next_index(sell)[after], _next_index(buy)[after])
+    exit_bar[entries + 1 >= n] = n
+    stop_price = np.full(len(entries), np.nan)
+
+    if stop_loss is not None or take_profit is not None or trailing_stop is not None:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_high = np.log(np.asarray(high, dtype=np.float64))
+            log_low = np.log(np.asarray(low, dtype=np.float64))
+            log_close = np.log(close)
+        for s, favorable, adverse in ((1, log_high, log_low), (-1, -log_low, -log_high)):
+            chosen = np.flatnonzero(side == s)
+            if not len(chosen):
+                continue
+            bars, prices = _first_stops(entries[chosen], np.minimum(exit_bar[chosen], n - 1),
+                                        s * log_close[entries[chosen]], favorable, adverse,
+                                        _gap(stop_loss, s, -1, -np.inf), _gap(take_profit, s, 1, np.inf),
+                                        _gap(trailing_stop, s, -1, -np.inf))
+            hit = ~np.isnan(prices)
+            exit_bar[chosen[hit]] = bars[hit]
+            stop_price[chosen[hit]] = np.exp(s * prices[hit])
+
+    # Nối các lệnh thật: lệnh sau bắt đầu ở nến vào lệnh kế tiếp sau khi lệnh trước đóng
+    # (bị stop thì từ nến sau, thoát theo tín hiệu thì ngay nến đó: long_short đảo vị thế)
+    stopped = ~np.isnan(stop_price)
+    following = np.searchsorted(entries, np.where(stopped, exit_bar + 1, exit_bar)).tolist()
+    chain = []
+    i = 0
+    while i < len(following):
+        chain.append(i)
+        i = following[i]
+    chain = np.asarray(chain, dtype=np.intp)
+    # Trạng thái: +side từ nến vào, -side từ nến thoát, cộng dồn
+    change = np.zeros(n + 1, dtype=np.int8)
+    change[entries[chain]] = side[chain]
+    np.subtract.at(change, exit_bar[chain], side[chain].astype(np.int8))
+    np.cumsum(change[:n], out=position)
+    closed = chain[stopped[chain]]
+    exit_price[exit_bar[closed]] = stop_price[closed]
+    return position, exit_price
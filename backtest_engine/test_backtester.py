@@ -0,0 +1,115 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine.backtester import BacktestEngine
+from testing_helpers import make_prices, make_signals
+
+
+def loop_run(df, signals, initial_balance=10000):
+    """Vòng lặp iloc gốc của BacktestEngine.run, dùng để đối chiếu."""
+    balance = initial_balance
+    position = 0
+    entry_price = 0
+    for i in range(len(df)):
+        signal = signals.iloc[i]
+        price = df['Close'].iloc[i]
+        if signal == 1 and position == 0:
+            position = 1
+            entry_price = price
+        elif signal == -1 and position == 1:
+            balance += (price - entry_price)
+            position = 0
+    if position == 1:
+        balance += (df['Close'].iloc[-1] - entry_price)
+    profit = balance - initial_balance
+    return {"profit": profit}
+
+
+def test_vectorized_run_matches_loop():
+    df = make_prices()
+    cases = [
+        make_signals(df, seed=1),
+        make_signals(df, values=(0, 1), seed=2),            # như default_backtest_func
+        make_signals(df, values=(-1, 0, 0, 0, 1), seed=3),
+        make_signals(df, values=(1, 1, 1, 0), seed=4),      # vị thế còn mở cuối kỳ
+        pd.Series(0, index=df.index),
+        make_signals(df, seed=5).astype(float).where(lambda s: s != 0, np.nan),
+    ]
+    for signals in cases:
+        expected = loop_run(df, signals)["profit"]
+        actual = BacktestEngine(df, signals).run()["profit"]
+        assert actual == expected
+
+
+def test_multiindex_close_returns_series():
+    df = make_prices(300)
+    df.columns = pd.MultiIndex.from_tuples([("Close", "BTC-USD")])
+    signals = make_signals(df, seed=6)
+    expected = loop_run(df, signals)["profit"]
+    actual = BacktestEngine(df, signals).run()["profit"]
+    assert isinstance(actual, pd.Series)
+    assert actual.index.equals(expected.index) and (actual == expected).all()
+
+
+def test_run_batch_matches_run():
+    df = make_prices(1500, seed=8)
+    signals = pd.DataFrame({f"combo_{j}": make_signals(df, values=(-1, 0, 1) if j % 2 else (0, 1), seed=j)
+                            for j in range(40)})
+    out = BacktestEngine.run_batch(df["Close"], signals)
+    assert list(out.index) == list(signals.columns)
+    for col in signals.columns:
+        expected = loop_run(df, signals[col])["profit"]
+        assert np.isclose(out.loc[col, "profit"], expected, rtol=1e-12, atol=1e-6)
+    # Chia khối theo cột không làm thay đổi kết quả
+    import backtest_engine.backtester as backtester
+    cells, backtester._BATCH_CELLS = backtester._BATCH_CELLS, 1500 * 7
+    try:
+        pd.testing.assert_frame_equal(BacktestEngine.run_batch(df["Close"], signals), out)
+    finally:
+        backtester._BATCH_CELLS = cells
+
+
+def test_run_batch_trades_and_winrate():
+    close = np.array([10.0, 11.0, 12.0, 11.0, 9.0, 10.0])
+    signals = np.array([
+        [1, 0, -1, 1, -1, 0],   # 10->12 lãi, 11->9 lỗ
+        [0, 1, 0, 0, 0, 0],     # 11->10 (chốt cuối kỳ) lỗ
+        [0, 0, 0, 0, 0, 0],
+    ]).T
+    out = BacktestEngine.run_batch(close, signals)
+    np.testing.assert_allclose(out["profit"], [0.0, -1.0, 0.0])
+    assert out["trades"].tolist() == [2, 1, 0]
+    np.testing.assert_allclose(out["winrate"], [0.5, 0.0, 0.0])
+
+
+def benchmark_batch(n_bars=50000, n_combos=500):
+    df = make_prices(n_bars)
+    signals = pd.DataFrame({j: make_signals(df, values=(0, 1), seed=j) for j in range(n_combos)})
+    start = time.perf_counter()
+    for col in signals.columns:
+        BacktestEngine(df, signals[col]).run()
+    single = time.perf_counter() - start
+    start = time.perf_counter()
+    BacktestEngine.run_batch(df["Close"], signals)
+    batch = time.perf_counter() - start
+    print(f"{n_combos} tổ hợp × {n_bars} nến: run() từng cột {single:.2f} s | run_batch {batch:.2f} s"
+          f" | nhanh hơn {single / batch:.1f}x")
+
+
+if __name__ == "__main__":
+    df = make_prices(50000)
+    signals = make_signals(df, seed=7)
+    start = time.perf_counter()
+    expected = loop_run(df, signals)
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(10):
+        actual = BacktestEngine(df, signals).run()
+    vector_time = (time.perf_counter() - start) / 10
+    assert actual["profit"] == expected["profit"]
+    print(f"50k nến: vòng lặp {loop_time * 1000:.1f} ms | vector hóa {vector_time * 1000:.2f} ms"
+          f" | nhanh hơn {loop_time / vector_time:.0f}x")
+    benchmark_batch(n_bars=2000)
+    benchmark_batch(n_bars=50000)
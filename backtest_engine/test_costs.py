@@ -0,0 +1,105 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest_engine.backtester import BacktestEngine
+from backtest_engine.costs import CostModel
+from testing_helpers import make_prices, make_signals
+
+
+def reference_run(df, signals, costs, initial_balance=10000):
+    """Vòng lặp từng nến có phí, trượt giá và khối lượng lệnh để đối chiếu (trả về lãi/lỗ từng lệnh, vốn cuối)."""
+    close = df["Close"].to_numpy(dtype=np.float64)
+    returns = np.concatenate([[0.0], np.diff(close) / close[:-1]])
+    fee = costs.fee_rate
+
+    def slip(t):
+        window = returns[max(t + 1 - costs.vol_window, 0):t + 1]
+        vol = window.std(ddof=1) if len(window) > 1 else 0.0
+        return costs.slippage_bps / 1e4 + costs.slippage_vol * vol
+
+    cash, units, entry_cost, trades = initial_balance, 0.0, 0.0, []
+    for t, signal in enumerate(np.asarray(signals)):
+        if signal == 1 and units == 0:
+            fill = close[t] * (1 + slip(t))
+            units = costs.size if costs.sizing == "units" else costs.size * cash / fill
+            entry_cost = units * fill * (1 + fee)
+            cash -= entry_cost
+        elif signal == -1 and units > 0:
+            proceeds = units * close[t] * (1 - slip(t)) * (1 - fee)
+            cash += proceeds
+            trades.append(proceeds - entry_cost)
+            units = 0.0
+    if units > 0:
+        t = len(close) - 1
+        proceeds = units * close[t] * (1 - slip(t)) * (1 - fee)
+        cash += proceeds
+        trades.append(proceeds - entry_cost)
+    return np.array(trades), cash
+
+
+@pytest.mark.parametrize("costs", [
+    CostModel(taker_bps=10),
+    CostModel(maker_bps=2, taker_bps=7, order_type="maker", slippage_bps=5, size=0.25),
+    CostModel(taker_bps=5, slippage_vol=0.5, vol_window=10),
+    CostModel(taker_bps=10, slippage_bps=3, sizing="equity", size=0.5),
+])
+def test_costs_match_reference(costs):
+    df = make_prices(2000, seed=4)
+    for seed, values in [(1, (-1, 0, 0, 0, 1)), (2, (0, 0, 0, 1))]:
+        signals = make_signals(df, values=values, seed=seed)
+        trades, cash = reference_run(df, signals, costs)
+        result = BacktestEngine(df, signals, costs=costs).run()
+        assert result["trades"] == len(trades)
+        assert np.isclose(result["profit"], trades.sum(), rtol=1e-9)
+        assert np.isclose(result["profit"], cash - 10000, rtol=1e-9)
+        assert np.isclose(result["winrate"], (trades > 0).mean())
+        # Đường vốn theo nến cộng lại đúng bằng lợi nhuận sau chi phí
+        position = np.asarray(signals.replace(0, np.nan).ffill().fillna(-1).eq(1), dtype=np.int8)
+        bars, _, _ = BacktestEngine.pnl(df["Close"].to_numpy()[:, None], position[:, None], costs=costs)
+        assert np.isclose(bars.sum(), cash - 10000, rtol=1e-9)
+
+
+def test_costs_reduce_profit_and_free_model_is_exact():
+    df = make_prices(3000, seed=6)
+    signals = make_signals(df, seed=3)
+    base = BacktestEngine(df, signals).run()
+    assert BacktestEngine(df, signals, costs=CostModel()).run() == base
+    costly = BacktestEngine(df, signals, costs=CostModel(taker_bps=10, slippage_bps=5)).run()
+    assert costly["profit"] < base["profit"]
+    assert costly["trades"] == base["trades"]
+
+
+def test_run_batch_costs_match_run():
+    df = make_prices(1500, seed=8)
+    costs = CostModel(taker_bps=8, slippage_vol=0.3, sizing="equity", size=0.8)
+    signals = pd.DataFrame({j: make_signals(df, values=(-1, 0, 0, 1), seed=j) for j in range(20)})
+    batch = BacktestEngine.run_batch(df["Close"], signals, costs=costs)
+    for col in signals.columns:
+        single = BacktestEngine(df, signals[col], costs=costs).run()
+        for name in batch.columns:
+            assert np.isclose(batch.loc[col, name], single[name], rtol=1e-9, atol=1e-9), (col, name)
+
+
+def test_invalid_cost_model():
+    with pytest.raises(ValueError):
+        CostModel(sizing="kelly")
+    with pytest.raises(ValueError):
+        CostModel(order_type="stop")
+    with pytest.raises(ValueError):
+        CostModel(taker_bps=-1)
+
+
+if __name__ == "__main__":
+    df = make_prices(50000)
+    signals = pd.DataFrame({j: make_signals(df, seed=j) for j in range(200)})
+    costs = CostModel(taker_bps=10, slippage_vol=0.5, sizing="equity", size=0.5)
+    for name, model in [("không chi phí", None), ("phí + trượt giá + % vốn", costs)]:
+        start = time.perf_counter()
+        BacktestEngine.run_batch(df["Close"], signals, costs=model)
+        print(f"run_batch 50k nến × 200 chiến lược, {name}: {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    reference_run(df, signals[0], costs)
+    print(f"vòng lặp từng nến (1 chiến lược): {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,85 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import metrics
+from backtest_engine.backtester import BacktestEngine
+from testing_helpers import make_prices, make_signals
+
+
+def reference_metrics(df, signals, initial_balance=10000, periods_per_year=8760):
+    """Tính lại từng chỉ số bằng pandas và vòng lặp lệnh để đối chiếu."""
+    close = df["Close"]
+    position = signals.replace(0, np.nan).ffill().fillna(-1).eq(1).astype(int)
+    pnl = (position.shift(1) * close.diff()).fillna(0.0)
+    equity = initial_balance + pnl.cumsum()
+    returns = pnl / equity.shift(1).fillna(initial_balance)
+    drawdown = (equity / np.maximum(equity.cummax(), initial_balance) - 1).min()
+    trades = []
+    entry = None
+    for price, held in zip(close, position):
+        if held and entry is None:
+            entry = price
+        elif not held and entry is not None:
+            trades.append(price - entry)
+            entry = None
+    if entry is not None:
+        trades.append(close.iloc[-1] - entry)
+    trades = np.array(trades)
+    gains, losses = trades[trades > 0].sum(), -trades[trades < 0].sum()
+    cagr = (equity.iloc[-1] / initial_balance) ** (periods_per_year / (len(df) - 1)) - 1
+    return {
+        "profit": trades.sum(),
+        "trades": len(trades),
+        "winrate": (trades > 0).mean() if len(trades) else 0.0,
+        "profit_factor": gains / losses if losses > 0 else (np.inf if gains > 0 else 0.0),
+        "exposure": position.mean(),
+        "max_drawdown": drawdown,
+        "sharpe": returns.mean() / returns.std() * np.sqrt(periods_per_year),
+        "sortino": returns.mean() / np.sqrt((returns.clip(upper=0) ** 2).mean()) * np.sqrt(periods_per_year),
+        "calmar": cagr / -drawdown,
+    }
+
+
+def test_run_metrics_match_reference():
+    df = make_prices(3000, seed=2)
+    df["Close"] = df["Close"] / 3  # 1 đơn vị giá ~10000, đường vốn không âm
+    for seed, values in [(1, (-1, 0, 0, 0, 1)), (2, (-1, 0, 1)), (3, (0, 0, 0, 1))]:
+        signals = make_signals(df, values=values, seed=seed)
+        actual = BacktestEngine(df, signals).run()
+        expected = reference_metrics(df, signals)
+        assert set(actual) == set(metrics.METRICS)
+        for name in metrics.METRICS:
+            assert np.isclose(actual[name], expected[name], rtol=1e-9, atol=1e-9), name
+
+
+def test_run_batch_metrics_match_run():
+    df = make_prices(1200, seed=5)
+    signals = pd.DataFrame({j: make_signals(df, values=(-1, 0, 0, 1), seed=j) for j in range(30)})
+    signals[30] = 0  # không giao dịch
+    batch = BacktestEngine.run_batch(df["Close"], signals)
+    assert list(batch.columns) == list(metrics.METRICS)
+    for col in signals.columns:
+        single = BacktestEngine(df, signals[col]).run()
+        for name in metrics.METRICS:
+            assert np.isclose(batch.loc[col, name], single[name], rtol=1e-9, atol=1e-6), (col, name)
+    assert batch.loc[30, ["trades", "exposure", "max_drawdown", "sharpe", "calmar"]].tolist() == [0, 0, 0, 0, 0]
+
+
+def test_periods_per_year():
+    assert np.isclose(metrics.periods_per_year(pd.date_range("2024-01-01", periods=10, freq="h")), 8760)
+    assert np.isclose(metrics.periods_per_year(pd.date_range("2024-01-01", periods=10, freq="D")), 365)
+    assert metrics.periods_per_year(pd.RangeIndex(10)) == 365
+
+
+if __name__ == "__main__":
+    df = make_prices(50000)
+    signals = make_signals(df, seed=7)
+    start = time.perf_counter()
+    for _ in range(10):
+        BacktestEngine(df, signals).run()
+    print(f"run() 50k nến, {len(metrics.METRICS)} chỉ số: {(time.perf_counter() - start) / 10 * 1000:.2f} ms")
+    start = time.perf_counter()
+    reference_metrics(df, signals)
+    print(f"pandas + vòng lặp lệnh: {(time.perf_counter() - start) * 1000:.1f} ms")
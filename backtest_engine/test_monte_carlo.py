@@ -0,0 +1,74 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import monte_carlo
+from backtest_engine.backtester import BacktestEngine
+from testing_helpers import make_prices, make_signals
+
+
+def reference_path(pnl, initial_balance=10000, trades_per_year=None):
+    """Tính lại chỉ số của một đường vốn theo lệnh bằng pandas để đối chiếu."""
+    pnl = pd.Series(pnl)
+    equity = initial_balance + pnl.cumsum()
+    drawdown = (equity / np.maximum(equity.cummax(), initial_balance) - 1).min()
+    returns = pnl / equity.shift(1).fillna(initial_balance)
+    sharpe = returns.mean() / returns.std() * np.sqrt(trades_per_year or 1)
+    return {"profit": pnl.sum(), "max_drawdown": drawdown, "sharpe": sharpe}
+
+
+def test_path_metrics_match_reference():
+    rng = np.random.default_rng(0)
+    pnl = rng.normal(20, 300, (5, 80))
+    actual = monte_carlo.path_metrics(pnl, trades_per_year=52)
+    for row in range(5):
+        expected = reference_path(pnl[row], trades_per_year=52)
+        for name in monte_carlo.MC_METRICS:
+            assert np.isclose(actual[name][row], expected[name], rtol=1e-9), name
+
+
+def test_bootstrap_keeps_trades_and_profit_interval_covers_observed():
+    rng = np.random.default_rng(1)
+    pnl = rng.normal(50, 400, 120)
+    samples = monte_carlo.resample_metrics(pnl, 2000, seed=3)
+    assert samples["profit"].shape == (2000,)
+    table = monte_carlo.confidence_intervals(pnl, 2000, seed=3)
+    assert table.loc["profit", "lower"] < table.loc["profit", "observed"] < table.loc["profit", "upper"]
+    # Bootstrap có hoàn lại: trung bình profit gần tổng thật (n × trung bình lệnh)
+    assert np.isclose(table.loc["profit", "mean"], pnl.sum(), rtol=0.05)
+    # Cùng seed cho cùng kết quả
+    assert table.equals(monte_carlo.confidence_intervals(pnl, 2000, seed=3))
+
+
+def test_block_bootstrap_uses_contiguous_blocks():
+    rng = np.random.default_rng(2)
+    index = monte_carlo._sample_index(rng, 50, 23, block_size=5)
+    assert index.shape == (50, 23)
+    steps = np.diff(index, axis=1)[:, :4]
+    assert ((steps == 1) | (steps == -22)).all()
+    # Khối liền nhau giữ nguyên mọi lệnh khi lấy toàn bộ chuỗi làm một khối, chỉ xoay vòng
+    whole = monte_carlo.resample_metrics(np.arange(10.0) - 3, 200, block_size=10, seed=0)
+    assert np.allclose(whole["profit"], 15.0)
+
+
+def test_monte_carlo_from_engine():
+    df = make_prices(3000, seed=4)
+    engine = BacktestEngine(df, make_signals(df, seed=5))
+    table = monte_carlo.monte_carlo(engine, 1000, block_size=3, seed=0)
+    assert list(table.index) == list(monte_carlo.MC_METRICS)
+    assert np.isclose(table.loc["profit", "observed"], engine.run()["profit"])
+    assert (table["lower"] <= table["upper"]).all()
+    empty = BacktestEngine(df, pd.Series(0, index=df.index))
+    assert (monte_carlo.monte_carlo(empty, 100)["observed"] == 0).all()
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    for n_trades in (200, 1000):
+        pnl = rng.normal(20, 300, n_trades)
+        for block_size in (None, 10):
+            start = time.perf_counter()
+            monte_carlo.confidence_intervals(pnl, 10000, block_size=block_size, seed=0)
+            print(f"10k lần lấy mẫu × {n_trades} lệnh, block_size={block_size}: "
+                  f"{time.perf_counter() - start:.2f}s")
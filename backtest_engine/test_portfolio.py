@@ -0,0 +1,129 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest_engine.costs import CostModel
+from backtest_engine.portfolio import PortfolioBacktester, price_matrix
+
+
+def make_universe(n=2000, m=12, seed=0, freq="h"):
+    """Ma trận giá (n, m) random walk, vài tài sản niêm yết muộn, và tín hiệu 1/-1/0 ngẫu nhiên."""
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n, m)), axis=0))
+    listed = rng.integers(0, n // 3, m)
+    listed[:m // 2] = 0
+    prices[np.arange(n)[:, None] < listed] = np.nan
+    signals = rng.choice([-1, 0, 0, 0, 0, 1], size=(n, m))
+    index = pd.date_range("2020-01-01", periods=n, freq=freq)
+    columns = [f"C{j}" for j in range(m)]
+    return pd.DataFrame(prices, index=index, columns=columns), pd.DataFrame(signals, index=index, columns=columns)
+
+
+def reference_equity(prices, signals, initial_balance=10000, rebalance=24, max_positions=None,
+                     max_weight=1.0, max_gross=1.0, fee=0.0):
+    """Vòng lặp từng nến, từng tài sản để đối chiếu (chỉ hỗ trợ rebalance theo số nến)."""
+    prices, signals = prices.to_numpy(), signals.to_numpy()
+    n, m = prices.shape
+    held = np.zeros(m, dtype=bool)
+    cash, units, equity = float(initial_balance), np.zeros(m), []
+    for t in range(n):
+        for j in range(m):
+            if signals[t, j] == 1:
+                held[j] = True
+            elif signals[t, j] == -1:
+                held[j] = False
+        value = cash + sum(units[j] * prices[t, j] for j in range(m) if units[j])
+        if t % rebalance == 0:
+            chosen = [j for j in range(m) if held[j] and not np.isnan(prices[t, j])]
+            if max_positions is not None:
+                chosen = chosen[:max_positions]
+            weight = min(max_gross / len(chosen), max_weight) if chosen else 0.0
+            target = np.zeros(m)
+            for j in chosen:
+                target[j] = weight * value / prices[t, j]
+            traded = sum(abs(target[j] - units[j]) * prices[t, j] for j in range(m) if target[j] or units[j])
+            value -= fee * traded
+            target *= value / (value + fee * traded)  # vốn sau phí chia lại theo cùng tỉ trọng
+            cash = value - sum(target[j] * prices[t, j] for j in chosen)
+            units = target
+        equity.append(value)
+    return np.array(equity)
+
+
+@pytest.mark.parametrize("kwargs", [
+    {},
+    {"rebalance": 10, "max_positions": 3},
+    {"rebalance": 50, "max_weight": 0.15, "max_gross": 0.8},
+])
+def test_equity_matches_reference(kwargs):
+    prices, signals = make_universe(600, 8, seed=3)
+    result = PortfolioBacktester(prices, signals, **kwargs).run()
+    expected = reference_equity(prices, signals, **kwargs)
+    assert np.allclose(result["equity"].to_numpy(), expected, rtol=1e-9)
+    assert np.isclose(result["metrics"]["profit"], expected[-1] - 10000)
+    assert (result["weights"].sum(axis=1) <= kwargs.get("max_gross", 1.0) + 1e-12).all()
+    assert (result["weights"].max(axis=1) <= kwargs.get("max_weight", 1.0) + 1e-12).all()
+
+
+def test_fees_are_charged_on_turnover():
+    prices, signals = make_universe(600, 8, seed=4)
+    free = PortfolioBacktester(prices, signals, rebalance=12).run()
+    costly = PortfolioBacktester(prices, signals, rebalance=12, costs=CostModel(taker_bps=10)).run()
+    expected = reference_equity(prices, signals, rebalance=12, fee=0.001)
+    # Phí tính trên tỉ trọng nên sai khác bậc hai (phí × phí) so với vòng lặp
+    assert np.allclose(costly["equity"].to_numpy(), expected, rtol=1e-5)
+    assert costly["equity"].iloc[-1] < free["equity"].iloc[-1]
+    assert (costly["turnover"] == free["turnover"]).all()
+
+
+def test_vol_slippage_with_late_listed_asset():
+    prices, signals = make_universe(600, 4, seed=2)
+    prices.iloc[:100, 1] = np.nan
+    costs = CostModel(taker_bps=10, slippage_vol=0.1)
+    fees_only = PortfolioBacktester(prices, signals, rebalance=12, costs=CostModel(taker_bps=10)).run()
+    result = PortfolioBacktester(prices, signals, rebalance=12, costs=costs).run()
+    assert np.isfinite(result["equity"]).all()
+    assert result["metrics"]["profit"] < fees_only["metrics"]["profit"]
+    # Trượt giá sau khi niêm yết giống như tính trên chuỗi giá bắt đầu từ nến niêm yết
+    t = np.arange(100, 600)
+    listed = prices.iloc[100:, [1]].to_numpy()
+    assert np.allclose(costs.slippage(prices.to_numpy(), t, np.ones_like(t)),
+                       costs.slippage(listed, t - 100, np.zeros_like(t)))
+
+
+def test_signal_rebalance_only_when_selection_changes():
+    prices, signals = make_universe(400, 5, seed=5)
+    result = PortfolioBacktester(prices, signals, rebalance="signal", max_positions=2).run()
+    weights = result["weights"]
+    assert (weights.diff().abs().sum(axis=1).iloc[1:] > 0).all()
+    # Giữa hai event số lượng không đổi: vốn không có tài sản nào được chọn thì đứng yên
+    idle = weights.sum(axis=1) == 0
+    for start in weights.index[idle]:
+        after = result["equity"].loc[start:]
+        stop = weights.index[weights.index > start]
+        segment = after.loc[:stop[0]].iloc[:-1] if len(stop) else after
+        assert segment.nunique() == 1
+
+
+def test_price_matrix_aligns_frames():
+    index = pd.date_range("2024-01-01", periods=5, freq="h")
+    frames = {"BTC": pd.DataFrame({"Close": [1.0, 2, 3, 4, 5]}, index=index),
+              "ETH": pd.DataFrame({"Close": [7.0, 8]}, index=index[2:4])}
+    matrix = price_matrix(frames, symbols=["ETH", "BTC", "DOGE"])
+    assert list(matrix.columns) == ["ETH", "BTC"]
+    assert np.isnan(matrix["ETH"].iloc[:2]).all()
+    assert matrix["ETH"].iloc[-1] == 8
+
+
+if __name__ == "__main__":
+    # 300 tài sản × 5 năm nến giờ
+    prices, signals = make_universe(5 * 8760, 300, seed=1)
+    costs = CostModel(taker_bps=10, slippage_bps=5)
+    for kwargs in ({"rebalance": 24}, {"rebalance": 24, "max_positions": 20, "costs": costs},
+                   {"rebalance": "signal", "max_positions": 20}):
+        start = time.perf_counter()
+        result = PortfolioBacktester(prices, signals, **kwargs).run()
+        print(f"300 tài sản × {len(prices)} nến, {kwargs}: {time.perf_counter() - start:.2f}s, "
+              f"{len(result['weights'])} lần tái cân bằng")
@@ -0,0 +1,86 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest_engine import metrics
+from backtest_engine.backtester import BacktestEngine
+from backtest_engine.costs import CostModel
+from testing_helpers import loop_trade_pnl, make_ohlc, make_signals
+
+
+@pytest.mark.parametrize("mode", ["long", "long_short"])
+@pytest.mark.parametrize("stops", [
+    {},
+    {"stop_loss": 0.02},
+    {"take_profit": 0.03},
+    {"trailing_stop": 0.015},
+    {"stop_loss": 0.02, "take_profit": 0.04, "trailing_stop": 0.01},
+])
+def test_run_matches_loop(mode, stops):
+    df = make_ohlc(3000, seed=1)
+    for seed, values in [(1, (-1, 0, 0, 0, 0, 0, 1)), (2, (-1, 0, 1))]:
+        signals = make_signals(df, values=values, seed=seed)
+        expected = loop_trade_pnl(df, signals, mode, **stops)
+        result = BacktestEngine(df, signals, mode=mode, **stops).run()
+        assert result["trades"] == len(expected)
+        assert np.isclose(result["profit"], expected.sum(), rtol=1e-9)
+        assert np.isclose(result["winrate"], (expected > 0).mean() if len(expected) else 0.0)
+
+
+def test_short_profits_when_price_falls():
+    df = make_ohlc(200, seed=2)
+    df[["High", "Low", "Close"]] = df[["High", "Low", "Close"]].to_numpy()[::-1]
+    signals = pd.Series(0, index=df.index)
+    signals.iloc[0] = -1
+    long_only = BacktestEngine(df, signals).run()
+    short = BacktestEngine(df, signals, mode="long_short").run()
+    assert long_only["trades"] == 0
+    assert np.isclose(short["profit"], df["Close"].iloc[0] - df["Close"].iloc[-1])
+    assert short["exposure"] == 1.0
+
+
+def test_stops_with_costs_sum_to_bar_pnl():
+    df = make_ohlc(2000, seed=3)
+    signals = make_signals(df, values=(-1, 0, 0, 0, 1), seed=4)
+    costs = CostModel(taker_bps=10, slippage_bps=5, sizing="equity", size=0.5)
+    engine = BacktestEngine(df, signals, costs=costs, mode="long_short", stop_loss=0.02, take_profit=0.03)
+    result = engine.run()
+    block = df[["Close"]].to_numpy()
+    position, exit_price = engine._positions(np.asarray(signals), block)
+    bars, _, trade_pnl = BacktestEngine.pnl(block, position, costs=costs, exit_price=exit_price)
+    assert np.isclose(bars.sum(), trade_pnl.sum())
+    assert np.isclose(result["profit"], trade_pnl.sum())
+    free = BacktestEngine(df, signals, mode="long_short", stop_loss=0.02, take_profit=0.03).run()
+    assert free["trades"] == result["trades"]
+
+
+def test_empty_data_returns_zero_metrics():
+    df = make_ohlc(10).iloc[:0]
+    signals = pd.Series(0, index=df.index)
+    for kwargs in ({}, {"mode": "long_short", "stop_loss": 0.02, "trailing_stop": 0.01}):
+        engine = BacktestEngine(df, signals, **kwargs)
+        result = engine.run()
+        assert set(result) == set(metrics.METRICS)
+        assert all(value == 0 for value in result.values())
+        assert len(engine.trade_log) == 0 and engine.trade_log.to_frame().empty
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        BacktestEngine(make_ohlc(10), pd.Series(0, index=range(10)), mode="short")
+
+
+if __name__ == "__main__":
+    df = make_ohlc(50000)
+    signals = make_signals(df, values=(-1, 0, 0, 0, 0, 0, 0, 0, 1), seed=7)
+    kwargs = {"mode": "long_short", "stop_loss": 0.02, "take_profit": 0.04, "trailing_stop": 0.01}
+    start = time.perf_counter()
+    for _ in range(5):
+        result = BacktestEngine(df, signals, **kwargs).run()
+    print(f"run() 50k nến long/short + SL/TP/trailing: {(time.perf_counter() - start) / 5 * 1000:.1f} ms, "
+          f"{result['trades']} lệnh")
+    start = time.perf_counter()
+    loop_trade_pnl(df, signals, **kwargs)
+    print(f"vòng lặp từng nến: {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,100 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine.backtester import BacktestEngine
+from backtest_engine.costs import CostModel
+from backtest_engine.trade_log import EXIT_REASONS, TRADE_DTYPE
+from testing_helpers import loop_trade_pnl, make_ohlc, make_prices, make_signals
+
+
+def loop_trades(df, signals):
+    """Vòng lặp long-only ghi (nến vào, nến thoát, giá vào, giá thoát) từng lệnh để đối chiếu."""
+    close = df["Close"].to_numpy()
+    trades, entry = [], None
+    for t, signal in enumerate(np.asarray(signals)):
+        if signal == 1 and entry is None:
+            entry = t
+        elif signal == -1 and entry is not None:
+            trades.append((entry, t, close[entry], close[t]))
+            entry = None
+    if entry is not None:
+        trades.append((entry, len(close) - 1, close[entry], close[-1]))
+    return trades
+
+
+def test_trade_log_matches_loop():
+    df = make_prices(3000, seed=1)
+    signals = make_signals(df, values=(-1, 0, 0, 0, 1), seed=2)
+    engine = BacktestEngine(df, signals)
+    result = engine.run()
+    log = engine.trade_log
+    assert log.records.dtype == TRADE_DTYPE
+    expected = loop_trades(df, signals)
+    assert len(log) == result["trades"] == len(expected)
+    assert list(zip(log["entry_index"], log["exit_index"], log["entry_price"], log["exit_price"])) == expected
+    assert (log["bars_held"] == log["exit_index"] - log["entry_index"]).all()
+    assert np.isclose(log.pnl.sum(), result["profit"])
+    # Chỉ lệnh cuối có thể còn mở
+    assert set(log["exit_reason"][:-1]) <= {EXIT_REASONS.index("signal")}
+
+
+def test_trade_log_with_stops_and_costs():
+    df = make_ohlc(3000, seed=3)
+    signals = make_signals(df, values=(-1, 0, 0, 0, 0, 1), seed=4)
+    stops = {"stop_loss": 0.02, "take_profit": 0.03}
+    engine = BacktestEngine(df, signals, mode="long_short", **stops)
+    engine.run()
+    log = engine.trade_log
+    assert np.allclose(log.pnl, loop_trade_pnl(df, signals, "long_short", **stops))
+    stopped = log["exit_reason"] == EXIT_REASONS.index("stop")
+    assert stopped.any() and (log["side"] == -1).any()
+    assert not np.allclose(log["exit_price"][stopped], df["Close"].to_numpy()[log["exit_index"][stopped]])
+
+    costs = CostModel(taker_bps=10, slippage_bps=5, sizing="equity", size=0.5)
+    engine = BacktestEngine(df, signals, costs=costs, mode="long_short", **stops)
+    result = engine.run()
+    log = engine.trade_log
+    assert np.isclose(log.pnl.sum(), result["profit"])
+    assert np.array_equal(log.pnl, engine.trade_pnl())
+    # Giá khớp vào bất lợi hơn Close (mua cao hơn, bán khống thấp hơn)
+    entry_close = df["Close"].to_numpy()[log["entry_index"]]
+    assert (log["side"] * (log["entry_price"] - entry_close) > 0).all()
+    assert np.isclose(log["units"][0] * log["entry_price"][0], 0.5 * engine.initial_balance)
+
+
+def test_to_frame():
+    df = make_prices(500, seed=5)
+    engine = BacktestEngine(df, make_signals(df, seed=6))
+    engine.run()
+    frame = engine.trade_log.to_frame()
+    assert len(frame) == len(engine.trade_log)
+    assert (frame["entry_time"] == df.index[frame["entry_index"]]).all()
+    assert (frame["exit_time"] == df.index[frame["exit_index"]]).all()
+    assert set(frame["exit_reason"].astype(str)) <= set(EXIT_REASONS)
+    assert BacktestEngine(df, pd.Series(0, index=df.index)).run()["trades"] == 0
+
+    # Close nhiều cột: mỗi lệnh ghi mã của cột
+    block = pd.concat({"BTC": df["Close"], "ETH": df["Close"] * 0.05}, axis=1)
+    block.columns = pd.MultiIndex.from_product([["Close"], block.columns])
+    engine = BacktestEngine(block, make_signals(df, seed=6))
+    result = engine.run()
+    frame = engine.trade_log.to_frame()
+    assert frame.groupby("column").size().tolist() == result["trades"].tolist()
+    assert frame["symbol"].iloc[-1] == "ETH"
+
+
+if __name__ == "__main__":
+    df = make_prices(50000)
+    signals = make_signals(df, values=(-1, 0, 0, 0, 0, 0, 0, 0, 1), seed=7)
+    engine = BacktestEngine(df, signals)
+    start = time.perf_counter()
+    for _ in range(20):
+        engine.run()
+    print(f"run() 50k nến + nhật ký {len(engine.trade_log)} lệnh: "
+          f"{(time.perf_counter() - start) / 20 * 1000:.1f} ms")
+    start = time.perf_counter()
+    frame = engine.trade_log.to_frame()
+    print(f"to_frame(): {(time.perf_counter() - start) * 1000:.1f} ms, "
+          f"{engine.trade_log.records.nbytes / len(frame):.0f} byte mỗi lệnh")
@@ -0,0 +1,90 @@
+"""
+Nhật ký lệnh của BacktestEngine: mọi lệnh nằm trong một mảng NumPy có cấu trúc (mỗi lệnh một
+bản ghi cố định kích thước, không có dict hay object cho từng lệnh).
+
+Mảng được cấp phát một lần theo số lệnh và điền theo từng trường từ các mảng đã tính trong lúc
+backtest, nên ghi nhật ký không cần mô phỏng lại. Chỉ đổi sang DataFrame khi cần hiển thị.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Lý do thoát lệnh (trường exit_reason lưu chỉ số trong tuple này)
+EXIT_REASONS = ("signal", "stop", "open")
+
+TRADE_DTYPE = np.dtype([
+    ("column", np.int32),         # cột giá (Close nhiều cột: thứ tự cột)
+    ("side", np.int8),            # 1 long, -1 short
+    ("entry_index", np.int64),    # vị trí nến vào lệnh
+    ("exit_index", np.int64),     # vị trí nến thoát (lệnh còn mở: nến cuối)
+    ("entry_price", np.float64),  # giá khớp vào (sau trượt giá nếu có costs)
+    ("exit_price", np.float64),   # giá khớp thoát (mức stop nếu thoát bằng stop)
+    ("units", np.float64),        # khối lượng
+    ("pnl", np.float64),          # lãi/lỗ sau chi phí
+    ("bars_held", np.int64),      # số nến nắm giữ
+    ("exit_reason", np.int8),     # chỉ số trong EXIT_REASONS
+])
+
+
+def records(column, side, entry_index, exit_index, entry_price, exit_price, units, pnl, exit_reason):
+    """Mảng có cấu trúc TRADE_DTYPE từ các mảng theo lệnh (cùng độ dài)."""
+    log = np.empty(len(column), dtype=TRADE_DTYPE)
+    log["column"] = column
+    log["side"] = side
+    log["entry_index"] = entry_index
+    log["exit_index"] = exit_index
+    log["entry_price"] = entry_price
+    log["exit_price"] = exit_price
+    log["units"] = units
+    log["pnl"] = pnl
+    log["bars_held"] = log["exit_index"] - log["entry_index"]
+    log["exit_reason"] = exit_reason
+    return log
+
+
+class TradeLog:
+    __slots__ = ("records", "index", "columns")
+
+    def __init__(self, records, index=None, columns=None):
+        """
+        records: mảng TRADE_DTYPE, sắp theo cột rồi thời gian vào lệnh
+        index: index thời gian của dữ liệu (đổi entry_index/exit_index thành thời gian khi xuất)
+        columns: nhãn các cột giá (Close nhiều cột), None nếu chỉ có một cột
+        """
+        self.records = records
+        self.index = index
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, key):
+        """Một trường (log["pnl"]) hoặc một phần nhật ký (mảng bool, slice)."""
+        if isinstance(key, str):
+            return self.records[key]
+        return TradeLog(np.atleast_1d(self.records[key]), self.index, self.columns)
+
+    def __repr__(self):
+        return f"TradeLog({len(self)} lệnh)"
+
+    @property
+    def pnl(self):
+        return self.records["pnl"]
+
+    def column(self, j):
+        """Nhật ký của cột giá thứ j."""
+        return self[self.records["column"] == j]
+
+    def to_frame(self):
+        """
+        DataFrame mỗi dòng một lệnh: các trường của TRADE_DTYPE, entry_time/exit_time theo index,
+        exit_reason dạng chữ; thêm cột symbol khi có nhãn cột giá.
+        """
+        frame = pd.DataFrame(self.records)
+        if self.index is not None and len(self.index):
+            frame.insert(3, "entry_time", np.asarray(self.index)[self.records["entry_index"]])
+            frame.insert(5, "exit_time", np.asarray(self.index)[self.records["exit_index"]])
+        frame["exit_reason"] = pd.Categorical.from_codes(self.records["exit_reason"], EXIT_REASONS)
+        if self.columns is not None:
+            frame.insert(0, "symbol", np.asarray(self.columns, dtype=object)[self.records["column"]])
+        return frame
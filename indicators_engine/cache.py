@@ -0,0 +1,93 @@
+"""
+Cache kết quả chỉ báo dùng chung cho mọi IndicatorsEngine.
+
+Khóa = (fingerprint dữ liệu OHLCV, backend, tên chỉ báo, tham số). Các engine tạo mới
+trên cùng dữ liệu (mỗi vòng lặp của ParameterOptimizer, mỗi lần Streamlit rerun)
+sẽ lấy lại cột đã tính thay vì tính lại. Giới hạn theo dung lượng (byte), loại bỏ
+mục ít dùng gần đây nhất (LRU).
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def fingerprint(arrays):
+    """Hash (blake2b) của các mảng giá, gồm cả shape và dtype."""
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.shape, array.dtype.str)).encode())
+        digest.update(array.data)
+    return digest.hexdigest()
+
+
+class IndicatorCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        max_bytes: dung lượng tối đa của các mảng kết quả được giữ trong cache
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(data_fingerprint, backend, name, params):
+        return (data_fingerprint, backend, name, tuple(sorted(params.items())))
+
+    def get(self, key):
+        """Trả về dict {cột: mảng} hoặc None nếu chưa có."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, columns):
+        """Lưu dict {cột: mảng}; mảng được chuyển sang chỉ đọc để tránh bị sửa."""
+        size = sum(values.nbytes for values in columns.values())
+        if size > self.max_bytes:
+            return
+        for values in columns.values():
+            values.flags.writeable = False
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= sum(values.nbytes for values in old.values())
+            self._entries[key] = columns
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= sum(values.nbytes for values in evicted.values())
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries),
+            'bytes': self.nbytes,
+            'max_bytes': self.max_bytes,
+            'evictions': self.evictions,
+        }
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,58 @@
+"""
+Bộ nhớ cột chỉ báo cho IndicatorsEngine ở chế độ không copy (copy=False).
+
+Các cột được ghi vào các block NumPy 2 chiều cấp phát trước theo thứ tự cột
+(Fortran), chỉ chuyển thành DataFrame một lần khi gọi get_df(). Tránh việc chèn
+từng cột vào DataFrame (gây gộp block và copy lại dữ liệu nhiều lần). Khi hết chỗ
+thì cấp thêm block mới thay vì copy sang block lớn hơn.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnBlock:
+    def __init__(self, n_rows, capacity=8):
+        """
+        n_rows: số dòng (số nến) của mỗi cột
+        capacity: số cột của mỗi block cấp phát
+        """
+        self.n_rows = n_rows
+        self.capacity = capacity
+        self.blocks = []
+        self.names = []
+        self._positions = {}
+
+    @property
+    def nbytes(self):
+        return sum(block.nbytes for block in self.blocks)
+
+    def __contains__(self, name):
+        return name in self._positions
+
+    def set(self, name, values):
+        position = self._positions.get(name)
+        if position is None:
+            position = len(self.names)
+            if position == len(self.blocks) * self.capacity:
+                self.blocks.append(np.empty((self.n_rows, self.capacity), order="F"))
+            self.names.append(name)
+            self._positions[name] = position
+        column = self.get(name)
+        if values is None:
+            column[:] = np.nan
+        else:
+            column[:] = np.asarray(values, dtype=np.float64)
+
+    def get(self, name):
+        block, column = divmod(self._positions[name], self.capacity)
+        return self.blocks[block][:, column]
+
+    def to_frame(self, index):
+        frames = []
+        for i, block in enumerate(self.blocks):
+            names = self.names[i * self.capacity:(i + 1) * self.capacity]
+            frames.append(pd.DataFrame(block[:, :len(names)], index=index, columns=names, copy=False))
+        if not frames:
+            return pd.DataFrame(index=index)
+        return pd.concat(frames, axis=1)
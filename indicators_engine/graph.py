@@ -0,0 +1,172 @@
+"""
+Đồ thị phụ thuộc (DAG) của các chỉ báo cho backend NumPy.
+
+Mỗi chỉ báo được khai báo là một nút, đầu vào là tên cột OHLCV, nút khác hoặc tham số,
+ví dụ MACD = ema(Close, 12) - ema(Close, 26). IndicatorGraph tính mỗi nút một lần cho
+mỗi engine, nên các phần dùng chung được tái sử dụng:
+- SMA(20) và đường giữa Bollinger(20) là cùng nút rolling_mean(Close, 20)
+- Stochastic(14) và Williams %R(14) dùng chung rolling_max(High, 14)/rolling_min(Low, 14)
+- EMA(12)/EMA(26) của MACD dùng chung với ema(window=12), ema(window=26)
+- ATR các cửa sổ dùng chung true_range
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from indicators_engine import numpy_kernels as nk
+
+
+class Node(namedtuple('Node', ['op', 'args'])):
+    """Một nút của đồ thị: phép tính `op` trên các đầu vào `args`."""
+
+    __slots__ = ()
+
+
+def _stoch_k(close, smax, smin):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100.0 * (close - smin) / (smax - smin)
+
+
+def _williams_r(close, smax, smin):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return -100.0 * (smax - close) / (smax - smin)
+
+
+def _cci(tp, mean, mad, constant):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (tp - mean) / (constant * mad)
+
+
+def _bb_width(hband, lband, mavg):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (hband - lband) / mavg * 100.0
+
+
+OPS = {
+    'ema': nk.ema,
+    'rolling_mean': nk.rolling_mean,
+    'rolling_std': nk.rolling_std,
+    'rolling_max': nk.rolling_max,
+    'rolling_min': nk.rolling_min,
+    'rolling_mad': nk.rolling_mad,
+    'true_range': nk.true_range,
+    'wilder_atr': nk.wilder_atr,
+    'typical_price': lambda high, low, close: (high + low + close) / 3.0,
+    'add_scaled': lambda x, y, factor: x + factor * y,
+    'sub': np.subtract,
+    'midpoint': lambda x, y: 0.5 * (x + y),
+    'stoch_k': _stoch_k,
+    'williams_r': _williams_r,
+    'cci': _cci,
+    'bb_width': _bb_width,
+}
+
+
+# ---------------------------------------------------------------------------
+# Nút trung gian (tham số luôn được ghi đủ để cùng phép tính cho cùng khóa)
+# ---------------------------------------------------------------------------
+def ema(source, window):
+    return Node('ema', (source, window))
+
+
+def rolling_mean(source, window):
+    return Node('rolling_mean', (source, window))
+
+
+def rolling_std(source, window, ddof=0):
+    return Node('rolling_std', (source, window, ddof))
+
+
+def rolling_max(source, window, min_periods=None):
+    return Node('rolling_max', (source, window, min_periods))
+
+
+def rolling_min(source, window, min_periods=None):
+    return Node('rolling_min', (source, window, min_periods))
+
+
+def typical_price():
+    return Node('typical_price', ('High', 'Low', 'Close'))
+
+
+def true_range():
+    return Node('true_range', ('High', 'Low', 'Close'))
+
+
+# ---------------------------------------------------------------------------
+# Chỉ báo: trả về một nút hoặc tuple nút theo đúng thứ tự cột của IndicatorsEngine
+# ---------------------------------------------------------------------------
+def sma(window):
+    return rolling_mean('Close', window)
+
+
+def macd(window_slow, window_fast, window_sign):
+    """(macd, macd_signal, macd_diff)"""
+    line = Node('sub', (ema('Close', window_fast), ema('Close', window_slow)))
+    signal = ema(line, window_sign)
+    return line, signal, Node('sub', (line, signal))
+
+
+def stochastic(window, smooth_window):
+    """(stoch_k, stoch_d)"""
+    k = Node('stoch_k', ('Close', rolling_max('High', window), rolling_min('Low', window)))
+    return k, rolling_mean(k, smooth_window)
+
+
+def williams_r(lbp):
+    return Node('williams_r', ('Close', rolling_max('High', lbp), rolling_min('Low', lbp)))
+
+
+def cci(window, constant=0.015):
+    tp = typical_price()
+    return Node('cci', (tp, rolling_mean(tp, window), Node('rolling_mad', (tp, window)), constant))
+
+
+def bollinger_bands(window, window_dev):
+    """(hband, lband, mavg, wband)"""
+    mavg = rolling_mean('Close', window)
+    mstd = rolling_std('Close', window)
+    hband = Node('add_scaled', (mavg, mstd, window_dev))
+    lband = Node('add_scaled', (mavg, mstd, -window_dev))
+    return hband, lband, mavg, Node('bb_width', (hband, lband, mavg))
+
+
+def atr(window):
+    return Node('wilder_atr', (true_range(), window))
+
+
+def ichimoku(window1=9, window2=26, window3=52):
+    """(span_a, span_b, base_line, conversion_line)"""
+    conv = Node('midpoint', (rolling_max('High', window1), rolling_min('Low', window1)))
+    base = Node('midpoint', (rolling_max('High', window2), rolling_min('Low', window2)))
+    span_b = Node('midpoint', (rolling_max('High', window3, 0), rolling_min('Low', window3, 0)))
+    return Node('midpoint', (conv, base)), span_b, base, conv
+
+
+class IndicatorGraph:
+    def __init__(self, source):
+        """
+        source: hàm nhận tên cột OHLCV, trả về mảng float64 (IndicatorsEngine._values)
+        """
+        self._source = source
+        self._results = {}
+        self.computed = 0
+
+    def evaluate(self, node):
+        if isinstance(node, str):
+            return self._source(node)
+        if not isinstance(node, Node):
+            return node
+        value = self._results.get(node)
+        if value is None:
+            value = OPS[node.op](*[self.evaluate(arg) for arg in node.args])
+            self._results[node] = value
+            self.computed += 1
+        return value
+
+    def clear(self):
+        self._results.clear()
+
+    def __len__(self):
+        return len(self._results)
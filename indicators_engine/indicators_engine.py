@@ -3,88 +3,300 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
-import yfinance as yf
+from market_data.ohlcv_store import get_store
 from datetime import datetime, timedelta
 import ta
+import functools
+import inspect
+from indicators_engine import numpy_kernels as nk
+from indicators_engine import streaming
+from indicators_engine import graph
+from indicators_engine.cache import IndicatorCache, fingerprint
+from indicators_engine.column_block import ColumnBlock
+
+
+def _registered(method):
+    """
+    Ghi lại chỉ báo và tham số đã tính để update() cập nhật tiếp theo nến mới,
+    đồng thời lấy/lưu kết quả trong IndicatorCache dùng chung.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        params = dict(list(bound.arguments.items())[1:])
+        name = method.__name__
+        cached = self._cache_get(name, params)
+        if cached is not None:
+            for col, values in cached.items():
+                self._set(col, values.copy() if self._store is None else values)
+            result = self._result()
+        else:
+            # Ghi lại mọi cột hàm ghi (kể cả cột đã có, ví dụ đường MACD dùng chung
+            # giữa các window_sign) để lần dùng cache sau có đủ cột
+            self._written = []
+            try:
+                result = method(self, *args, **kwargs)
+                written = list(dict.fromkeys(self._written))
+            finally:
+                self._written = None
+            self._cache_put(name, params, written)
+        self._register(name, params)
+        return result
+
+    return wrapper
+
 
 class IndicatorsEngine:
-    def __init__(self, df: pd.DataFrame):
-        self.df = df.copy()
+    BACKENDS = ("ta", "numpy")
+    # Cache dùng chung cho mọi engine trong process (optimizer, các trang Streamlit)
+    shared_cache = IndicatorCache()
+
+    def __init__(self, df: pd.DataFrame, backend="ta", cache=True, copy=True):
+        """
+        df: DataFrame giá (Open, High, Low, Close, Volume)
+        backend: "ta" (mặc định, dùng thư viện ta) hoặc "numpy" (kernel NumPy thuần,
+                 cho cùng kết quả nhưng nhanh hơn nhiều khi tính cho nhiều coin)
+        cache: True dùng IndicatorsEngine.shared_cache, False/None để tắt,
+               hoặc truyền một IndicatorCache riêng
+        copy: True (mặc định) copy df và ghi chỉ báo thẳng vào df như trước.
+              False: không copy df (df gốc không bị sửa), chỉ báo được ghi vào một
+              block NumPy theo cột, các hàm chỉ báo trả về engine (cho phép gọi nối
+              engine.rsi().sma()) và get_df() ghép kết quả một lần duy nhất.
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"backend phải là một trong {self.BACKENDS}, nhận được {backend!r}")
+        self._pending = []
+        self._streams = None
+        self._indicators = {}
+        self._constant_values = {}
+        self._written = None
+        self._store = None if copy else ColumnBlock(len(df))
+        self.df = df.copy() if copy else df
+        self.backend = backend
+        if cache is True:
+            cache = self.shared_cache
+        self.cache = None if cache is None or cache is False else cache
+
+    @property
+    def df(self):
+        # Các nến nhận qua update() được gộp vào df một lần khi cần đọc df
+        if self._pending:
+            self._flush()
+        return self._df
+
+    @df.setter
+    def df(self, value):
+        self._df = value
+        self._arrays = {}
+        self._fingerprint = None
+        # Kết quả trung gian dùng chung giữa các chỉ báo (backend numpy)
+        self._graph = graph.IndicatorGraph(self._values)
+
+    # ------------------------------------------------------------------
+    # Lưu cột chỉ báo: vào df (copy=True) hoặc vào ColumnBlock (copy=False)
+    # ------------------------------------------------------------------
+    def _set(self, col, values):
+        if self._written is not None:
+            self._written.append(col)
+        if self._store is None:
+            self.df[col] = values
+        else:
+            self._store.set(col, values)
+
+    def _result(self):
+        return self.df if self._store is None else self
+
+    def _get_column(self, col):
+        if self._store is None:
+            return self.df[col].to_numpy(copy=True)
+        return self._store.get(col).copy()
+
+    def _pad_columns(self, block):
+        # Giống khi gán self.df['SMA_20'] vào df từ yf.download: ('SMA_20', '')
+        columns = self._df.columns
+        if isinstance(columns, pd.MultiIndex) and not isinstance(block.columns, pd.MultiIndex):
+            pad = ('',) * (columns.nlevels - 1)
+            block = block.set_axis(pd.MultiIndex.from_tuples([(c,) + pad for c in block.columns]), axis=1)
+        return block
 
+    def _materialize(self):
+        # Ghép df gốc với block chỉ báo bằng một lần concat
+        block = self._pad_columns(self._store.to_frame(self._df.index))
+        return pd.concat([self._df.drop(columns=block.columns, errors='ignore'), block], axis=1)
+
+    def memory_usage(self):
+        """Số byte engine tự cấp phát (df copy hoặc block chỉ báo), không tính df gốc khi copy=False."""
+        if self._store is None:
+            return int(self.df.memory_usage(deep=True).sum())
+        return self._store.nbytes
+
+    def _evaluate(self, *nodes):
+        # Tính các nút của đồ thị chỉ báo, phần trung gian đã có thì lấy lại
+        values = [self._graph.evaluate(node) for node in nodes]
+        return values[0] if len(values) == 1 else values
+
+    def _values(self, col):
+        # Mảng float64 liên tục của cột giá, chỉ chuyển đổi một lần cho mỗi engine
+        df = self.df
+        if col not in self._arrays:
+            self._arrays[col] = nk.as_array(df[col].squeeze())
+        return self._arrays[col]
+
+    @_registered
     def sma(self, window=20):
+        if self.backend == "numpy":
+            self._set(f'SMA_{window}', self._evaluate(graph.sma(window)))
+            return self._result()
         # Đảm bảo truyền vào Series 1 chiều
-        self.df[f'SMA_{window}'] = ta.trend.sma_indicator(self.df['Close'].squeeze(), window=window)
-        return self.df
+        self._set(f'SMA_{window}', ta.trend.sma_indicator(self.df['Close'].squeeze(), window=window))
+        return self._result()
 
+    @_registered
     def ema(self, window=20):
-        self.df[f'EMA_{window}'] = ta.trend.ema_indicator(self.df['Close'].squeeze(), window=window)
-        return self.df
+        if self.backend == "numpy":
+            self._set(f'EMA_{window}', self._evaluate(graph.ema('Close', window)))
+            return self._result()
+        self._set(f'EMA_{window}', ta.trend.ema_indicator(self.df['Close'].squeeze(), window=window))
+        return self._result()
 
+    @_registered
     def rsi(self, window=14):
-        self.df[f'RSI_{window}'] = ta.momentum.rsi(self.df['Close'].squeeze(), window=window)
-        return self.df
+        if self.backend == "numpy":
+            self._set(f'RSI_{window}', nk.rsi(self._values('Close'), window))
+            return self._result()
+        self._set(f'RSI_{window}', ta.momentum.rsi(self.df['Close'].squeeze(), window=window))
+        return self._result()
 
+    @_registered
     def macd(self, window_slow=26, window_fast=12, window_sign=9):
-        self.df[f'MACD_{window_fast}_{window_slow}'] = ta.trend.macd(self.df['Close'].squeeze(), window_slow=window_slow, window_fast=window_fast).squeeze()
-        self.df[f'MACD_SIGNAL_{window_fast}_{window_slow}_{window_sign}'] = ta.trend.macd_signal(self.df['Close'].squeeze(), window_slow=window_slow, window_fast=window_fast, window_sign=window_sign).squeeze()
-        self.df[f'MACD_DIFF_{window_fast}_{window_slow}_{window_sign}'] = ta.trend.macd_diff(self.df['Close'].squeeze(), window_slow=window_slow, window_fast=window_fast, window_sign=window_sign).squeeze()
-        return self.df
+        if self.backend == "numpy":
+            line, signal, diff = self._evaluate(*graph.macd(window_slow, window_fast, window_sign))
+            self._set(f'MACD_{window_fast}_{window_slow}', line)
+            self._set(f'MACD_SIGNAL_{window_fast}_{window_slow}_{window_sign}', signal)
+            self._set(f'MACD_DIFF_{window_fast}_{window_slow}_{window_sign}', diff)
+            return self._result()
+        # Một đối tượng MACD: hai EMA chỉ tính một lần cho cả 3 cột
+        indicator_macd = ta.trend.MACD(self.df['Close'].squeeze(), window_slow=window_slow, window_fast=window_fast, window_sign=window_sign)
+        self._set(f'MACD_{window_fast}_{window_slow}', indicator_macd.macd().squeeze())
+        self._set(f'MACD_SIGNAL_{window_fast}_{window_slow}_{window_sign}', indicator_macd.macd_signal().squeeze())
+        self._set(f'MACD_DIFF_{window_fast}_{window_slow}_{window_sign}', indicator_macd.macd_diff().squeeze())
+        return self._result()
 
+    @_registered
     def stochastic(self, window=14, smooth_window=3):
-        self.df[f'STOCH_K_{window}'] = ta.momentum.stoch(self.df['High'].squeeze(), self.df['Low'].squeeze(), self.df['Close'].squeeze(), window=window, smooth_window=smooth_window).squeeze()
-        self.df[f'STOCH_D_{window}'] = ta.momentum.stoch_signal(self.df['High'].squeeze(), self.df['Low'].squeeze(), self.df['Close'].squeeze(), window=window, smooth_window=smooth_window).squeeze()
-        return self.df
+        if self.backend == "numpy":
+            k, d = self._evaluate(*graph.stochastic(window, smooth_window))
+            self._set(f'STOCH_K_{window}', k)
+            self._set(f'STOCH_D_{window}', d)
+            return self._result()
+        # Một đối tượng Stochastic: rolling max/min chỉ tính một lần cho %K và %D
+        indicator_stoch = ta.momentum.StochasticOscillator(self.df['High'].squeeze(), self.df['Low'].squeeze(), self.df['Close'].squeeze(), window=window, smooth_window=smooth_window)
+        self._set(f'STOCH_K_{window}', indicator_stoch.stoch().squeeze())
+        self._set(f'STOCH_D_{window}', indicator_stoch.stoch_signal().squeeze())
+        return self._result()
 
+    @_registered
     def cci(self, window=20):
-        self.df[f'CCI_{window}'] = ta.trend.cci(self.df['High'].squeeze(), self.df['Low'].squeeze(), self.df['Close'].squeeze(), window=window).squeeze()
-        return self.df
+        if self.backend == "numpy":
+            self._set(f'CCI_{window}', self._evaluate(graph.cci(window)))
+            return self._result()
+        self._set(f'CCI_{window}', ta.trend.cci(self.df['High'].squeeze(), self.df['Low'].squeeze(), self.df['Close'].squeeze(), window=window).squeeze())
+        return self._result()
 
+    @_registered
     def bollinger_bands(self, window=20, window_dev=2):
+        if self.backend == "numpy":
+            hband, lband, mavg, wband = self._evaluate(*graph.bollinger_bands(window, window_dev))
+            self._set(f'BB_High_{window}', hband)
+            self._set(f'BB_Low_{window}', lband)
+            self._set(f'BB_Mavg_{window}', mavg)
+            self._set(f'BB_Width_{window}', wband)
+            return self._result()
         indicator_bb = ta.volatility.BollingerBands(self.df['Close'].squeeze(), window=window, window_dev=window_dev)
-        self.df[f'BB_High_{window}'] = indicator_bb.bollinger_hband().squeeze()
-        self.df[f'BB_Low_{window}'] = indicator_bb.bollinger_lband().squeeze()
-        self.df[f'BB_Mavg_{window}'] = indicator_bb.bollinger_mavg().squeeze()
-        self.df[f'BB_Width_{window}'] = indicator_bb.bollinger_wband().squeeze()
-        return self.df
+        self._set(f'BB_High_{window}', indicator_bb.bollinger_hband().squeeze())
+        self._set(f'BB_Low_{window}', indicator_bb.bollinger_lband().squeeze())
+        self._set(f'BB_Mavg_{window}', indicator_bb.bollinger_mavg().squeeze())
+        self._set(f'BB_Width_{window}', indicator_bb.bollinger_wband().squeeze())
+        return self._result()
 
+    @_registered
     def atr(self, window=14):
-        self.df[f'ATR_{window}'] = ta.volatility.average_true_range(
+        if self.backend == "numpy":
+            self._set(f'ATR_{window}', self._evaluate(graph.atr(window)))
+            return self._result()
+        self._set(f'ATR_{window}', ta.volatility.average_true_range(
             self.df['High'].squeeze(), self.df['Low'].squeeze(), self.df['Close'].squeeze(), window=window
-        ).squeeze()
-        return self.df
+        ).squeeze())
+        return self._result()
 
+    @_registered
     def obv(self):
-        self.df['OBV'] = ta.volume.on_balance_volume(self.df['Close'].squeeze(), self.df['Volume'].squeeze()).squeeze()
-        return self.df
+        if self.backend == "numpy":
+            self._set('OBV', nk.obv(self._values('Close'), self._values('Volume')))
+            return self._result()
+        self._set('OBV', ta.volume.on_balance_volume(self.df['Close'].squeeze(), self.df['Volume'].squeeze()).squeeze())
+        return self._result()
 
+    @_registered
     def volume_oscillator(self, short_window=12, long_window=26):
+        if self.backend == "numpy":
+            self._set(f'Volume_Osc_{short_window}_{long_window}', nk.volume_oscillator(self._values('Volume'), short_window, long_window))
+            return self._result()
         short_vol = self.df['Volume'].rolling(window=short_window).mean()
         long_vol = self.df['Volume'].rolling(window=long_window).mean()
-        self.df[f'Volume_Osc_{short_window}_{long_window}'] = ((short_vol - long_vol) / long_vol).squeeze()
-        return self.df
+        self._set(f'Volume_Osc_{short_window}_{long_window}', ((short_vol - long_vol) / long_vol).squeeze())
+        return self._result()
 
+    @_registered
     def chaikin_money_flow(self, window=20):
-        self.df[f'CMF_{window}'] = ta.volume.chaikin_money_flow(
+        if self.backend == "numpy":
+            self._set(f'CMF_{window}', nk.chaikin_money_flow(
+                self._values('High'), self._values('Low'), self._values('Close'), self._values('Volume'), window
+            ))
+            return self._result()
+        self._set(f'CMF_{window}', ta.volume.chaikin_money_flow(
             self.df['High'].squeeze(), self.df['Low'].squeeze(), self.df['Close'].squeeze(), self.df['Volume'].squeeze(), window=window
-        ).squeeze()
-        return self.df
+        ).squeeze())
+        return self._result()
 
+    @_registered
     def ichimoku(self):
+        if self.backend == "numpy":
+            span_a, span_b, base, conv = self._evaluate(*graph.ichimoku())
+            self._set('Ichimoku_A', span_a)
+            self._set('Ichimoku_B', span_b)
+            self._set('Ichimoku_base_line', base)
+            self._set('Ichimoku_conversion_line', conv)
+            return self._result()
         indicator_ichimoku = ta.trend.IchimokuIndicator(self.df['High'].squeeze(), self.df['Low'].squeeze())
-        self.df['Ichimoku_A'] = indicator_ichimoku.ichimoku_a().squeeze()
-        self.df['Ichimoku_B'] = indicator_ichimoku.ichimoku_b().squeeze()
-        self.df['Ichimoku_base_line'] = indicator_ichimoku.ichimoku_base_line().squeeze()
-        self.df['Ichimoku_conversion_line'] = indicator_ichimoku.ichimoku_conversion_line().squeeze()
-        return self.df
+        self._set('Ichimoku_A', indicator_ichimoku.ichimoku_a().squeeze())
+        self._set('Ichimoku_B', indicator_ichimoku.ichimoku_b().squeeze())
+        self._set('Ichimoku_base_line', indicator_ichimoku.ichimoku_base_line().squeeze())
+        self._set('Ichimoku_conversion_line', indicator_ichimoku.ichimoku_conversion_line().squeeze())
+        return self._result()
 
+    @_registered
     def heikin_ashi(self):
+        if self.backend == "numpy":
+            ha_open, ha_high, ha_low, ha_close = nk.heikin_ashi(
+                self._values('Open'), self._values('High'), self._values('Low'), self._values('Close')
+            )
+            self._set('HA_Open', ha_open)
+            self._set('HA_High', ha_high)
+            self._set('HA_Low', ha_low)
+            self._set('HA_Close', ha_close)
+            return self._result()
         ha_df = ta.utils.heikin_ashi(self.df)
-        self.df['HA_Open'] = ha_df['open'].squeeze()
-        self.df['HA_High'] = ha_df['high'].squeeze()
-        self.df['HA_Low'] = ha_df['low'].squeeze()
-        self.df['HA_Close'] = ha_df['close'].squeeze()
-        return self.df
+        self._set('HA_Open', ha_df['open'].squeeze())
+        self._set('HA_High', ha_df['high'].squeeze())
+        self._set('HA_Low', ha_df['low'].squeeze())
+        self._set('HA_Close', ha_df['close'].squeeze())
+        return self._result()
 
+    @_registered
     def fib_retracement(self, lookback=100):
         # Fibonacci Retracement là mức giá, không phải chỉ báo động thời gian
         # Trả về các mức fibo dựa trên giá cao/thấp trong lookback
@@ -101,9 +313,10 @@ class IndicatorsEngine:
             'Fib_1.0': min_price
         }
         for k, v in levels.items():
-            self.df[k] = v
-        return self.df
+            self._set(k, v)
+        return self._result()
 
+    @_registered
     def pivot_points(self, lookback=1):
         # Tính Pivot Points cho n phiên gần nhất
         pivots = []
@@ -113,24 +326,161 @@ class IndicatorsEngine:
             close = self.df['Close'].iloc[-(i+2)]
             pivot = (high + low + close) / 3
             pivots.append(pivot)
-        self.df['Pivot'] = pivots[-1] if pivots else None
-        return self.df
+        self._set('Pivot', pivots[-1] if pivots else None)
+        return self._result()
 
     # Đề xuất thêm các chỉ báo hiệu quả khác:
+    @_registered
     def adx(self, window=14):
-        self.df[f'ADX_{window}'] = ta.trend.adx(
+        if self.backend == "numpy":
+            self._set(f'ADX_{window}', nk.adx(self._values('High'), self._values('Low'), self._values('Close'), window))
+            return self._result()
+        self._set(f'ADX_{window}', ta.trend.adx(
             self.df['High'].squeeze(), self.df['Low'].squeeze(), self.df['Close'].squeeze(), window=window
-        ).squeeze()
-        return self.df
+        ).squeeze())
+        return self._result()
 
+    @_registered
     def williams_r(self, lbp=14):
-        self.df[f'WilliamsR_{lbp}'] = ta.momentum.williams_r(
+        if self.backend == "numpy":
+            self._set(f'WilliamsR_{lbp}', self._evaluate(graph.williams_r(lbp)))
+            return self._result()
+        self._set(f'WilliamsR_{lbp}', ta.momentum.williams_r(
             self.df['High'].squeeze(), self.df['Low'].squeeze(), self.df['Close'].squeeze(), lbp=lbp
-        ).squeeze()
+        ).squeeze())
+        return self._result()
+
+    # Nhiều cửa sổ trong một lần tính (dùng cho quét tham số).
+    # Luôn dùng kernel NumPy, trả về block 2 chiều (DataFrame nến × cửa sổ, mỗi cột một
+    # cửa sổ) và không ghi vào self.df; dùng add_columns() nếu muốn gộp vào df.
+    # Block dùng trực tiếp được cho BacktestEngine.run_batch sau khi đổi thành tín hiệu.
+    def _block(self, prefix, windows, values):
+        columns = [f'{prefix}_{w}' for w in windows]
+        return pd.DataFrame(values, index=self.df.index, columns=columns)
+
+    def sma_many(self, windows=(5, 10, 20, 50, 100)):
+        return self._block('SMA', windows, nk.sma_many(self._values('Close'), windows))
+
+    def ema_many(self, windows=(5, 10, 20, 50, 100)):
+        return self._block('EMA', windows, nk.ema_many(self._values('Close'), windows))
+
+    def rsi_many(self, windows=(7, 14, 21)):
+        # RSI Wilder: diff/gain/loss tính một lần, mọi cửa sổ làm mượt trong một lần hồi quy
+        return self._block('RSI', windows, nk.rsi_many(self._values('Close'), windows))
+
+    def atr_many(self, windows=(7, 14, 21)):
+        values = nk.atr_many(self._values('High'), self._values('Low'), self._values('Close'), windows)
+        return self._block('ATR', windows, values)
+
+    def cci_many(self, windows=(7, 14, 20)):
+        values = nk.cci_many(self._values('High'), self._values('Low'), self._values('Close'), windows)
+        return self._block('CCI', windows, values)
+
+    def williams_r_many(self, windows=(7, 14, 21)):
+        values = nk.williams_r_many(self._values('High'), self._values('Low'), self._values('Close'), windows)
+        return self._block('WilliamsR', windows, values)
+
+    def add_columns(self, block):
+        if self._store is not None:
+            for col in block.columns:
+                self._store.set(col, block[col].to_numpy())
+            return self
+        # Gộp cả block vào df bằng một lần concat thay vì chèn từng cột
+        block = self._pad_columns(block)
+        self.df = pd.concat([self.df.drop(columns=block.columns, errors='ignore'), block], axis=1)
         return self.df
 
+    # ------------------------------------------------------------------
+    # Cache kết quả theo (fingerprint dữ liệu, backend, chỉ báo, tham số)
+    # ------------------------------------------------------------------
+    def data_fingerprint(self):
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint(self._history().values())
+        return self._fingerprint
+
+    def _cache_key(self, name, params):
+        return IndicatorCache.make_key(self.data_fingerprint(), self.backend, name, params)
+
+    def _cache_get(self, name, params):
+        if self.cache is None:
+            return None
+        return self.cache.get(self._cache_key(name, params))
+
+    def _cache_put(self, name, params, columns):
+        if self.cache is None or not columns:
+            return
+        self.cache.put(self._cache_key(name, params), {col: self._get_column(col) for col in columns})
+
+    # ------------------------------------------------------------------
+    # Streaming: cập nhật các chỉ báo đã tính khi có nến mới
+    # ------------------------------------------------------------------
+    def _register(self, name, params):
+        key = (name, tuple(params.items()))
+        if key in self._indicators:
+            return
+        self._indicators[key] = params
+        if self._streams is not None:
+            self._streams[key] = streaming.create_stream(name, params, self._history())
+
+    def _history(self):
+        return {col: self._values(col) for col in ('Open', 'High', 'Low', 'Close', 'Volume') if col in self.df}
+
+    def update(self, new_bar, index=None):
+        """
+        Cập nhật mọi chỉ báo đã tính với một nến mới, O(1) mỗi nến.
+        new_bar: dict/Series có Open, High, Low, Close, Volume
+        index: nhãn index của nến (mặc định: new_bar.name nếu là Series,
+               hoặc index cuối + bước thời gian cuối)
+        Trả về dict {tên cột: giá trị mới}; df được cập nhật khi đọc lần tới.
+        """
+        if self._streams is None:
+            # Khởi tạo trạng thái từ lịch sử một lần duy nhất
+            history = self._history()
+            self._streams = {
+                key: streaming.create_stream(key[0], params, history)
+                for key, params in self._indicators.items()
+            }
+        if index is None:
+            index = getattr(new_bar, 'name', None)
+        if index is None:
+            last_index = self._pending[-1][0] if self._pending else self._df.index[-1]
+            step = self._df.index[-1] - self._df.index[-2] if len(self._df.index) > 1 else 1
+            index = last_index + step
+        bar = {col: float(new_bar[col]) for col in ('Open', 'High', 'Low', 'Close', 'Volume') if col in new_bar}
+        values = {}
+        for stream in self._streams.values():
+            stream_values = stream.update(bar)
+            values.update(stream_values)
+            if stream.constant:
+                self._constant_values.update(stream_values)
+        row = dict(bar)
+        row.update(values)
+        self._pending.append((index, row))
+        return values
+
+    def _flush(self):
+        pending, self._pending = self._pending, []
+        if self._store is not None:
+            # Nến mới làm thay đổi số dòng: ghép block vào df và chuyển về chế độ copy
+            self._df, self._store = self._materialize(), None
+        df = self._df
+        flat = [col[0] if isinstance(col, tuple) else col for col in df.columns]
+        rows = [[row.get(name, np.nan) for name in flat] for _, row in pending]
+        new_rows = pd.DataFrame(rows, index=[index for index, _ in pending], columns=df.columns)
+        if isinstance(df.index, pd.DatetimeIndex):
+            new_rows.index = pd.DatetimeIndex(new_rows.index, name=df.index.name)
+        df = pd.concat([df, new_rows])
+        # Fibonacci/Pivot là hằng số trên cả cột: gán giá trị mới nhất cho toàn cột
+        for name, value in self._constant_values.items():
+            if name in flat:
+                df[df.columns[flat.index(name)]] = value
+        self.df = df
+
     def get_df(self):
-        return self.df
+        df = self.df
+        if self._store is None:
+            return df
+        return self._materialize()
 
 def show_technical_dashboard():
     """Simplified Technical Analysis Dashboard"""
@@ -286,8 +636,7 @@ def get_technical_signals(coin, timeframe):
         ticker = ticker_map.get(coin, f'{coin}-USD')
         
         # Get data from yfinance
-        stock = yf.Ticker(ticker)
-        df = stock.history(period=timeframe)
+        df = get_store().history(ticker, period=timeframe)
         
         if df.empty:
             return {
@@ -377,8 +726,7 @@ def create_technical_chart(coin, timeframe):
         ticker = ticker_map.get(coin, f'{coin}-USD')
         
         # Get data
-        stock = yf.Ticker(ticker)
-        df = stock.history(period=timeframe)
+        df = get_store().history(ticker, period=timeframe)
         
         if df.empty:
             return None
@@ -0,0 +1,565 @@
+"""
+Kernel NumPy thuần cho IndicatorsEngine (backend="numpy").
+
+Mọi hàm nhận mảng float64 1 chiều (n,) hoặc 2 chiều (n, k) với trục thời gian
+là trục 0, và trả về mảng cùng shape. Kết quả khớp với thư viện `ta`
+(cùng vị trí NaN/0 ở đầu chuỗi) để có thể thay thế trực tiếp.
+
+Lưu ý: chỉ hỗ trợ NaN ở đầu chuỗi (ví dụ đầu vào là MACD); dữ liệu OHLCV
+cần được dropna() trước như ở các module khác.
+"""
+
+import numpy as np
+
+# Giới hạn số mũ khi tính hồi quy tuyến tính theo khối (e^200 vẫn an toàn với float64)
+_LOG_LIMIT = 200.0
+# Số phần tử tối đa của một khối sliding window khi tính CCI
+_SLIDING_CHUNK = 1 << 20
+
+
+def as_array(values):
+    """Chuyển Series/DataFrame/list về mảng float64 liên tục."""
+    if hasattr(values, "to_numpy"):
+        values = values.to_numpy(dtype=np.float64)
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def shift(x, periods=1):
+    """Giống Series.shift(periods) với periods > 0."""
+    out = np.empty_like(x)
+    out[:periods] = np.nan
+    out[periods:] = x[:-periods]
+    return out
+
+
+def _first_valid(x):
+    """Chỉ số phần tử hợp lệ đầu tiên theo trục 0 (n nếu toàn NaN)."""
+    valid = ~np.isnan(x)
+    first = np.argmax(valid, axis=0)
+    return np.where(valid.any(axis=0), first, x.shape[0])
+
+
+def linear_filter(u, decay):
+    """
+    Hồi quy y[t] = decay * y[t-1] + u[t], y[-1] = 0.
+
+    decay là số thực hoặc vector theo cột (0 <= decay < 1). Tính theo từng khối
+    bằng công thức đóng: y[t0+k] = decay^k * (decay * y[t0-1] + cumsum(u * decay^-j)),
+    độ dài khối được chọn để decay^-j không tràn số.
+    """
+    u = np.asarray(u, dtype=np.float64)
+    n = u.shape[0]
+    decay = np.asarray(decay, dtype=np.float64)
+    y = np.empty_like(u)
+    if n == 0:
+        return y
+    if decay.ndim == 1 and u.ndim == 2 and decay.size > 1:
+        # Block nhiều cửa sổ (n, k): mỗi cột dùng độ dài khối riêng theo decay của nó,
+        # cột của block Fortran là vùng nhớ liên tục nên không cần copy
+        for j in range(u.shape[1]):
+            y[:, j] = linear_filter(u[:, j], decay[j])
+        return y
+    d_min = float(decay.min())
+    if d_min <= 0.0:
+        chunk = 1
+    else:
+        chunk = max(1, int(_LOG_LIMIT / -np.log(d_min)))
+    chunk = min(chunk, n)
+    k = np.arange(chunk, dtype=np.float64)
+    if u.ndim > 1:
+        k = k.reshape((-1,) + (1,) * (u.ndim - 1))
+    pow_pos = decay ** k
+    with np.errstate(divide="ignore", over="ignore"):
+        pow_neg = np.where(pow_pos > 0, 1.0 / pow_pos, 0.0)
+    carry = np.zeros(u.shape[1:])
+    buf = np.empty_like(u[:chunk])
+    for start in range(0, n, chunk):
+        stop = min(start + chunk, n)
+        m = stop - start
+        acc = buf[:m]
+        np.multiply(u[start:stop], pow_neg[:m], out=acc)
+        np.cumsum(acc, axis=0, out=acc)
+        acc += decay * carry
+        np.multiply(pow_pos[:m], acc, out=y[start:stop])
+        carry = y[stop - 1]
+    return y
+
+
+def ewm(x, alpha, min_periods=1):
+    """
+    Giống Series.ewm(alpha=alpha, adjust=False, min_periods=...).mean():
+    khởi tạo bằng giá trị hợp lệ đầu tiên, NaN trước đủ min_periods quan sát.
+    alpha và min_periods có thể là vector theo cột khi x có shape (n, k).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    alpha = np.asarray(alpha, dtype=np.float64)
+    first = _first_valid(x)
+    if not np.any(first):
+        # Trường hợp thường gặp: không có NaN ở đầu chuỗi
+        u = x * alpha
+        u[0] = x[0]
+    else:
+        t = np.arange(x.shape[0]).reshape((-1,) + (1,) * (x.ndim - 1))
+        u = np.where(t < first, 0.0, x) * alpha
+        # Giá trị đầu tiên được giữ nguyên: y[first] = x[first]
+        u = np.where(t == first, x, u)
+    y = linear_filter(u, 1.0 - alpha)
+    lead = first + np.maximum(min_periods, 1) - 1
+    if y.ndim == 1:
+        y[:int(lead)] = np.nan
+    else:
+        lead = np.broadcast_to(lead, y.shape[1:])
+        for j in np.ndindex(*lead.shape):
+            y[(slice(0, int(lead[j])),) + j] = np.nan
+    return y
+
+
+def ema(x, span):
+    """EMA như ta.trend.ema_indicator (span=window, min_periods=window)."""
+    return ewm(x, 2.0 / (span + 1.0), min_periods=span)
+
+
+def seeded_filter(u, decay, seed_index, seed_value):
+    """
+    Hồi quy y[t] = decay * y[t-1] + u[t] bắt đầu từ y[seed_index] = seed_value,
+    các phần tử trước seed_index bằng 0 (giống các vòng lặp Wilder trong ta).
+    """
+    u = np.array(u, dtype=np.float64, copy=True)
+    u[:seed_index] = 0.0
+    u[seed_index] = seed_value
+    return linear_filter(u, decay)
+
+
+def _rolling_sum_counts(x, window):
+    """(tổng trượt, số giá trị hợp lệ trong cửa sổ) bằng một lần cumsum mỗi loại."""
+    x = np.asarray(x, dtype=np.float64)
+    valid = np.isfinite(x)
+    # Trừ giá trị tham chiếu để giảm sai số làm tròn của cumsum
+    ref = _reference(x, valid)
+    y = np.where(valid, x - ref, 0.0)
+    sums = _window_diff(np.cumsum(y, axis=0), window)
+    counts = _window_diff(np.cumsum(valid, axis=0), window)
+    sums += ref * counts
+    return sums, counts
+
+
+def rolling_sum(x, window, min_periods=None):
+    """Tổng trượt, NaN nếu ít hơn min_periods giá trị hợp lệ."""
+    if min_periods is None:
+        min_periods = window
+    out, counts = _rolling_sum_counts(x, window)
+    out[counts < max(min_periods, 1)] = np.nan
+    return out
+
+
+def rolling_mean(x, window, min_periods=None):
+    if min_periods is None:
+        min_periods = window
+    out, counts = _rolling_sum_counts(x, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out /= counts
+    out[counts < max(min_periods, 1)] = np.nan
+    return out
+
+
+def rolling_std(x, window, ddof=0):
+    """Độ lệch chuẩn trượt (min_periods=window) từ cumsum của x và x^2."""
+    x = np.asarray(x, dtype=np.float64)
+    valid = np.isfinite(x)
+    ref = _reference(x, valid)
+    y = np.where(valid, x - ref, 0.0)
+    s1 = _window_diff(np.cumsum(y, axis=0), window)
+    s2 = _window_diff(np.cumsum(y * y, axis=0), window)
+    counts = _window_diff(np.cumsum(valid, axis=0), window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = (s2 - s1 * s1 / counts) / (counts - ddof)
+    var = np.maximum(var, 0.0)
+    out = np.sqrt(var)
+    out[counts < window] = np.nan
+    return out
+
+
+def rolling_max(x, window, min_periods=None):
+    return _rolling_extreme(x, window, min_periods, np.fmax)
+
+
+def rolling_min(x, window, min_periods=None):
+    return _rolling_extreme(x, window, min_periods, np.fmin)
+
+
+def rolling_mad(x, window):
+    """Mean absolute deviation trượt như hàm _mad trong ta.trend.CCIIndicator."""
+    x = np.asarray(x, dtype=np.float64)
+    n = x.shape[0]
+    out = np.full_like(x, np.nan)
+    if n < window:
+        return out
+    views = np.lib.stride_tricks.sliding_window_view(x, window, axis=0)
+    row_size = max(1, views[0].size)
+    step = max(1, _SLIDING_CHUNK // row_size)
+    for start in range(0, views.shape[0], step):
+        block = views[start:start + step]
+        mean = block.mean(axis=-1, keepdims=True)
+        out[window - 1 + start:window - 1 + start + block.shape[0]] = np.abs(block - mean).mean(axis=-1)
+    return out
+
+
+def _reference(x, valid):
+    """Giá trị hợp lệ đầu tiên của mỗi cột (0 nếu không có)."""
+    first = np.argmax(valid, axis=0)
+    if x.ndim == 1:
+        ref = x[first] if valid.any() else 0.0
+    else:
+        ref = np.take_along_axis(x, first[None, ...], axis=0)[0]
+        ref = np.where(valid.any(axis=0), ref, 0.0)
+    return ref
+
+
+def _window_diff(csum, window):
+    """csum[i] - csum[i - window] (coi csum[-1] = 0)."""
+    out = np.array(csum, dtype=np.float64, copy=True)
+    out[window:] -= csum[:-window]
+    return out
+
+
+def _rolling_extreme(x, window, min_periods, op):
+    """
+    Max/min trượt bằng cách nhân đôi độ dài cửa sổ: sau mỗi bước out[i] bao phủ
+    x[i-span+1..i], cần O(log window) phép toán trên cả mảng (nhanh với mảng 2 chiều).
+    op là np.fmax/np.fmin nên bỏ qua NaN như pandas.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if min_periods is None:
+        min_periods = window
+    out = x.copy()
+    span = 1
+    while span * 2 <= window:
+        out[span:] = op(out[span:], out[:-span])
+        span *= 2
+    if span < window:
+        rest = window - span
+        out[rest:] = op(out[rest:], out[:-rest])
+    if min_periods > 0:
+        counts = _window_diff(np.cumsum(~np.isnan(x), axis=0), window)
+        out[counts < min_periods] = np.nan
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Các chỉ báo (cùng công thức và tên tham số với ta)
+# ---------------------------------------------------------------------------
+
+def sma(close, window=20):
+    return rolling_mean(close, window)
+
+
+def rsi(close, window=14):
+    diff = np.diff(close, axis=0, prepend=np.nan)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    alpha = 1.0 / window
+    emaup = ewm(up, alpha, min_periods=window)
+    emadn = ewm(down, alpha, min_periods=window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(emadn == 0, 100.0, 100.0 - (100.0 / (1.0 + emaup / emadn)))
+
+
+def macd(close, window_slow=26, window_fast=12, window_sign=9):
+    """Trả về (macd, macd_signal, macd_diff)."""
+    line = ema(close, window_fast) - ema(close, window_slow)
+    signal = ema(line, window_sign)
+    return line, signal, line - signal
+
+
+def stochastic(high, low, close, window=14, smooth_window=3):
+    """Trả về (stoch_k, stoch_d)."""
+    smin = rolling_min(low, window)
+    smax = rolling_max(high, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = 100.0 * (close - smin) / (smax - smin)
+    return k, rolling_mean(k, smooth_window)
+
+
+def cci(high, low, close, window=20, constant=0.015):
+    tp = (high + low + close) / 3.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (tp - rolling_mean(tp, window)) / (constant * rolling_mad(tp, window))
+
+
+def bollinger_bands(close, window=20, window_dev=2):
+    """Trả về (hband, lband, mavg, wband)."""
+    mavg = rolling_mean(close, window)
+    mstd = rolling_std(close, window, ddof=0)
+    hband = mavg + window_dev * mstd
+    lband = mavg - window_dev * mstd
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wband = (hband - lband) / mavg * 100.0
+    return hband, lband, mavg, wband
+
+
+def true_range(high, low, close):
+    prev_close = shift(close, 1)
+    tr = np.fmax(high - low, np.abs(high - prev_close))
+    return np.fmax(tr, np.abs(low - prev_close))
+
+
+def atr(high, low, close, window=14):
+    """ATR kiểu Wilder như ta: 0 trước window-1, khởi tạo bằng trung bình TR."""
+    return wilder_atr(true_range(high, low, close), window)
+
+
+def wilder_atr(tr, window=14):
+    """ATR từ True Range đã tính sẵn (dùng chung TR giữa các cửa sổ)."""
+    seed = tr[:window].mean(axis=0)
+    out = seeded_filter(tr / window, (window - 1.0) / window, window - 1, seed)
+    out[:window - 1] = 0.0
+    return out
+
+
+def obv(close, volume):
+    signed = np.where(close < shift(close, 1), -volume, volume)
+    return np.cumsum(signed, axis=0)
+
+
+def volume_oscillator(volume, short_window=12, long_window=26):
+    short_vol = rolling_mean(volume, short_window)
+    long_vol = rolling_mean(volume, long_window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (short_vol - long_vol) / long_vol
+
+
+def chaikin_money_flow(high, low, close, volume, window=20):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mfv = ((close - low) - (high - close)) / (high - low)
+    mfv = np.where(np.isnan(mfv), 0.0, mfv) * volume
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return rolling_sum(mfv, window) / rolling_sum(volume, window)
+
+
+def ichimoku(high, low, window1=9, window2=26, window3=52):
+    """Trả về (span_a, span_b, base_line, conversion_line), visual=False."""
+    conv = 0.5 * (rolling_max(high, window1) + rolling_min(low, window1))
+    base = 0.5 * (rolling_max(high, window2) + rolling_min(low, window2))
+    span_a = 0.5 * (conv + base)
+    span_b = 0.5 * (rolling_max(high, window3, min_periods=0) + rolling_min(low, window3, min_periods=0))
+    return span_a, span_b, base, conv
+
+
+def heikin_ashi(open_, high, low, close):
+    """Trả về (ha_open, ha_high, ha_low, ha_close)."""
+    ha_close = (open_ + high + low + close) / 4.0
+    u = np.empty_like(ha_close)
+    u[0] = (open_[0] + close[0]) / 2.0
+    u[1:] = 0.5 * ha_close[:-1]
+    ha_open = linear_filter(u, 0.5)
+    ha_high = np.maximum(np.maximum(high, ha_open), ha_close)
+    ha_low = np.minimum(np.minimum(low, ha_open), ha_close)
+    return ha_open, ha_high, ha_low, ha_close
+
+
+def directional_index(trs, dip_s, din_s):
+    """DX từ TR/+DM/-DM đã làm trơn (0 khi mẫu số bằng 0, như ta)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dip = np.where(trs != 0, 100.0 * dip_s / trs, 0.0)
+        din = np.where(trs != 0, 100.0 * din_s / trs, 0.0)
+        total = dip + din
+        return np.where(total != 0, 100.0 * np.abs((dip - din) / total), 0.0)
+
+
+def adx_smoothed(high, low, close, window=14):
+    """
+    TR, +DM, -DM làm trơn kiểu Wilder như ta.trend.ADXIndicator, độ dài n - window + 1.
+    Vị trí i dùng dữ liệu tới nến i + window, nên phần tử cuối chưa tính được và bằng 0
+    (giống ta).
+    """
+    n = close.shape[0]
+    w = window
+    tr = np.fmax(high, shift(close, 1)) - np.fmin(low, shift(close, 1))
+    tr[0] = np.nan
+    diff_up = high - shift(high, 1)
+    diff_down = shift(low, 1) - low
+    pos = np.where((diff_up > diff_down) & (diff_up > 0), diff_up, 0.0)
+    neg = np.where((diff_down > diff_up) & (diff_down > 0), diff_down, 0.0)
+
+    length = n - (w - 1)
+    decay = 1.0 - 1.0 / w
+
+    def smooth(values):
+        # s[0] = tổng values[1..w], s[i] = s[i-1]*(1-1/w) + values[w+i], s[-1] = 0
+        u = np.zeros((length,) + values.shape[1:])
+        u[1:length - 1] = values[w + 1:w + length - 1]
+        s = seeded_filter(u, decay, 0, values[1:w + 1].sum(axis=0))
+        s[length - 1] = 0.0
+        return s
+
+    return smooth(tr), smooth(pos), smooth(neg)
+
+
+def adx(high, low, close, window=14):
+    """
+    ADX khớp với ta.trend.ADXIndicator.adx(), kể cả các đặc điểm của ta:
+    2*window-1 giá trị đầu bằng 0 và phần tử cuối của TR/DM được làm trơn bằng 0.
+    """
+    w = window
+    dx = directional_index(*adx_smoothed(high, low, close, window))
+    length = dx.shape[0]
+    u = np.zeros_like(dx)
+    u[w + 1:] = dx[w:length - 1] / w
+    out = seeded_filter(u, (w - 1.0) / w, w, dx[:w].mean(axis=0))
+    out[:w] = 0.0
+    return np.concatenate([np.zeros((w - 1,) + out.shape[1:]), out])
+
+
+def williams_r(high, low, close, lbp=14):
+    highest_high = rolling_max(high, lbp)
+    lowest_low = rolling_min(low, lbp)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return -100.0 * (highest_high - close) / (highest_high - lowest_low)
+
+
+# ---------------------------------------------------------------------------
+# Nhiều cửa sổ trong một lần tính: đầu vào 1 chiều (n,), đầu ra (n, len(windows))
+# ---------------------------------------------------------------------------
+
+def _windows_array(windows):
+    windows = np.asarray(list(windows), dtype=np.int64)
+    if windows.ndim != 1 or windows.size == 0 or (windows < 1).any():
+        raise ValueError("windows phải là danh sách số nguyên dương")
+    return windows
+
+
+def _window_diff_many(csum, windows):
+    """csum[i] - csum[i - w] cho mọi w; block (n, k) theo thứ tự cột (Fortran)."""
+    n = csum.shape[0]
+    out = np.empty((n, windows.size), order="F")
+    for j, w in enumerate(windows):
+        col = out[:, j]
+        col[:] = csum
+        col[w:] -= csum[:-w]
+    return out
+
+
+def rolling_mean_many(x, windows):
+    """SMA cho nhiều cửa sổ từ một lần cumsum."""
+    x = np.asarray(x, dtype=np.float64)
+    windows = _windows_array(windows)
+    valid = np.isfinite(x)
+    ref = _reference(x, valid)
+    sums = _window_diff_many(np.cumsum(np.where(valid, x - ref, 0.0)), windows)
+    if valid.all():
+        sums /= windows
+        sums += ref
+        for j, w in enumerate(windows):
+            sums[:w - 1, j] = np.nan
+        return sums
+    counts = _window_diff_many(np.cumsum(valid, dtype=np.float64), windows)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = sums / counts + ref
+    out[counts < windows] = np.nan
+    return out
+
+
+def _sparse_table(x, max_window, op):
+    """Bảng thưa: level j chứa op trên đoạn [i, i + 2^j) (dùng chung cho mọi cửa sổ)."""
+    levels = [x]
+    span = 1
+    while span * 2 <= max_window:
+        prev = levels[-1]
+        nxt = prev.copy()
+        nxt[:-span] = op(prev[:-span], prev[span:])
+        levels.append(nxt)
+        span *= 2
+    return levels
+
+
+def _rolling_extreme_many(x, windows, op):
+    x = np.asarray(x, dtype=np.float64)
+    windows = _windows_array(windows)
+    n = x.shape[0]
+    levels = _sparse_table(x, int(windows.max()), op)
+    out = np.full((n, windows.size), np.nan, order="F")
+    for j, w in enumerate(windows):
+        if w > n:
+            continue
+        level = int(np.log2(w))
+        table = levels[level]
+        span = 1 << level
+        # Đoạn [i-w+1, i] = [i-w+1, i-w+1+span) ∪ [i-span+1, i+1)
+        start = np.arange(0, n - w + 1)
+        out[w - 1:, j] = op(table[start], table[start + w - span])
+    return out
+
+
+def rolling_max_many(x, windows):
+    return _rolling_extreme_many(x, windows, np.maximum)
+
+
+def rolling_min_many(x, windows):
+    return _rolling_extreme_many(x, windows, np.minimum)
+
+
+def sma_many(close, windows):
+    return rolling_mean_many(close, windows)
+
+
+def ema_many(close, windows):
+    """EMA cho nhiều span: một lần hồi quy với vector hệ số alpha theo cột."""
+    windows = _windows_array(windows)
+    close = np.asarray(close, dtype=np.float64)
+    block = np.empty((close.shape[0], windows.size), order="F")
+    block[:] = close[:, None]
+    return ewm(block, 2.0 / (windows + 1.0), min_periods=windows)
+
+
+def rsi_many(close, windows):
+    """RSI Wilder cho nhiều cửa sổ, diff/gain/loss chỉ tính một lần."""
+    windows = _windows_array(windows)
+    diff = np.diff(np.asarray(close, dtype=np.float64), prepend=np.nan)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    k = windows.size
+    # Ghép gain và loss thành một block (n, 2k) để chạy chung một lần hồi quy
+    block = np.empty((up.shape[0], 2 * k), order="F")
+    block[:, :k] = up[:, None]
+    block[:, k:] = down[:, None]
+    alpha = np.tile(1.0 / windows, 2)
+    smoothed = ewm(block, alpha, min_periods=np.tile(windows, 2))
+    emaup, emadn = smoothed[:, :k], smoothed[:, k:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(emadn == 0, 100.0, 100.0 - (100.0 / (1.0 + emaup / emadn)))
+
+
+def atr_many(high, low, close, windows):
+    """ATR Wilder cho nhiều cửa sổ từ một true range và một lần hồi quy."""
+    windows = _windows_array(windows)
+    tr = true_range(high, low, close)
+    n = tr.shape[0]
+    csum = np.cumsum(tr)
+    u = np.empty((n, windows.size), order="F")
+    for j, w in enumerate(windows):
+        u[:, j] = tr / w
+        u[:w - 1, j] = 0.0
+        u[w - 1, j] = csum[w - 1] / w
+    out = linear_filter(u, (windows - 1.0) / windows)
+    for j, w in enumerate(windows):
+        out[:w - 1, j] = 0.0
+    return out
+
+
+def cci_many(high, low, close, windows, constant=0.015):
+    """CCI nhiều cửa sổ: typical price và trung bình trượt tính chung một lần."""
+    windows = _windows_array(windows)
+    tp = (np.asarray(high) + np.asarray(low) + np.asarray(close)) / 3.0
+    mean = rolling_mean_many(tp, windows)
+    mad = np.column_stack([rolling_mad(tp, int(w)) for w in windows])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (tp[:, None] - mean) / (constant * mad)
+
+
+def williams_r_many(high, low, close, windows):
+    """Williams %R nhiều cửa sổ, max/min trượt lấy từ một sparse table."""
+    highest_high = rolling_max_many(high, windows)
+    lowest_low = rolling_min_many(low, windows)
+    close = np.asarray(close, dtype=np.float64)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return -100.0 * (highest_high - close) / (highest_high - lowest_low)
@@ -0,0 +1,172 @@
+"""
+PanelIndicatorsEngine: tính chỉ báo cho nhiều coin cùng lúc.
+
+Dữ liệu là ma trận (thời gian × coin) cho mỗi trường OHLCV. Mỗi chỉ báo chạy một lần
+kernel NumPy theo trục thời gian cho toàn bộ coin, thay vì tạo một IndicatorsEngine
+cho từng coin (df.xs(symbol, level=1)). Tên cột giống IndicatorsEngine.
+"""
+
+import numpy as np
+import pandas as pd
+
+from indicators_engine import graph
+from indicators_engine import numpy_kernels as nk
+
+
+class PanelIndicatorsEngine:
+    FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+    def __init__(self, data, symbols=None):
+        """
+        data: DataFrame cột MultiIndex (trường, coin) như kết quả yf.download(symbols),
+              hoặc dict {trường: DataFrame (thời gian × coin)}
+        symbols: danh sách coin cần tính (mặc định: tất cả)
+        """
+        if isinstance(data, pd.DataFrame):
+            if not isinstance(data.columns, pd.MultiIndex):
+                raise ValueError("DataFrame phải có cột MultiIndex (trường, coin) như yf.download")
+            present = data.columns.get_level_values(0)
+            data = {field: data.xs(field, axis=1, level=0) for field in self.FIELDS if field in present}
+        if 'Close' not in data:
+            raise ValueError("Thiếu dữ liệu Close")
+        close = data['Close']
+        self.index = close.index
+        self.symbols = list(symbols) if symbols is not None else list(close.columns)
+        # Mảng (thời gian × coin) theo thứ tự cột: mỗi coin là một vùng nhớ liên tục
+        self._fields = {
+            field: np.asfortranarray(frame.reindex(index=self.index, columns=self.symbols).to_numpy(dtype=np.float64))
+            for field, frame in data.items() if field in self.FIELDS
+        }
+        self._graph = graph.IndicatorGraph(self._values)
+        self.results = {}
+
+    def _values(self, field):
+        return self._fields[field]
+
+    def _evaluate(self, *nodes):
+        values = [self._graph.evaluate(node) for node in nodes]
+        return values[0] if len(values) == 1 else values
+
+    def _set(self, col, values):
+        self.results[col] = np.broadcast_to(values, (len(self.index), len(self.symbols)))
+
+    def sma(self, window=20):
+        self._set(f'SMA_{window}', self._evaluate(graph.sma(window)))
+        return self
+
+    def ema(self, window=20):
+        self._set(f'EMA_{window}', self._evaluate(graph.ema('Close', window)))
+        return self
+
+    def rsi(self, window=14):
+        self._set(f'RSI_{window}', nk.rsi(self._values('Close'), window))
+        return self
+
+    def macd(self, window_slow=26, window_fast=12, window_sign=9):
+        line, signal, diff = self._evaluate(*graph.macd(window_slow, window_fast, window_sign))
+        self._set(f'MACD_{window_fast}_{window_slow}', line)
+        self._set(f'MACD_SIGNAL_{window_fast}_{window_slow}_{window_sign}', signal)
+        self._set(f'MACD_DIFF_{window_fast}_{window_slow}_{window_sign}', diff)
+        return self
+
+    def stochastic(self, window=14, smooth_window=3):
+        k, d = self._evaluate(*graph.stochastic(window, smooth_window))
+        self._set(f'STOCH_K_{window}', k)
+        self._set(f'STOCH_D_{window}', d)
+        return self
+
+    def cci(self, window=20):
+        self._set(f'CCI_{window}', self._evaluate(graph.cci(window)))
+        return self
+
+    def bollinger_bands(self, window=20, window_dev=2):
+        hband, lband, mavg, wband = self._evaluate(*graph.bollinger_bands(window, window_dev))
+        self._set(f'BB_High_{window}', hband)
+        self._set(f'BB_Low_{window}', lband)
+        self._set(f'BB_Mavg_{window}', mavg)
+        self._set(f'BB_Width_{window}', wband)
+        return self
+
+    def atr(self, window=14):
+        self._set(f'ATR_{window}', self._evaluate(graph.atr(window)))
+        return self
+
+    def obv(self):
+        self._set('OBV', nk.obv(self._values('Close'), self._values('Volume')))
+        return self
+
+    def volume_oscillator(self, short_window=12, long_window=26):
+        self._set(f'Volume_Osc_{short_window}_{long_window}', nk.volume_oscillator(self._values('Volume'), short_window, long_window))
+        return self
+
+    def chaikin_money_flow(self, window=20):
+        self._set(f'CMF_{window}', nk.chaikin_money_flow(
+            self._values('High'), self._values('Low'), self._values('Close'), self._values('Volume'), window
+        ))
+        return self
+
+    def ichimoku(self):
+        span_a, span_b, base, conv = self._evaluate(*graph.ichimoku())
+        self._set('Ichimoku_A', span_a)
+        self._set('Ichimoku_B', span_b)
+        self._set('Ichimoku_base_line', base)
+        self._set('Ichimoku_conversion_line', conv)
+        return self
+
+    def heikin_ashi(self):
+        ha_open, ha_high, ha_low, ha_close = nk.heikin_ashi(
+            self._values('Open'), self._values('High'), self._values('Low'), self._values('Close')
+        )
+        self._set('HA_Open', ha_open)
+        self._set('HA_High', ha_high)
+        self._set('HA_Low', ha_low)
+        self._set('HA_Close', ha_close)
+        return self
+
+    def fib_retracement(self, lookback=100):
+        # Mức fibo theo từng coin, hằng số trên cả cột như IndicatorsEngine
+        max_price = np.nanmax(self._values('High')[-lookback:], axis=0)
+        min_price = np.nanmin(self._values('Low')[-lookback:], axis=0)
+        diff = max_price - min_price
+        for ratio in (0.0, 0.236, 0.382, 0.5, 0.618, 0.786):
+            self._set(f'Fib_{ratio}', max_price - ratio * diff)
+        self._set('Fib_1.0', min_price)
+        return self
+
+    def pivot_points(self, lookback=1):
+        if lookback < 1:
+            self._set('Pivot', np.nan)
+            return self
+        row = -(lookback + 1)
+        high, low, close = self._values('High')[row], self._values('Low')[row], self._values('Close')[row]
+        self._set('Pivot', (high + low + close) / 3)
+        return self
+
+    def adx(self, window=14):
+        self._set(f'ADX_{window}', nk.adx(self._values('High'), self._values('Low'), self._values('Close'), window))
+        return self
+
+    def williams_r(self, lbp=14):
+        self._set(f'WilliamsR_{lbp}', self._evaluate(graph.williams_r(lbp)))
+        return self
+
+    # ------------------------------------------------------------------
+    # Xuất kết quả
+    # ------------------------------------------------------------------
+    def get(self, col):
+        """Một chỉ báo dạng DataFrame (thời gian × coin)."""
+        return pd.DataFrame(self.results[col], index=self.index, columns=self.symbols)
+
+    def coin_df(self, symbol):
+        """DataFrame của một coin (OHLCV + chỉ báo), giống IndicatorsEngine(df_coin).get_df()."""
+        j = self.symbols.index(symbol)
+        columns = {field: values[:, j] for field, values in self._fields.items()}
+        columns.update((col, values[:, j]) for col, values in self.results.items())
+        return pd.DataFrame(columns, index=self.index)
+
+    def get_df(self):
+        """Mọi trường và chỉ báo, cột MultiIndex (trường/chỉ báo, coin) như yf.download."""
+        names = list(self._fields) + list(self.results)
+        arrays = [self._fields[name] if name in self._fields else self.results[name] for name in names]
+        columns = pd.MultiIndex.from_product([names, self.symbols])
+        return pd.DataFrame(np.hstack(arrays), index=self.index, columns=columns)
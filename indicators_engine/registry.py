@@ -0,0 +1,95 @@
+"""
+Danh mục chỉ báo: tên chỉ báo (như trong ParameterOptimizer.indicators) -> hàm của
+IndicatorsEngine, cách lấy tham số từ bộ tham số tối ưu và tên các cột kết quả.
+
+ParameterOptimizer dịch danh sách chỉ báo thành một call plan một lần lúc khởi tạo,
+mỗi lần thử chỉ còn tra bảng và gọi hàm, không còn chuỗi if theo tên chỉ báo.
+"""
+
+from collections import namedtuple
+
+# params: các bộ (tham số của hàm engine, khóa trong bộ tham số tối ưu, giá trị mặc định);
+#         mặc định None nghĩa là bắt buộc phải có trong bộ tham số
+# outputs: tên cột kết quả, định dạng theo tham số của hàm engine
+# sweep: hàm *_many của engine tính mọi cửa sổ trong một lần (ma trận nến × cửa sổ), nếu có
+IndicatorSpec = namedtuple("IndicatorSpec", "method params outputs sweep", defaults=(None,))
+
+INDICATORS = {}
+
+
+def register(name, method, params=(), outputs=(), sweep=None):
+    """Thêm (hoặc thay) chỉ báo `name` gọi IndicatorsEngine.<method>."""
+    INDICATORS[name] = IndicatorSpec(method, tuple(params), tuple(outputs), sweep)
+    return INDICATORS[name]
+
+
+def get_spec(name):
+    try:
+        return INDICATORS[name]
+    except KeyError:
+        raise ValueError(f"Chỉ báo {name!r} chưa được đăng ký, có: {sorted(INDICATORS)}") from None
+
+
+def _kwargs(method, spec_params, params):
+    kwargs = {}
+    for arg, key, default in spec_params:
+        value = params.get(key, default)
+        if value is None:
+            raise KeyError(f"Thiếu tham số {key!r} cho {method}")
+        kwargs[arg] = value
+    return kwargs
+
+
+def output_columns(name, params):
+    """Tên các cột chỉ báo `name` ghi ra với bộ tham số params (dạng của optimizer)."""
+    spec = get_spec(name)
+    kwargs = _kwargs(spec.method, spec.params, params)
+    return [column.format(**kwargs) for column in spec.outputs]
+
+
+def compile_plan(names, param_keys=None):
+    """
+    Call plan cho danh sách chỉ báo: tuple các (tên hàm engine, params của spec).
+    param_keys: các khóa tham số sẽ có (ví dụ param_ranges); nếu truyền vào thì báo lỗi
+    ngay khi thiếu tham số bắt buộc thay vì giữa lúc chạy.
+    """
+    plan = []
+    for name in names:
+        spec = get_spec(name)
+        if param_keys is not None:
+            missing = [key for _, key, default in spec.params if default is None and key not in param_keys]
+            if missing:
+                raise ValueError(f"Chỉ báo {name!r} cần tham số {missing} trong param_ranges")
+        plan.append((spec.method, spec.params))
+    return tuple(plan)
+
+
+def run_plan(engine, plan, params):
+    """Gọi lần lượt các hàm trong plan trên engine với bộ tham số params."""
+    for method, spec_params in plan:
+        getattr(engine, method)(**_kwargs(method, spec_params, params))
+    return engine
+
+
+register("SMA", "sma", [("window", "SMA", None)], ["SMA_{window}"], sweep="sma_many")
+register("EMA", "ema", [("window", "EMA", None)], ["EMA_{window}"], sweep="ema_many")
+register("RSI", "rsi", [("window", "RSI", None)], ["RSI_{window}"], sweep="rsi_many")
+register("MACD", "macd",
+         [("window_fast", "MACD_fast", 12), ("window_slow", "MACD_slow", 26), ("window_sign", "MACD_sign", 9)],
+         ["MACD_{window_fast}_{window_slow}", "MACD_SIGNAL_{window_fast}_{window_slow}_{window_sign}",
+          "MACD_DIFF_{window_fast}_{window_slow}_{window_sign}"])
+register("Bollinger Bands", "bollinger_bands", [("window", "BB", None)],
+         ["BB_High_{window}", "BB_Low_{window}", "BB_Mavg_{window}", "BB_Width_{window}"])
+register("ATR", "atr", [("window", "ATR", None)], ["ATR_{window}"], sweep="atr_many")
+register("CCI", "cci", [("window", "CCI", None)], ["CCI_{window}"], sweep="cci_many")
+register("Stochastic", "stochastic", [("window", "Stochastic", None)], ["STOCH_K_{window}", "STOCH_D_{window}"])
+register("ADX", "adx", [("window", "ADX", None)], ["ADX_{window}"])
+register("Williams %R", "williams_r", [("lbp", "WilliamsR", None)], ["WilliamsR_{lbp}"], sweep="williams_r_many")
+register("CMF", "chaikin_money_flow", [("window", "CMF", 20)], ["CMF_{window}"])
+register("Volume Oscillator", "volume_oscillator",
+         [("short_window", "VO_short", 12), ("long_window", "VO_long", 26)],
+         ["Volume_Osc_{short_window}_{long_window}"])
+register("OBV", "obv", outputs=["OBV"])
+register("Ichimoku", "ichimoku",
+         outputs=["Ichimoku_A", "Ichimoku_B", "Ichimoku_base_line", "Ichimoku_conversion_line"])
+register("Heikin Ashi", "heikin_ashi", outputs=["HA_Open", "HA_High", "HA_Low", "HA_Close"])
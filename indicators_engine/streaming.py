@@ -0,0 +1,500 @@
+"""
+Cập nhật chỉ báo theo từng nến mới (streaming) cho IndicatorsEngine.update().
+
+Mỗi chỉ báo giữ trạng thái riêng (giá trị EMA cuối, bộ đệm vòng của cửa sổ trượt,
+trung bình Wilder của RSI/ATR/ADX...) được khởi tạo một lần từ lịch sử bằng kernel
+NumPy, sau đó mỗi nến mới chỉ tốn O(1) (hoặc O(window) với CCI/Bollinger), không phụ
+thuộc độ dài lịch sử. Giá trị trả về khớp với việc tính lại toàn bộ lịch sử.
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+
+from indicators_engine import numpy_kernels as nk
+
+NAN = float("nan")
+
+
+def _div(a, b):
+    # Chia kiểu NumPy (inf/nan thay vì ZeroDivisionError) để khớp với kernel
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return float(np.float64(a) / np.float64(b))
+
+
+class RingBuffer:
+    """Bộ đệm vòng cho cửa sổ trượt độ dài cố định, giữ tổng chạy."""
+
+    def __init__(self, size, history=()):
+        self.size = size
+        self.values = np.full(size, np.nan)
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+        for value in list(history)[-size:]:
+            self.append(value)
+
+    def append(self, value):
+        self.total += value - (self.values[self.pos] if self.count == self.size else 0.0)
+        self.values[self.pos] = value
+        self.pos = (self.pos + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        if self.pos == 0:
+            # Tính lại tổng sau mỗi vòng để không tích lũy sai số làm tròn
+            self.total = float(self.values.sum())
+
+    @property
+    def full(self):
+        return self.count == self.size
+
+    def mean(self):
+        return self.total / self.size if self.full else NAN
+
+    def window(self):
+        return self.values if self.full else self.values[:self.count]
+
+
+class RollingExtreme:
+    """Max/min trượt bằng hàng đợi đơn điệu (O(1) khấu hao mỗi nến)."""
+
+    def __init__(self, size, mode="max", min_periods=None, history=()):
+        self.size = size
+        self.is_max = mode == "max"
+        self.min_periods = size if min_periods is None else min_periods
+        self.queue = deque()
+        self.t = 0
+        for value in list(history)[-size:]:
+            self.append(value)
+
+    def append(self, value):
+        queue = self.queue
+        if self.is_max:
+            while queue and queue[-1][1] <= value:
+                queue.pop()
+        else:
+            while queue and queue[-1][1] >= value:
+                queue.pop()
+        queue.append((self.t, value))
+        self.t += 1
+        while queue[0][0] <= self.t - 1 - self.size:
+            queue.popleft()
+
+    def value(self):
+        if not self.queue or min(self.t, self.size) < max(self.min_periods, 1):
+            return NAN
+        return self.queue[0][1]
+
+
+class EwmState:
+    """Trạng thái ewm(alpha, adjust=False): giá trị cuối và số quan sát hợp lệ."""
+
+    def __init__(self, alpha, min_periods, history=None):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = NAN
+        self.count = 0
+        if history is not None and len(history):
+            history = np.asarray(history, dtype=np.float64)
+            self.count = int(np.count_nonzero(~np.isnan(history)))
+            if self.count:
+                self.value = float(nk.ewm(history, alpha, min_periods=1)[-1])
+
+    def update(self, x):
+        if math.isnan(x):
+            return self.output()
+        if self.count == 0:
+            self.value = x
+        else:
+            self.value = (1.0 - self.alpha) * self.value + self.alpha * x
+        self.count += 1
+        return self.output()
+
+    def output(self):
+        return self.value if self.count >= self.min_periods else NAN
+
+
+# ---------------------------------------------------------------------------
+# Các stream cho từng chỉ báo. Mỗi stream nhận dict mảng lịch sử (Open, High, Low,
+# Close, Volume) khi khởi tạo và trả về dict {tên cột: giá trị} cho mỗi nến mới.
+# ---------------------------------------------------------------------------
+
+class IndicatorStream:
+    # Cột có giá trị hằng trên toàn bộ df (Fibonacci, Pivot): khi ghi vào df
+    # thì cả cột được gán giá trị mới nhất, giống khi tính lại từ đầu
+    constant = False
+
+    def update(self, bar):
+        raise NotImplementedError
+
+
+class SmaStream(IndicatorStream):
+    def __init__(self, data, window=20):
+        self.column = f'SMA_{window}'
+        self.buffer = RingBuffer(window, data['Close'])
+
+    def update(self, bar):
+        self.buffer.append(bar['Close'])
+        return {self.column: self.buffer.mean()}
+
+
+class EmaStream(IndicatorStream):
+    def __init__(self, data, window=20):
+        self.column = f'EMA_{window}'
+        self.state = EwmState(2.0 / (window + 1.0), window, data['Close'])
+
+    def update(self, bar):
+        return {self.column: self.state.update(bar['Close'])}
+
+
+class RsiStream(IndicatorStream):
+    def __init__(self, data, window=14):
+        self.column = f'RSI_{window}'
+        close = data['Close']
+        diff = np.diff(close, prepend=np.nan)
+        alpha = 1.0 / window
+        self.up = EwmState(alpha, window, np.where(diff > 0, diff, 0.0))
+        self.down = EwmState(alpha, window, np.where(diff < 0, -diff, 0.0))
+        self.prev_close = float(close[-1]) if len(close) else NAN
+
+    def update(self, bar):
+        diff = bar['Close'] - self.prev_close
+        self.prev_close = bar['Close']
+        up = self.up.update(diff if diff > 0 else 0.0)
+        down = self.down.update(-diff if diff < 0 else 0.0)
+        value = 100.0 if down == 0 else 100.0 - 100.0 / (1.0 + _div(up, down))
+        return {self.column: value}
+
+
+class MacdStream(IndicatorStream):
+    def __init__(self, data, window_slow=26, window_fast=12, window_sign=9):
+        close = data['Close']
+        self.columns = (
+            f'MACD_{window_fast}_{window_slow}',
+            f'MACD_SIGNAL_{window_fast}_{window_slow}_{window_sign}',
+            f'MACD_DIFF_{window_fast}_{window_slow}_{window_sign}',
+        )
+        self.fast = EwmState(2.0 / (window_fast + 1.0), window_fast, close)
+        self.slow = EwmState(2.0 / (window_slow + 1.0), window_slow, close)
+        line = nk.ema(close, window_fast) - nk.ema(close, window_slow) if len(close) else None
+        self.signal = EwmState(2.0 / (window_sign + 1.0), window_sign, line)
+
+    def update(self, bar):
+        line = self.fast.update(bar['Close']) - self.slow.update(bar['Close'])
+        signal = self.signal.update(line)
+        return dict(zip(self.columns, (line, signal, line - signal)))
+
+
+class StochasticStream(IndicatorStream):
+    def __init__(self, data, window=14, smooth_window=3):
+        self.columns = (f'STOCH_K_{window}', f'STOCH_D_{window}')
+        self.low = RollingExtreme(window, "min", history=data['Low'])
+        self.high = RollingExtreme(window, "max", history=data['High'])
+        k_history = ()
+        if len(data['Close']):
+            k_history, _ = nk.stochastic(data['High'], data['Low'], data['Close'], window, smooth_window)
+        self.k = RingBuffer(smooth_window, k_history)
+
+    def update(self, bar):
+        self.low.append(bar['Low'])
+        self.high.append(bar['High'])
+        smin, smax = self.low.value(), self.high.value()
+        k = 100.0 * _div(bar['Close'] - smin, smax - smin)
+        self.k.append(k)
+        d = float(np.mean(self.k.values)) if self.k.full else NAN
+        return dict(zip(self.columns, (k, d)))
+
+
+class CciStream(IndicatorStream):
+    def __init__(self, data, window=20):
+        self.column = f'CCI_{window}'
+        tp = (data['High'] + data['Low'] + data['Close']) / 3.0
+        self.buffer = RingBuffer(window, tp)
+
+    def update(self, bar):
+        tp = (bar['High'] + bar['Low'] + bar['Close']) / 3.0
+        self.buffer.append(tp)
+        if not self.buffer.full:
+            return {self.column: NAN}
+        values = self.buffer.values
+        mean = values.mean()
+        mad = np.abs(values - mean).mean()
+        return {self.column: _div(tp - mean, 0.015 * mad)}
+
+
+class BollingerStream(IndicatorStream):
+    def __init__(self, data, window=20, window_dev=2):
+        self.columns = (f'BB_High_{window}', f'BB_Low_{window}', f'BB_Mavg_{window}', f'BB_Width_{window}')
+        self.window_dev = window_dev
+        self.buffer = RingBuffer(window, data['Close'])
+
+    def update(self, bar):
+        self.buffer.append(bar['Close'])
+        if not self.buffer.full:
+            return dict.fromkeys(self.columns, NAN)
+        mavg = float(self.buffer.values.mean())
+        mstd = float(self.buffer.values.std())
+        hband = mavg + self.window_dev * mstd
+        lband = mavg - self.window_dev * mstd
+        return dict(zip(self.columns, (hband, lband, mavg, _div(hband - lband, mavg) * 100.0)))
+
+
+class AtrStream(IndicatorStream):
+    def __init__(self, data, window=14):
+        self.column = f'ATR_{window}'
+        self.window = window
+        close = data['Close']
+        self.count = len(close)
+        self.prev_close = float(close[-1]) if len(close) else NAN
+        self.value = 0.0
+        self.tr_sum = 0.0
+        if self.count >= window:
+            self.value = float(nk.atr(data['High'], data['Low'], close, window)[-1])
+        elif self.count:
+            self.tr_sum = float(nk.true_range(data['High'], data['Low'], close).sum())
+
+    def update(self, bar):
+        high, low = bar['High'], bar['Low']
+        tr = high - low
+        if not math.isnan(self.prev_close):
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = bar['Close']
+        index = self.count
+        self.count += 1
+        w = self.window
+        if index < w - 1:
+            self.tr_sum += tr
+            return {self.column: 0.0}
+        if index == w - 1:
+            self.value = (self.tr_sum + tr) / w
+        else:
+            self.value = (self.value * (w - 1) + tr) / w
+        return {self.column: self.value}
+
+
+class ObvStream(IndicatorStream):
+    def __init__(self, data):
+        close = data['Close']
+        self.value = float(nk.obv(close, data['Volume'])[-1]) if len(close) else 0.0
+        self.prev_close = float(close[-1]) if len(close) else NAN
+
+    def update(self, bar):
+        volume = -bar['Volume'] if bar['Close'] < self.prev_close else bar['Volume']
+        self.prev_close = bar['Close']
+        self.value += volume
+        return {'OBV': self.value}
+
+
+class VolumeOscillatorStream(IndicatorStream):
+    def __init__(self, data, short_window=12, long_window=26):
+        self.column = f'Volume_Osc_{short_window}_{long_window}'
+        self.short = RingBuffer(short_window, data['Volume'])
+        self.long = RingBuffer(long_window, data['Volume'])
+
+    def update(self, bar):
+        self.short.append(bar['Volume'])
+        self.long.append(bar['Volume'])
+        long_vol = self.long.mean()
+        return {self.column: _div(self.short.mean() - long_vol, long_vol)}
+
+
+class CmfStream(IndicatorStream):
+    def __init__(self, data, window=20):
+        self.column = f'CMF_{window}'
+        mfv = self._mfv(data['High'], data['Low'], data['Close'], data['Volume'])
+        self.mfv = RingBuffer(window, mfv)
+        self.volume = RingBuffer(window, data['Volume'])
+
+    @staticmethod
+    def _mfv(high, low, close, volume):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mfv = ((close - low) - (high - close)) / (high - low)
+        return np.where(np.isnan(mfv), 0.0, mfv) * volume
+
+    def update(self, bar):
+        self.mfv.append(float(self._mfv(bar['High'], bar['Low'], bar['Close'], bar['Volume'])))
+        self.volume.append(bar['Volume'])
+        if not self.mfv.full:
+            return {self.column: NAN}
+        return {self.column: _div(self.mfv.total, self.volume.total)}
+
+
+class IchimokuStream(IndicatorStream):
+    def __init__(self, data, window1=9, window2=26, window3=52):
+        high, low = data['High'], data['Low']
+        self.conv = (RollingExtreme(window1, "max", history=high), RollingExtreme(window1, "min", history=low))
+        self.base = (RollingExtreme(window2, "max", history=high), RollingExtreme(window2, "min", history=low))
+        self.span_b = (
+            RollingExtreme(window3, "max", min_periods=0, history=high),
+            RollingExtreme(window3, "min", min_periods=0, history=low),
+        )
+
+    def update(self, bar):
+        values = []
+        for highest, lowest in (self.conv, self.base, self.span_b):
+            highest.append(bar['High'])
+            lowest.append(bar['Low'])
+            values.append(0.5 * (highest.value() + lowest.value()))
+        conv, base, span_b = values
+        return {
+            'Ichimoku_A': 0.5 * (conv + base),
+            'Ichimoku_B': span_b,
+            'Ichimoku_base_line': base,
+            'Ichimoku_conversion_line': conv,
+        }
+
+
+class AdxStream(IndicatorStream):
+    """
+    ADX kiểu ta: cần ít nhất 2*window+1 nến để khởi tạo trạng thái Wilder,
+    trước đó tính lại trên lịch sử ngắn (vẫn rẻ vì lịch sử còn ngắn).
+    """
+
+    def __init__(self, data, window=14):
+        self.column = f'ADX_{window}'
+        self.window = window
+        self.history = {k: list(data[k]) for k in ('High', 'Low', 'Close')}
+        self._try_warm()
+
+    def _try_warm(self):
+        w = self.window
+        if len(self.history['Close']) < 2 * w + 1:
+            self.ready = False
+            return
+        high, low, close = (np.asarray(self.history[k], dtype=np.float64) for k in ('High', 'Low', 'Close'))
+        trs, dip_s, din_s = nk.adx_smoothed(high, low, close, w)
+        # Phần tử cuối của chuỗi làm trơn chưa tính được (cần nến kế tiếp)
+        self.trs, self.dip_s, self.din_s = float(trs[-2]), float(dip_s[-2]), float(din_s[-2])
+        self.value = float(nk.adx(high, low, close, w)[-1])
+        self.prev = (float(high[-1]), float(low[-1]), float(close[-1]))
+        self.ready = True
+        self.history = None
+
+    def update(self, bar):
+        if not self.ready:
+            for k in ('High', 'Low', 'Close'):
+                self.history[k].append(bar[k])
+            self._try_warm()
+            if self.ready:
+                return {self.column: self.value}
+            high, low, close = (np.asarray(self.history[k], dtype=np.float64) for k in ('High', 'Low', 'Close'))
+            if len(close) < self.window:
+                return {self.column: NAN}
+            return {self.column: float(nk.adx(high, low, close, self.window)[-1])}
+
+        w = self.window
+        prev_high, prev_low, prev_close = self.prev
+        high, low = bar['High'], bar['Low']
+        tr = max(high, prev_close) - min(low, prev_close)
+        diff_up = high - prev_high
+        diff_down = prev_low - low
+        pos = diff_up if (diff_up > diff_down and diff_up > 0) else 0.0
+        neg = diff_down if (diff_down > diff_up and diff_down > 0) else 0.0
+        decay = 1.0 - 1.0 / w
+        self.trs = self.trs * decay + tr
+        self.dip_s = self.dip_s * decay + pos
+        self.din_s = self.din_s * decay + neg
+        dx = float(nk.directional_index(self.trs, self.dip_s, self.din_s))
+        self.value = (self.value * (w - 1) + dx) / w
+        self.prev = (high, low, bar['Close'])
+        return {self.column: self.value}
+
+
+class WilliamsRStream(IndicatorStream):
+    def __init__(self, data, lbp=14):
+        self.column = f'WilliamsR_{lbp}'
+        self.high = RollingExtreme(lbp, "max", history=data['High'])
+        self.low = RollingExtreme(lbp, "min", history=data['Low'])
+
+    def update(self, bar):
+        self.high.append(bar['High'])
+        self.low.append(bar['Low'])
+        highest, lowest = self.high.value(), self.low.value()
+        return {self.column: -100.0 * _div(highest - bar['Close'], highest - lowest)}
+
+
+class HeikinAshiStream(IndicatorStream):
+    def __init__(self, data):
+        self.ha_open = self.ha_close = NAN
+        if len(data['Close']):
+            ha_open, _, _, ha_close = nk.heikin_ashi(data['Open'], data['High'], data['Low'], data['Close'])
+            self.ha_open, self.ha_close = float(ha_open[-1]), float(ha_close[-1])
+
+    def update(self, bar):
+        if math.isnan(self.ha_open):
+            ha_open = (bar['Open'] + bar['Close']) / 2.0
+        else:
+            ha_open = (self.ha_open + self.ha_close) / 2.0
+        ha_close = (bar['Open'] + bar['High'] + bar['Low'] + bar['Close']) / 4.0
+        self.ha_open, self.ha_close = ha_open, ha_close
+        return {
+            'HA_Open': ha_open,
+            'HA_High': max(bar['High'], ha_open, ha_close),
+            'HA_Low': min(bar['Low'], ha_open, ha_close),
+            'HA_Close': ha_close,
+        }
+
+
+class FibRetracementStream(IndicatorStream):
+    constant = True
+    RATIOS = (0.0, 0.236, 0.382, 0.5, 0.618, 0.786, 1.0)
+
+    def __init__(self, data, lookback=100):
+        self.high = RollingExtreme(lookback, "max", min_periods=0, history=data['High'])
+        self.low = RollingExtreme(lookback, "min", min_periods=0, history=data['Low'])
+
+    def update(self, bar):
+        self.high.append(bar['High'])
+        self.low.append(bar['Low'])
+        max_price, min_price = self.high.value(), self.low.value()
+        diff = max_price - min_price
+        levels = {f'Fib_{r}': max_price - r * diff for r in self.RATIOS}
+        levels['Fib_1.0'] = min_price
+        return levels
+
+
+class PivotStream(IndicatorStream):
+    constant = True
+
+    def __init__(self, data, lookback=1):
+        # Pivot dùng nến thứ lookback+1 tính từ cuối
+        self.size = lookback + 1
+        self.bars = deque(
+            zip(data['High'][-self.size:], data['Low'][-self.size:], data['Close'][-self.size:]),
+            maxlen=self.size,
+        )
+
+    def update(self, bar):
+        self.bars.append((bar['High'], bar['Low'], bar['Close']))
+        if len(self.bars) < self.size:
+            return {'Pivot': NAN}
+        high, low, close = self.bars[0]
+        return {'Pivot': (high + low + close) / 3}
+
+
+STREAMS = {
+    'sma': SmaStream,
+    'ema': EmaStream,
+    'rsi': RsiStream,
+    'macd': MacdStream,
+    'stochastic': StochasticStream,
+    'cci': CciStream,
+    'bollinger_bands': BollingerStream,
+    'atr': AtrStream,
+    'obv': ObvStream,
+    'volume_oscillator': VolumeOscillatorStream,
+    'chaikin_money_flow': CmfStream,
+    'ichimoku': IchimokuStream,
+    'heikin_ashi': HeikinAshiStream,
+    'fib_retracement': FibRetracementStream,
+    'pivot_points': PivotStream,
+    'adx': AdxStream,
+    'williams_r': WilliamsRStream,
+}
+
+
+def create_stream(name, params, data):
+    """Tạo stream cho chỉ báo `name` (tên method của IndicatorsEngine) từ lịch sử `data`."""
+    if name not in STREAMS:
+        raise ValueError(f"Chỉ báo {name!r} chưa hỗ trợ streaming")
+    return STREAMS[name](data, **params)
@@ -0,0 +1,78 @@
+import numpy as np
+
+from indicators_engine.cache import IndicatorCache
+from indicators_engine.indicators_engine import IndicatorsEngine
+from testing_helpers import assert_frames_match, make_ohlcv
+
+
+def test_second_engine_hits_cache():
+    cache = IndicatorCache()
+    df = make_ohlcv(500)
+    first = IndicatorsEngine(df, cache=cache)
+    first.rsi(window=14)
+    first.macd()
+    assert cache.stats()["misses"] == 2 and cache.stats()["hits"] == 0
+
+    second = IndicatorsEngine(df, cache=cache)
+    second.rsi(window=14)
+    second.macd()
+    assert cache.stats()["hits"] == 2
+    assert_frames_match(first.get_df(), second.get_df())
+
+
+def test_key_depends_on_data_params_and_backend():
+    cache = IndicatorCache()
+    df = make_ohlcv(300)
+    IndicatorsEngine(df, cache=cache).sma(window=20)
+    IndicatorsEngine(df, cache=cache).sma(window=10)
+    IndicatorsEngine(df, backend="numpy", cache=cache).sma(window=20)
+    changed = df.copy()
+    changed.iloc[-1, changed.columns.get_loc("Close")] += 1.0
+    IndicatorsEngine(changed, cache=cache).sma(window=20)
+    assert cache.hits == 0 and cache.misses == 4
+
+
+def test_lru_eviction_respects_byte_budget():
+    df = make_ohlcv(1000)
+    column_bytes = 1000 * np.dtype(np.float64).itemsize
+    cache = IndicatorCache(max_bytes=3 * column_bytes)
+    engine = IndicatorsEngine(df, backend="numpy", cache=cache)
+    for window in (5, 10, 20):
+        engine.sma(window=window)
+    IndicatorsEngine(df, backend="numpy", cache=cache).sma(window=5)  # SMA_5 thành mới dùng nhất
+    engine.sma(window=50)  # loại SMA_10 (ít dùng gần đây nhất)
+    assert cache.nbytes <= cache.max_bytes
+    assert cache.evictions == 1
+    hits = cache.hits
+    IndicatorsEngine(df, backend="numpy", cache=cache).sma(window=5)
+    assert cache.hits == hits + 1
+    IndicatorsEngine(df, backend="numpy", cache=cache).sma(window=10)
+    assert cache.hits == hits + 1
+
+
+def test_cached_values_are_not_shared_with_df():
+    cache = IndicatorCache()
+    df = make_ohlcv(200)
+    IndicatorsEngine(df, cache=cache).sma(window=20)
+    engine = IndicatorsEngine(df, cache=cache)
+    out = engine.sma(window=20)
+    out["SMA_20"] = 0.0
+    again = IndicatorsEngine(df, cache=cache).sma(window=20)
+    assert again["SMA_20"].iloc[-1] != 0.0
+
+
+def test_cached_entry_keeps_columns_shared_with_earlier_call():
+    cache = IndicatorCache()
+    df = make_ohlcv(300)
+    engine = IndicatorsEngine(df, backend="numpy", cache=cache)
+    engine.macd(window_sign=9)
+    engine.macd(window_sign=5)  # MACD_12_26 đã có, vẫn phải được lưu cùng khóa này
+    again = IndicatorsEngine(df, backend="numpy", cache=cache, copy=False).macd(window_sign=5).get_df()
+    assert cache.hits == 1
+    assert {"MACD_12_26", "MACD_SIGNAL_12_26_5", "MACD_DIFF_12_26_5"} <= set(again.columns)
+
+
+def test_cache_disabled():
+    engine = IndicatorsEngine(make_ohlcv(100), cache=False)
+    engine.sma(window=20)
+    assert engine.cache is None
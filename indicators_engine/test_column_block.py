@@ -0,0 +1,77 @@
+import time
+import tracemalloc
+
+import pandas as pd
+
+from indicators_engine.cache import IndicatorCache
+from indicators_engine.indicators_engine import IndicatorsEngine
+from testing_helpers import assert_frames_match, compute_all, make_ohlcv
+
+
+def test_copy_free_matches_copy_mode():
+    df = make_ohlcv(1500)
+    for backend in IndicatorsEngine.BACKENDS:
+        expected = compute_all(IndicatorsEngine(df, backend=backend, cache=False))
+        actual = compute_all(IndicatorsEngine(df, backend=backend, cache=False, copy=False))
+        assert_frames_match(expected, actual)
+
+
+def test_copy_free_does_not_modify_input():
+    df = make_ohlcv(300)
+    columns = list(df.columns)
+    engine = IndicatorsEngine(df, backend="numpy", copy=False)
+    assert engine.rsi(window=14).sma(window=20) is engine
+    engine.fib_retracement()
+    assert list(df.columns) == columns
+    out = engine.get_df()
+    assert {"RSI_14", "SMA_20", "Fib_0.5"} <= set(out.columns)
+    out["RSI_14"] = 0.0
+    assert engine.get_df()["RSI_14"].iloc[-1] != 0.0
+
+
+def test_copy_free_block_grows_and_shares_cache():
+    cache = IndicatorCache()
+    df = make_ohlcv(400)
+    first = IndicatorsEngine(df, backend="numpy", cache=cache, copy=False)
+    for window in range(5, 100, 5):
+        first.sma(window=window)
+    second = IndicatorsEngine(df, backend="numpy", cache=cache)
+    for window in range(5, 100, 5):
+        second.sma(window=window)
+    assert cache.hits == 19
+    assert_frames_match(second.get_df(), first.get_df())
+
+
+def test_copy_free_multiindex_and_update():
+    df = make_ohlcv(200, seed=2)
+    df.columns = pd.MultiIndex.from_product([df.columns, ["BTC-USD"]])
+    engine = IndicatorsEngine(df.iloc[:-3], backend="numpy", copy=False)
+    engine.sma(window=20)
+    engine.add_columns(engine.ema_many(windows=(5, 10)))
+    assert ("EMA_10", "") in engine.get_df().columns
+    for _, bar in df.iloc[-3:].iterrows():
+        engine.update(bar.droplevel(1))
+    out = engine.get_df()
+    assert len(out) == len(df)
+    assert out[("SMA_20", "")].notna().iloc[-3:].all()
+
+
+def measure(df, copy):
+    tracemalloc.start()
+    start = time.perf_counter()
+    engine = IndicatorsEngine(df, backend="numpy", cache=False, copy=copy)
+    compute_all(engine)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, engine.memory_usage()
+
+
+if __name__ == "__main__":
+    # 10 năm dữ liệu 1 giờ
+    df = make_ohlcv(87600)
+    print(f"Dữ liệu gốc: {df.memory_usage(deep=True).sum() / 2**20:.1f} MB")
+    for copy in (True, False):
+        elapsed, peak, owned = measure(df, copy)
+        print(f"copy={copy!s:5}: {elapsed * 1000:.1f} ms | bộ nhớ đỉnh {peak / 2**20:.1f} MB"
+              f" | engine giữ {owned / 2**20:.1f} MB")
@@ -0,0 +1,76 @@
+import time
+
+import numpy as np
+
+from indicators_engine import graph
+from indicators_engine import numpy_kernels as nk
+from indicators_engine.indicators_engine import IndicatorsEngine
+from testing_helpers import make_ohlcv
+
+
+def test_graph_matches_kernels():
+    df = make_ohlcv(800)
+    values = {col: nk.as_array(df[col]) for col in df.columns}
+    g = graph.IndicatorGraph(values.__getitem__)
+    high, low, close = values['High'], values['Low'], values['Close']
+    pairs = [
+        (graph.macd(26, 12, 9), nk.macd(close, 26, 12, 9)),
+        (graph.stochastic(14, 3), nk.stochastic(high, low, close, 14, 3)),
+        (graph.bollinger_bands(20, 2), nk.bollinger_bands(close, 20, 2)),
+        (graph.ichimoku(), nk.ichimoku(high, low)),
+        ((graph.cci(20),), (nk.cci(high, low, close, 20),)),
+        ((graph.atr(14),), (nk.atr(high, low, close, 14),)),
+        ((graph.williams_r(14),), (nk.williams_r(high, low, close, 14),)),
+    ]
+    for nodes, expected in pairs:
+        for node, x in zip(nodes, expected):
+            np.testing.assert_array_equal(g.evaluate(node), x)
+
+
+def test_shared_intermediates_computed_once():
+    engine = IndicatorsEngine(make_ohlcv(500), backend="numpy", cache=False)
+    engine.sma(window=20)
+    engine.ema(window=12)
+    engine.ema(window=26)
+    computed = engine._graph.computed
+    engine.bollinger_bands(window=20)  # dùng lại rolling_mean(Close, 20) của SMA_20
+    assert engine._graph.computed == computed + 4
+    computed = engine._graph.computed
+    engine.macd()  # dùng lại EMA 12/26
+    assert engine._graph.computed == computed + 3
+    engine.stochastic(window=14)
+    computed = engine._graph.computed
+    engine.williams_r(lbp=14)  # dùng lại rolling max/min của Stochastic
+    assert engine._graph.computed == computed + 1
+
+
+def test_graph_reset_when_data_changes():
+    df = make_ohlcv(300, seed=7)
+    engine = IndicatorsEngine(df.iloc[:-1], backend="numpy", cache=False)
+    engine.sma(window=20)
+    engine.update(df.iloc[-1])
+    engine.get_df()
+    assert len(engine._graph) == 0
+    engine.bollinger_bands(window=20)
+    expected = IndicatorsEngine(df, backend="numpy", cache=False).bollinger_bands(window=20)
+    np.testing.assert_allclose(engine.get_df()['BB_Mavg_20'], expected['BB_Mavg_20'])
+
+
+def run_overlapping(df, share=True):
+    engine = IndicatorsEngine(df, backend="numpy", cache=False, copy=False)
+    for method, params in [('sma', {'window': 20}), ('ema', {'window': 12}), ('ema', {'window': 26}),
+                           ('macd', {}), ('bollinger_bands', {}), ('stochastic', {}), ('williams_r', {})]:
+        getattr(engine, method)(**params)
+        if not share:
+            engine._graph.clear()
+    return engine
+
+
+if __name__ == "__main__":
+    df = make_ohlcv(87600)
+    for share in (False, True):
+        start = time.perf_counter()
+        for _ in range(5):
+            run_overlapping(df, share)
+        elapsed = (time.perf_counter() - start) / 5
+        print(f"dùng chung nút trung gian={share!s:5}: {elapsed * 1000:.1f} ms")
@@ -0,0 +1,97 @@
+import time
+
+import pandas as pd
+
+from indicators_engine.indicators_engine import IndicatorsEngine
+from testing_helpers import assert_frames_match, compute_all, make_ohlcv
+
+
+def test_numpy_backend_matches_ta():
+    df = make_ohlcv(3000)
+    expected = compute_all(IndicatorsEngine(df))
+    actual = compute_all(IndicatorsEngine(df, backend="numpy"))
+    assert_frames_match(expected, actual)
+
+
+def test_numpy_backend_short_history():
+    # Lịch sử ngắn hơn cửa sổ dài nhất (Ichimoku 52) vẫn phải khớp
+    df = make_ohlcv(60, seed=1)
+    expected = compute_all(IndicatorsEngine(df))
+    actual = compute_all(IndicatorsEngine(df, backend="numpy"))
+    assert_frames_match(expected, actual)
+
+
+def test_unknown_backend_raises():
+    try:
+        IndicatorsEngine(make_ohlcv(10), backend="cuda")
+    except ValueError:
+        return
+    raise AssertionError("backend không hợp lệ phải báo lỗi")
+
+
+def test_many_windows_match_single_window():
+    df = make_ohlcv(1500, seed=2)
+    windows = [5, 10, 14, 20, 50, 100]
+    engine = IndicatorsEngine(df, backend="numpy")
+    reference = IndicatorsEngine(df)
+    cases = [
+        (engine.sma_many, reference.sma, "SMA", "window"),
+        (engine.ema_many, reference.ema, "EMA", "window"),
+        (engine.rsi_many, reference.rsi, "RSI", "window"),
+        (engine.atr_many, reference.atr, "ATR", "window"),
+        (engine.cci_many, reference.cci, "CCI", "window"),
+        (engine.williams_r_many, reference.williams_r, "WilliamsR", "lbp"),
+    ]
+    for many, single, prefix, arg in cases:
+        block = many(windows=windows)
+        assert block.shape == (len(df), len(windows))
+        for w in windows:
+            single(**{arg: w})
+        expected = reference.get_df()[[f"{prefix}_{w}" for w in windows]]
+        assert_frames_match(expected, block)
+
+
+def test_add_columns_multiindex():
+    df = make_ohlcv(200)
+    df.columns = pd.MultiIndex.from_product([df.columns, ["BTC-USD"]])
+    engine = IndicatorsEngine(df, backend="numpy")
+    out = engine.add_columns(engine.sma_many(windows=[5, 10]))
+    assert ("SMA_5", "") in out.columns and ("SMA_10", "") in out.columns
+
+
+def benchmark_backends(df, repeat=3):
+    """Trả về (thời gian ta, thời gian numpy) tốt nhất sau `repeat` lần chạy."""
+    timings = {}
+    for backend in IndicatorsEngine.BACKENDS:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            compute_all(IndicatorsEngine(df, backend=backend, cache=False))
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[backend] = best
+    return timings["ta"], timings["numpy"]
+
+
+def benchmark_many(df, windows=range(5, 105, 5), backend="numpy"):
+    """Quét SMA/RSI theo từng cửa sổ so với *_many (một lần tính)."""
+    engine = IndicatorsEngine(df, backend=backend, cache=False)
+    start = time.perf_counter()
+    for w in windows:
+        engine.sma(window=w)
+        engine.rsi(window=w)
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    engine.sma_many(windows=windows)
+    engine.rsi_many(windows=windows)
+    return loop_time, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    for backend in IndicatorsEngine.BACKENDS:
+        loop_time, many_time = benchmark_many(make_ohlcv(87600), backend=backend)
+        print(f"SMA+RSI 20 cửa sổ ({backend}): từng cửa sổ={loop_time * 1000:.1f} ms | *_many={many_time * 1000:.1f} ms")
+    # So sánh tốc độ chỉ chạy ở đây, không chạy trong pytest (thời gian phụ thuộc tải của máy)
+    for n in (1000, 5000, 10000, 87600):
+        ta_time, np_time = benchmark_backends(make_ohlcv(n))
+        print(f"{n:>6} nến: ta={ta_time * 1000:8.1f} ms | numpy={np_time * 1000:7.1f} ms | x{ta_time / np_time:.1f}")
@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from indicators_engine.indicators_engine import IndicatorsEngine
+from indicators_engine.panel import PanelIndicatorsEngine
+from testing_helpers import assert_frames_match, compute_all, make_ohlcv
+
+
+def make_panel(n=500, n_assets=4):
+    """DataFrame cột MultiIndex (trường, coin) giống yf.download(symbols)."""
+    frames = {f"COIN{j}-USD": make_ohlcv(n, seed=j) for j in range(n_assets)}
+    df = pd.concat(frames, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
+    df.columns.names = ["Price", "Ticker"]
+    return df
+
+
+def compute_panel(panel):
+    return compute_all(panel.fib_retracement().pivot_points().heikin_ashi())
+
+
+def test_panel_matches_single_coin_engine():
+    df = make_panel()
+    panel = PanelIndicatorsEngine(df)
+    compute_panel(panel)
+    for symbol in panel.symbols:
+        df_coin = df.xs(symbol, axis=1, level=1)
+        expected = IndicatorsEngine(df_coin, backend="numpy", cache=False)
+        expected.fib_retracement()
+        expected.pivot_points()
+        expected.heikin_ashi()
+        compute_all(expected)
+        actual = panel.coin_df(symbol)
+        assert_frames_match(expected.get_df()[actual.columns], actual)
+
+
+def test_panel_from_field_dict_and_get():
+    df = make_panel(300, 3)
+    fields = {field: df[field] for field in ("High", "Low", "Close")}
+    panel = PanelIndicatorsEngine(fields, symbols=["COIN2-USD", "COIN0-USD"]).rsi(window=14).atr(window=14)
+    rsi = panel.get("RSI_14")
+    assert list(rsi.columns) == ["COIN2-USD", "COIN0-USD"]
+    expected = IndicatorsEngine(df.xs("COIN2-USD", axis=1, level=1), backend="numpy").rsi(window=14)
+    np.testing.assert_allclose(rsi["COIN2-USD"], expected["RSI_14"])
+    out = panel.get_df()
+    assert ("ATR_14", "COIN0-USD") in out.columns and ("Close", "COIN2-USD") in out.columns
+
+
+def benchmark(n_bars, n_assets):
+    df = make_panel(n_bars, n_assets)
+    start = time.perf_counter()
+    compute_all(PanelIndicatorsEngine(df))
+    panel_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for symbol in df.columns.get_level_values(1).unique():
+        compute_all(IndicatorsEngine(df.xs(symbol, axis=1, level=1), backend="numpy", cache=False, copy=False))
+    loop_time = time.perf_counter() - start
+    print(f"{n_assets} coin × {n_bars} nến: panel {panel_time:.2f} s | từng coin {loop_time:.2f} s"
+          f" | nhanh hơn {loop_time / panel_time:.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark(365, 300)    # 1 năm dữ liệu ngày
+    benchmark(8760, 100)   # 1 năm dữ liệu giờ
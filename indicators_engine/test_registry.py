@@ -0,0 +1,74 @@
+import time
+
+import numpy as np
+import pytest
+
+from indicators_engine import registry
+from indicators_engine.indicators_engine import IndicatorsEngine
+from testing_helpers import make_ohlcv
+
+PARAMS = {"SMA": 10, "EMA": 12, "RSI": 7, "MACD_fast": 8, "MACD_slow": 21, "BB": 14, "ATR": 7, "CCI": 14,
+          "Stochastic": 9, "ADX": 10, "WilliamsR": 11, "CMF": 15}
+
+
+class RecordingEngine:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, method):
+        return lambda **kwargs: self.calls.append((method, kwargs))
+
+
+@pytest.mark.parametrize("name", sorted(registry.INDICATORS))
+def test_output_columns_match_engine(name):
+    engine = IndicatorsEngine(make_ohlcv(300), backend="numpy", cache=False)
+    before = set(engine.df.columns)
+    registry.run_plan(engine, registry.compile_plan([name]), PARAMS)
+    assert set(engine.df.columns) - before == set(registry.output_columns(name, PARAMS))
+
+
+@pytest.mark.parametrize("name", sorted(n for n, spec in registry.INDICATORS.items() if spec.sweep))
+def test_sweep_columns_match_outputs(name):
+    spec = registry.get_spec(name)
+    engine = IndicatorsEngine(make_ohlcv(300), backend="numpy", cache=False)
+    block = getattr(engine, spec.sweep)([7, 9])
+    key = spec.params[0][1]
+    assert list(block.columns) == [registry.output_columns(name, {key: w})[0] for w in (7, 9)]
+    for column, w in zip(block.columns, (7, 9)):
+        registry.run_plan(engine, registry.compile_plan([name]), {key: w})
+        np.testing.assert_allclose(block[column], engine.df[column], rtol=1e-9)
+
+
+def test_compile_plan_validates_up_front():
+    with pytest.raises(ValueError, match="BB"):
+        registry.compile_plan(["RSI", "Bollinger Bands"], {"RSI": [7, 14]})
+    with pytest.raises(ValueError, match="chưa được đăng ký"):
+        registry.compile_plan(["Unknown"])
+    # MACD có giá trị mặc định cho mọi tham số
+    plan = registry.compile_plan(["MACD"], {"MACD_fast": [8]})
+    engine = RecordingEngine()
+    registry.run_plan(engine, plan, {"MACD_fast": 8})
+    assert engine.calls == [("macd", {"window_fast": 8, "window_slow": 26, "window_sign": 9})]
+
+
+def test_register_custom_indicator():
+    registry.register("Fast SMA", "sma", [("window", "fast", 5)], ["SMA_{window}"])
+    try:
+        engine = RecordingEngine()
+        registry.run_plan(engine, registry.compile_plan(["Fast SMA", "RSI"]), {"RSI": 14})
+        assert engine.calls == [("sma", {"window": 5}), ("rsi", {"window": 14})]
+        assert registry.output_columns("Fast SMA", {"fast": 3}) == ["SMA_3"]
+    finally:
+        del registry.INDICATORS["Fast SMA"]
+
+
+if __name__ == "__main__":
+    names = ["SMA", "EMA", "MACD", "RSI", "Bollinger Bands", "ATR", "CCI", "Stochastic", "ADX", "Williams %R"]
+    plan = registry.compile_plan(names, PARAMS)
+    engine = RecordingEngine()
+    n = 100000
+    start = time.perf_counter()
+    for _ in range(n):
+        registry.run_plan(engine, plan, PARAMS)
+        engine.calls.clear()
+    print(f"run_plan {len(names)} chỉ báo: {(time.perf_counter() - start) / n * 1e6:.1f} µs/lần thử")
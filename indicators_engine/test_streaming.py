@@ -0,0 +1,88 @@
+import time
+
+import pandas as pd
+
+from indicators_engine.indicators_engine import IndicatorsEngine
+from testing_helpers import assert_frames_match, compute_all, make_ohlcv
+
+
+def compute_streamable(engine):
+    compute_all(engine)
+    engine.fib_retracement()
+    engine.pivot_points()
+    if engine.backend == "numpy":
+        engine.heikin_ashi()
+    return engine.get_df()
+
+
+def stream_from(df, history, backend="numpy"):
+    engine = IndicatorsEngine(df.iloc[:history], backend=backend)
+    compute_streamable(engine)
+    for _, bar in df.iloc[history:].iterrows():
+        engine.update(bar)
+    return engine
+
+
+def test_update_matches_full_recompute():
+    df = make_ohlcv(600, seed=3)
+    for backend in IndicatorsEngine.BACKENDS:
+        expected = compute_streamable(IndicatorsEngine(df, backend=backend))
+        # 28 nến: ADX chưa đủ 2*window+1 nến để khởi tạo trạng thái Wilder
+        for history in (28, 60, 400):
+            assert_frames_match(expected, stream_from(df, history, backend).get_df())
+
+
+def test_update_returns_latest_values():
+    df = make_ohlcv(300, seed=4)
+    engine = IndicatorsEngine(df.iloc[:-1], backend="numpy")
+    engine.rsi(window=14)
+    engine.sma(window=20)
+    values = engine.update(df.iloc[-1])
+    assert set(values) == {"RSI_14", "SMA_20"}
+    expected = IndicatorsEngine(df, backend="numpy")
+    expected.rsi(window=14)
+    assert abs(values["RSI_14"] - expected.get_df()["RSI_14"].iloc[-1]) < 1e-9
+    assert engine.get_df().index[-1] == df.index[-1]
+
+
+def test_indicator_added_after_updates():
+    df = make_ohlcv(300, seed=5)
+    engine = IndicatorsEngine(df.iloc[:200], backend="numpy")
+    engine.ema(window=10)
+    for _, bar in df.iloc[200:250].iterrows():
+        engine.update(bar)
+    engine.atr(window=14)
+    for _, bar in df.iloc[250:].iterrows():
+        engine.update(bar)
+    expected = IndicatorsEngine(df, backend="numpy")
+    expected.ema(window=10)
+    expected.atr(window=14)
+    assert_frames_match(expected.get_df(), engine.get_df())
+
+
+def test_update_multiindex_columns():
+    df = make_ohlcv(200, seed=6)
+    df.columns = pd.MultiIndex.from_product([df.columns, ["BTC-USD"]])
+    engine = IndicatorsEngine(df.iloc[:-5], backend="numpy")
+    engine.sma(window=20)
+    for _, bar in df.iloc[-5:].iterrows():
+        engine.update(bar.droplevel(1))
+    out = engine.get_df()
+    assert len(out) == len(df)
+    assert out[("SMA_20", "")].notna().iloc[-5:].all()
+
+
+if __name__ == "__main__":
+    df = make_ohlcv(87600 + 100)
+    engine = IndicatorsEngine(df.iloc[:87600], backend="numpy")
+    compute_all(engine)
+    bars = [bar for _, bar in df.iloc[87600:].iterrows()]
+    engine.update(bars[0])
+    start = time.perf_counter()
+    for bar in bars[1:]:
+        engine.update(bar)
+    per_bar = (time.perf_counter() - start) / (len(bars) - 1)
+    start = time.perf_counter()
+    compute_all(IndicatorsEngine(df, backend="numpy"))
+    full = time.perf_counter() - start
+    print(f"update(): {per_bar * 1000:.3f} ms/nến | tính lại toàn bộ: {full * 1000:.1f} ms")
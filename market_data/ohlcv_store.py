@@ -0,0 +1,197 @@
+"""
+Kho nến OHLCV trên đĩa: mỗi (mã, khung thời gian) một file .npy, chỉ tải phần đuôi còn thiếu.
+
+Mỗi file là một mảng NumPy có cấu trúc (CANDLE_DTYPE: thời gian UTC dạng int64 nano giây và
+Open/High/Low/Close/Volume), đọc bằng np.load rất nhanh và không cần thư viện Parquet.
+- Lần đầu tải toàn bộ lịch sử yfinance cho phép với khung thời gian đó (MAX_PERIODS).
+- Các lần sau chỉ tải từ nến cuối đã lưu (nến cuối có thể chưa đóng nên được tải lại và ghi đè),
+  và chỉ khi file đã cũ hơn max_age giây; trong khoảng đó mọi lần đọc lấy từ đĩa.
+- Ghi file tạm rồi os.replace: người đọc khác (process Streamlit, JobRunner) không thấy file dở.
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+CANDLE_DTYPE = np.dtype([("time", np.int64)] + [(field, np.float64) for field in FIELDS])
+
+# Lịch sử tối đa yfinance trả về cho từng khung thời gian (khung khác: "max")
+MAX_PERIODS = {"1m": "7d", "2m": "60d", "5m": "60d", "15m": "60d", "30m": "60d", "60m": "730d",
+               "90m": "60d", "1h": "730d"}
+
+# Độ dài period kiểu yfinance (Ticker.history(period=...))
+_PERIOD_OFFSETS = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+
+DEFAULT_ROOT = os.environ.get("OHLCV_STORE_DIR", str(Path(__file__).resolve().parents[1] / "data" / "ohlcv"))
+
+
+def yfinance_fetcher(symbol, interval, start=None, period=None):
+    """Tải nến từ yfinance: từ start (Timestamp UTC) tới hiện tại, hoặc theo period."""
+    import yfinance as yf
+
+    ticker = yf.Ticker(symbol)
+    if start is not None:
+        return ticker.history(start=start, interval=interval)
+    return ticker.history(period=period, interval=interval)
+
+
+def period_start(period, end):
+    """Thời điểm bắt đầu của period ("1mo", "1y", "ytd", "max"...) tính lùi từ end; "max": None."""
+    if period in (None, "max"):
+        return None
+    if period == "ytd":
+        return end.normalize().replace(month=1, day=1)
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if match is None:
+        raise ValueError(f"period không hợp lệ: {period!r}")
+    return end - pd.DateOffset(**{_PERIOD_OFFSETS[match.group(2)]: int(match.group(1))})
+
+
+def to_records(df):
+    """DataFrame OHLCV (index thời gian) -> mảng CANDLE_DTYPE sắp theo thời gian."""
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    records = np.empty(len(df), dtype=CANDLE_DTYPE)
+    records["time"] = index.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    for field in FIELDS:
+        records[field] = df[field].to_numpy(dtype=np.float64) if field in df else np.nan
+    return records[np.argsort(records["time"], kind="stable")]
+
+
+def to_frame(records):
+    """Mảng CANDLE_DTYPE -> DataFrame OHLCV, index DatetimeIndex UTC như Ticker.history."""
+    index = pd.DatetimeIndex(pd.to_datetime(records["time"], utc=True), name="Date")
+    return pd.DataFrame({field: records[field] for field in FIELDS}, index=index)
+
+
+class OHLCVStore:
+    def __init__(self, root=DEFAULT_ROOT, fetcher=yfinance_fetcher, max_age=60, max_workers=8):
+        """
+        root: thư mục chứa file (root/<interval>/<mã>.npy); mặc định data/ohlcv hoặc biến môi trường
+              OHLCV_STORE_DIR
+        fetcher: hàm fetcher(symbol, interval, start=None, period=None) trả về DataFrame OHLCV
+        max_age: số giây một file được coi là mới, không tải lại (None: không bao giờ tải lại)
+        max_workers: số luồng tải song song trong refresh/download
+        """
+        self.root = Path(root)
+        self.fetcher = fetcher
+        self.max_age = max_age
+        self.max_workers = max_workers
+
+    def path(self, symbol, interval="1d"):
+        return self.root / interval / f"{re.sub(r'[^A-Za-z0-9._^=-]', '_', symbol)}.npy"
+
+    def load(self, symbol, interval="1d"):
+        """Mảng CANDLE_DTYPE đã lưu (rỗng nếu chưa có), không tải mạng."""
+        path = self.path(symbol, interval)
+        if not path.exists():
+            return np.empty(0, dtype=CANDLE_DTYPE)
+        return np.load(path, allow_pickle=False)
+
+    def is_fresh(self, symbol, interval="1d"):
+        path = self.path(symbol, interval)
+        if not path.exists():
+            return False
+        if self.max_age is None:
+            return True
+        return pd.Timestamp.now().timestamp() - path.stat().st_mtime < self.max_age
+
+    def update(self, symbol, interval="1d"):
+        """
+        Tải phần đuôi còn thiếu và ghi vào file. Trả về số nến mới tải (kể cả nến cuối tải lại).
+        """
+        stored = self.load(symbol, interval)
+        if len(stored):
+            start = pd.Timestamp(int(stored["time"][-1]), tz="UTC")
+            fetched = self.fetcher(symbol, interval, start=start)
+        else:
+            fetched = self.fetcher(symbol, interval, period=MAX_PERIODS.get(interval, "max"))
+        new = to_records(fetched) if fetched is not None and len(fetched) else stored[:0]
+        if len(new):
+            # Nến đã lưu từ nến mới đầu tiên trở đi được thay bằng dữ liệu mới
+            stored = np.concatenate([stored[stored["time"] < new["time"][0]], new])
+        self._save(symbol, interval, stored)
+        return len(new)
+
+    def refresh(self, symbols, interval="1d"):
+        """update song song các mã đã cũ hơn max_age; trả về dict {mã: lỗi} của các mã tải lỗi."""
+        stale = [symbol for symbol in dict.fromkeys(symbols) if not self.is_fresh(symbol, interval)]
+        errors = {}
+
+        def run(symbol):
+            try:
+                self.update(symbol, interval)
+            except Exception as e:
+                errors[symbol] = e
+
+        if len(stale) <= 1 or self.max_workers <= 1:
+            for symbol in stale:
+                run(symbol)
+        else:
+            with ThreadPoolExecutor(min(self.max_workers, len(stale))) as pool:
+                list(pool.map(run, stale))
+        return errors
+
+    def history(self, symbol, period="1mo", interval="1d"):
+        """
+        Nến của period gần nhất như yf.Ticker(symbol).history(period, interval): tải đuôi nếu file
+        đã cũ, đọc từ đĩa. Tải lỗi mà đã có dữ liệu thì trả về dữ liệu đã lưu.
+        """
+        error = self.refresh([symbol], interval).get(symbol)
+        records = self.load(symbol, interval)
+        if error is not None and not len(records):
+            raise error
+        return self._slice(to_frame(records), period)
+
+    def download(self, symbols, period="1y", interval="1d"):
+        """
+        Nhiều mã cùng lúc như yf.download(symbols, period, interval): cột MultiIndex (trường, mã),
+        căn theo hợp các index thời gian. Mã tải lỗi và chưa có dữ liệu bị bỏ qua.
+        """
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        self.refresh(symbols, interval)
+        frames = {symbol: to_frame(self.load(symbol, interval)) for symbol in symbols}
+        frames = {symbol: frame for symbol, frame in frames.items() if len(frame)}
+        if not frames:
+            return pd.DataFrame(columns=pd.MultiIndex.from_product([FIELDS, symbols], names=["Price", "Ticker"]))
+        data = pd.concat(frames, axis=1, sort=True).swaplevel(axis=1)
+        data = data.reindex(columns=pd.MultiIndex.from_product([FIELDS, list(frames)], names=["Price", "Ticker"]))
+        return self._slice(data, period)
+
+    def last_price(self, symbol, interval="1d"):
+        """Giá Close của nến mới nhất (0 nếu không có dữ liệu)."""
+        close = self.history(symbol, "max", interval)["Close"].dropna()
+        return float(close.iloc[-1]) if len(close) else 0.0
+
+    @staticmethod
+    def _slice(df, period):
+        if not len(df):
+            return df
+        start = period_start(period, df.index[-1])
+        return df if start is None else df[df.index > start]
+
+    def _save(self, symbol, interval, records):
+        path = self.path(symbol, interval)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npy")
+        np.save(tmp, records, allow_pickle=False)
+        os.replace(tmp, path)
+
+
+_default_store = None
+
+
+def get_store():
+    """OHLCVStore dùng chung của ứng dụng (thư mục mặc định, tải qua yfinance)."""
+    global _default_store
+    if _default_store is None:
+        _default_store = OHLCVStore()
+    return _default_store
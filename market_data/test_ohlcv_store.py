@@ -0,0 +1,132 @@
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from market_data.ohlcv_store import CANDLE_DTYPE, FIELDS, OHLCVStore
+
+
+class FakeExchange:
+    """Nguồn nến giả cho mọi mã: ghi lại các lần tải và số nến đã trả về."""
+
+    def __init__(self, n=1000, freq="D", seed=0):
+        self.freq = freq
+        self.rng = np.random.default_rng(seed)
+        self.index = pd.date_range("2020-01-01", periods=n, freq=freq, tz="UTC")
+        self.data = {}
+        self.calls = []
+        self.rows = 0
+
+    def frame(self, symbol):
+        if symbol not in self.data:
+            close = 100 * np.exp(np.cumsum(self.rng.normal(0, 0.02, len(self.index))))
+            self.data[symbol] = pd.DataFrame({"Open": close, "High": close * 1.01, "Low": close * 0.99,
+                                              "Close": close, "Volume": 1e6}, index=self.index)
+        return self.data[symbol].reindex(self.index)
+
+    def tick(self, close):
+        """Nến cuối thay đổi (chưa đóng) rồi thêm một nến mới."""
+        for frame in self.data.values():
+            frame.iloc[-1, frame.columns.get_loc("Close")] = close
+        self.index = self.index.append(pd.DatetimeIndex([self.index[-1] + pd.Timedelta(1, self.freq)]))
+        for symbol in self.data:
+            self.data[symbol] = self.data[symbol].reindex(self.index).ffill()
+
+    def __call__(self, symbol, interval, start=None, period=None):
+        if symbol.startswith("BAD"):
+            raise ConnectionError(symbol)
+        self.calls.append((symbol, interval, start, period))
+        df = self.frame(symbol)
+        if start is not None:
+            df = df[df.index >= start]
+        self.rows += len(df)
+        return df
+
+
+def make_store(root, exchange, **kwargs):
+    return OHLCVStore(root, fetcher=exchange, **kwargs)
+
+
+def test_history_fetches_once_then_reads_disk(tmp_path):
+    exchange = FakeExchange()
+    store = make_store(tmp_path, exchange)
+    df = store.history("BTC-USD", period="1mo")
+    assert exchange.calls == [("BTC-USD", "1d", None, "max")]
+    assert df.index[0] > exchange.index[-1] - pd.DateOffset(months=1)
+    assert df.index[-1] == exchange.index[-1]
+    assert np.allclose(df["Close"], exchange.frame("BTC-USD")["Close"].loc[df.index])
+    assert store.load("BTC-USD").dtype == CANDLE_DTYPE
+    # Trong max_age: không tải lại
+    full = store.history("BTC-USD", period="max")
+    assert len(exchange.calls) == 1 and len(full) == len(exchange.index)
+
+
+def test_update_fetches_only_tail_and_replaces_last_bar(tmp_path):
+    exchange = FakeExchange(500)
+    store = make_store(tmp_path, exchange, max_age=0)
+    store.history("ETH-USD", period="max")
+    last = exchange.index[-1]
+    exchange.tick(close=123.0)
+    rows = exchange.rows
+    df = store.history("ETH-USD", period="max")
+    assert exchange.calls[-1][2] == last
+    # Chỉ tải nến cuối đã lưu (tải lại) và nến mới
+    assert exchange.rows - rows == 2
+    assert len(df) == len(exchange.index) == 501
+    assert df["Close"].loc[last] == 123.0
+    assert df.index.is_unique and df.index.is_monotonic_increasing
+
+
+def test_download_matches_yfinance_layout(tmp_path):
+    exchange = FakeExchange(300)
+    store = make_store(tmp_path, exchange)
+    symbols = ["BTC-USD", "ETH-USD", "SOL-USD"]
+    data = store.download(symbols, period="3mo")
+    assert data.columns.names == ["Price", "Ticker"]
+    assert set(data.columns.get_level_values(0)) == set(FIELDS)
+    assert list(data["Close"].columns) == symbols
+    assert len({call[0] for call in exchange.calls}) == 3
+    for symbol in symbols:
+        pd.testing.assert_series_equal(data["Close"][symbol], store.history(symbol, "3mo")["Close"],
+                                       check_names=False, check_freq=False)
+    assert len(exchange.calls) == 3
+    assert store.last_price("SOL-USD") == exchange.frame("SOL-USD")["Close"].iloc[-1]
+
+
+def test_intraday_and_errors(tmp_path):
+    exchange = FakeExchange(200, freq="h")
+    store = make_store(tmp_path, exchange, max_age=0)
+    assert store.history("BTC-USD", period="5d", interval="1h").index.freq is None
+    assert exchange.calls[0][3] == "730d"
+    assert store.path("BTC-USD", "1h").exists()
+    with pytest.raises(ConnectionError):
+        store.history("BAD-USD")
+    data = store.download(["BTC-USD", "BAD-USD"], interval="1h")
+    assert list(data["Close"].columns) == ["BTC-USD"]
+    # Đã có dữ liệu thì tải lỗi vẫn đọc được từ đĩa
+    store.fetcher = lambda *args, **kwargs: (_ for _ in ()).throw(ConnectionError())
+    assert len(store.history("BTC-USD", "max", "1h")) == 200
+    with pytest.raises(ValueError):
+        store.history("BTC-USD", period="3 months", interval="1h")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as root:
+        symbols = [f"COIN{j}-USD" for j in range(300)]
+        exchange = FakeExchange(365 * 5)
+        store = make_store(root, exchange, max_age=0)
+        start = time.perf_counter()
+        store.download(symbols, period="1y")
+        print(f"300 mã × 5 năm nến ngày, lần đầu: {time.perf_counter() - start:.2f}s, {exchange.rows} nến tải")
+        exchange.tick(close=1.0)
+        rows = exchange.rows
+        start = time.perf_counter()
+        store.download(symbols, period="1y")
+        print(f"làm mới cả universe: {time.perf_counter() - start:.2f}s, {exchange.rows - rows} nến tải "
+              f"({(exchange.rows - rows) * CANDLE_DTYPE.itemsize / 1024:.0f} KB)")
+        store.max_age = 3600
+        start = time.perf_counter()
+        store.download(symbols, period="1y")
+        print(f"đọc từ đĩa (không tải): {time.perf_counter() - start:.2f}s")
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import yfinance as yf
+from market_data.ohlcv_store import get_store
 from datetime import datetime, timedelta
 import time
 
@@ -48,8 +48,7 @@ def show_price_alerts_section():
             
             # Get current price
             try:
-                ticker = yf.Ticker(selected_coin)
-                current_price = ticker.history(period="1d")['Close'].iloc[-1]
+                current_price = get_store().last_price(selected_coin)
                 st.metric("Current Price", f"${current_price:,.2f}")
             except:
                 current_price = 50000  # Default fallback
@@ -155,8 +154,7 @@ def show_technical_alerts_section():
     tech_data = []
     for coin in ['BTC-USD', 'ETH-USD', 'BNB-USD']:
         try:
-            ticker = yf.Ticker(coin)
-            df = ticker.history(period="1mo")
+            df = get_store().history(coin, period="1mo")
             
             if not df.empty:
                 current_price = df['Close'].iloc[-1]
@@ -321,8 +319,7 @@ def create_alert(coin, alert_type, target_value, notification_methods):
     
     try:
         # Get current price for validation
-        ticker = yf.Ticker(coin)
-        current_price = ticker.history(period="1d")['Close'].iloc[-1]
+        current_price = get_store().last_price(coin)
         
         # Create alert object
         alert = {
@@ -1,5 +1,5 @@
 import streamlit as st
-import yfinance as yf
+from market_data.ohlcv_store import get_store
 import plotly.graph_objs as go
 from plotly.subplots import make_subplots
 import pandas as pd
@@ -11,7 +11,7 @@ def show_indicators_engine_dashboard():
     symbol = st.text_input("Nhập mã coin (ví dụ: BTC-USD)", "BTC-USD")
     period = st.selectbox("Chọn khung thời gian", ["1mo", "3mo", "6mo", "1y"], index=2)
 
-    df = yf.download(symbol, period=period, interval="1d")
+    df = get_store().download(symbol, period=period, interval="1d")
     if df.empty:
         st.warning("Không lấy được dữ liệu.")
         st.stop()
@@ -429,8 +429,7 @@ def get_technical_signals(coin, timeframe):
         ticker = ticker_map.get(coin, f'{coin}-USD')
         
         # Get data from yfinance
-        stock = yf.Ticker(ticker)
-        df = stock.history(period=timeframe)
+        df = get_store().history(ticker, period=timeframe)
         
         if df.empty:
             return {
@@ -520,8 +519,7 @@ def create_technical_chart(coin, timeframe):
         ticker = ticker_map.get(coin, f'{coin}-USD')
         
         # Get data
-        stock = yf.Ticker(ticker)
-        df = stock.history(period=timeframe)
+        df = get_store().history(ticker, period=timeframe)
         
         if df.empty:
             return None
@@ -4,7 +4,7 @@ import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 import sqlite3
-import yfinance as yf
+from market_data.ohlcv_store import get_store
 from datetime import datetime, timedelta
 import numpy as np
 from typing import Dict, List, Optional, Tuple
@@ -214,12 +214,7 @@ class PortfolioTracker:
         """Get current price for a cryptocurrency"""
         try:
             ticker = f"{symbol}-USD"
-            stock = yf.Ticker(ticker)
-            data = stock.history(period="1d")
-            
-            if not data.empty:
-                return float(data['Close'].iloc[-1])
-            return 0
+            return get_store().last_price(ticker)
             
         except Exception as e:
             st.error(f"❌ Error getting price for {symbol}: {str(e)}")
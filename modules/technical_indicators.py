@@ -3,7 +3,7 @@ import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
-import yfinance as yf
+from market_data.ohlcv_store import get_store
 from datetime import datetime, timedelta
 
 def show_technical_dashboard():
@@ -160,8 +160,7 @@ def get_technical_signals(coin, timeframe):
         ticker = ticker_map.get(coin, f'{coin}-USD')
         
         # Get data from yfinance
-        stock = yf.Ticker(ticker)
-        df = stock.history(period=timeframe)
+        df = get_store().history(ticker, period=timeframe)
         
         if df.empty:
             return {
@@ -249,8 +248,7 @@ def create_technical_chart(coin, timeframe):
         ticker = ticker_map.get(coin, f'{coin}-USD')
         
         # Get data
-        stock = yf.Ticker(ticker)
-        df = stock.history(period=timeframe)
+        df = get_store().history(ticker, period=timeframe)
         
         if df.empty:
             return None
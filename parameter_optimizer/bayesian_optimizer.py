@@ -0,0 +1,93 @@
+"""
+Tối ưu Bayes cho ParameterOptimizer: Gaussian process (scikit-learn) làm mô hình thay thế,
+chọn tổ hợp tiếp theo bằng Expected Improvement trên lưới tham số rời rạc param_ranges.
+
+Mỗi tham số được mã hóa bằng vị trí của giá trị trong dải (chuẩn hóa về [0, 1]), nên
+dùng được cho cả dải không đều như [5, 10, 20, 50].
+"""
+
+import itertools
+import math
+import warnings
+
+import numpy as np
+from scipy.stats import norm
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import ConstantKernel, Matern, WhiteKernel
+
+# Lưới lớn hơn thì mỗi vòng chỉ xét một mẫu ngẫu nhiên các tổ hợp chưa thử
+MAX_CANDIDATES = 20000
+
+
+class BayesianSearch:
+    def __init__(self, param_ranges, n_initial=5, xi=0.01, seed=None):
+        """
+        param_ranges: dict {tên tham số: danh sách giá trị} như ParameterOptimizer
+        n_initial: số tổ hợp ngẫu nhiên ban đầu trước khi dùng mô hình
+        xi: mức cải thiện tối thiểu (theo độ lệch chuẩn của điểm) trong Expected Improvement
+        seed: seed của bộ sinh ngẫu nhiên
+        """
+        self.keys = list(param_ranges)
+        self.values = [list(param_ranges[k]) for k in self.keys]
+        self.sizes = np.array([len(v) for v in self.values])
+        self.total = math.prod(len(v) for v in self.values)
+        self.n_initial = n_initial
+        self.xi = xi
+        self.rng = np.random.default_rng(seed)
+        self.seen = set()
+        self.X = []
+        self.y = []
+
+    def params(self, idx):
+        return {k: values[i] for k, values, i in zip(self.keys, self.values, idx)}
+
+    def _coords(self, indices):
+        indices = np.atleast_2d(np.asarray(indices, dtype=np.float64))
+        return indices / np.maximum(self.sizes - 1, 1)
+
+    def _random_indices(self, count):
+        return [tuple(int(i) for i in row) for row in self.rng.integers(0, self.sizes, size=(count, len(self.sizes)))]
+
+    def _candidates(self):
+        if self.total <= MAX_CANDIDATES:
+            candidates = itertools.product(*[range(size) for size in self.sizes])
+        else:
+            candidates = self._random_indices(MAX_CANDIDATES)
+        return [idx for idx in dict.fromkeys(candidates) if idx not in self.seen]
+
+    def initial(self):
+        """n_initial tổ hợp ngẫu nhiên khác nhau."""
+        count = min(self.n_initial, self.total)
+        chosen = []
+        while len(chosen) < count:
+            for idx in self._random_indices(count):
+                if idx not in self.seen and idx not in chosen and len(chosen) < count:
+                    chosen.append(idx)
+        return chosen
+
+    def suggest(self):
+        """Tổ hợp chưa thử có Expected Improvement lớn nhất."""
+        candidates = self._candidates()
+        if len(self.y) < 2 or np.ptp(self.y) == 0:
+            return candidates[self.rng.integers(len(candidates))]
+        kernel = ConstantKernel(1.0) * Matern(length_scale=np.full(len(self.keys), 0.3), nu=2.5) + WhiteKernel(1e-3)
+        gp = GaussianProcessRegressor(kernel=kernel, normalize_y=True, random_state=0)
+        with warnings.catch_warnings():
+            # Cảnh báo hội tụ của bộ tối ưu siêu tham số kernel không ảnh hưởng kết quả
+            warnings.simplefilter("ignore")
+            gp.fit(self._coords(self.X), np.asarray(self.y))
+        mu, sigma = gp.predict(self._coords(candidates), return_std=True)
+        improvement = mu - max(self.y) - self.xi * np.std(self.y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = np.where(sigma > 0, improvement / sigma, 0.0)
+        ei = np.where(sigma > 0, improvement * norm.cdf(z) + sigma * norm.pdf(z), 0.0)
+        return candidates[int(np.argmax(ei))]
+
+    def observe(self, idx, score):
+        score = float(score)
+        if not np.isfinite(score):
+            # Điểm lỗi (NaN/inf) được coi như kém nhất đã thấy
+            score = min(self.y) if self.y else 0.0
+        self.seen.add(idx)
+        self.X.append(idx)
+        self.y.append(score)
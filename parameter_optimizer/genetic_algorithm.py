@@ -0,0 +1,86 @@
+"""
+Thuật toán di truyền cho ParameterOptimizer.genetic_search.
+
+Cá thể là vị trí các giá trị trong param_ranges (mỗi tham số một gen). Mỗi thế hệ:
+giữ lại các cá thể tốt nhất (elitism), chọn cha mẹ bằng tournament, lai ghép đều
+theo gen và đột biến bằng bước nhỏ trong dải tham số.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _series(df, name):
+    col = df[name]
+    return col.squeeze(axis=1) if isinstance(col, pd.DataFrame) else col
+
+
+def combined_signals(df_ind, params, rsi_lower=30, rsi_upper=70):
+    """
+    Tín hiệu bỏ phiếu từ MACD, RSI và Bollinger Bands (chỉ dùng chỉ báo có trong params):
+    MACD trên/dưới đường signal, RSI quá bán/quá mua, Close dưới/trên dải Bollinger.
+    Trả về Series 1 (mua), -1 (bán), 0.
+    """
+    votes = pd.Series(0, index=df_ind.index)
+    if any(k in params for k in ("MACD_fast", "MACD_slow", "MACD_sign")):
+        fast, slow, sign = params.get("MACD_fast", 12), params.get("MACD_slow", 26), params.get("MACD_sign", 9)
+        diff = _series(df_ind, f"MACD_{fast}_{slow}") - _series(df_ind, f"MACD_SIGNAL_{fast}_{slow}_{sign}")
+        votes += (diff > 0).astype(int) - (diff < 0).astype(int)
+    if "RSI" in params:
+        rsi = _series(df_ind, f"RSI_{params['RSI']}")
+        votes += (rsi < rsi_lower).astype(int) - (rsi > rsi_upper).astype(int)
+    if "BB" in params:
+        close = _series(df_ind, "Close")
+        votes += (close < _series(df_ind, f"BB_Low_{params['BB']}")).astype(int)
+        votes -= (close > _series(df_ind, f"BB_High_{params['BB']}")).astype(int)
+    return np.sign(votes)
+
+
+class GeneticSearch:
+    def __init__(self, param_ranges, pop_size=30, elite=2, mutation_rate=None, tournament=3, seed=None):
+        """
+        param_ranges: dict {tên tham số: danh sách giá trị}
+        pop_size: số cá thể mỗi thế hệ
+        elite: số cá thể tốt nhất được giữ nguyên sang thế hệ sau
+        mutation_rate: xác suất đột biến mỗi gen (mặc định 1 / số tham số)
+        tournament: số cá thể dự mỗi lần chọn cha/mẹ
+        seed: seed của bộ sinh ngẫu nhiên
+        """
+        self.keys = list(param_ranges)
+        self.values = [list(param_ranges[k]) for k in self.keys]
+        self.sizes = np.array([len(v) for v in self.values])
+        self.pop_size = pop_size
+        self.elite = min(elite, pop_size)
+        self.mutation_rate = mutation_rate if mutation_rate is not None else 1.0 / len(self.keys)
+        self.tournament = tournament
+        self.rng = np.random.default_rng(seed)
+        # Điểm của mọi cá thể đã chấm, không chấm lại ở thế hệ sau
+        self.scores = {}
+
+    def params(self, idx):
+        return {k: values[i] for k, values, i in zip(self.keys, self.values, idx)}
+
+    def _individual(self, genes):
+        return tuple(int(g) for g in genes)
+
+    def initial_population(self):
+        genes = self.rng.integers(0, self.sizes, size=(self.pop_size, len(self.sizes)))
+        return [self._individual(row) for row in genes]
+
+    def _select(self, population):
+        picks = self.rng.integers(0, len(population), size=self.tournament)
+        return max((population[i] for i in picks), key=lambda idx: self.scores[idx])
+
+    def next_generation(self, population):
+        ranked = sorted(dict.fromkeys(population), key=lambda idx: self.scores[idx], reverse=True)
+        children = ranked[:self.elite]
+        n_genes = len(self.sizes)
+        while len(children) < self.pop_size:
+            mother = np.array(self._select(population))
+            father = np.array(self._select(population))
+            child = np.where(self.rng.random(n_genes) < 0.5, mother, father)
+            mutate = self.rng.random(n_genes) < self.mutation_rate
+            step = self.rng.choice([-2, -1, 1, 2], size=n_genes)
+            child = np.clip(child + mutate * step, 0, self.sizes - 1)
+            children.append(self._individual(child))
+        return children
@@ -0,0 +1,202 @@
+"""
+Tối ưu tham số cho nhiều coin × nhiều chỉ báo trên một pool process.
+
+Mỗi cặp (coin, chỉ báo) là một job chạy ParameterOptimizer trong process con. Dữ liệu
+giá của mỗi coin nằm trong shared memory (multiprocessing.shared_memory), các process con
+chỉ gắn vào vùng nhớ đó thay vì nhận một bản copy DataFrame cho mỗi job. Kết quả gộp
+thành một bảng duy nhất.
+"""
+
+import functools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import metrics
+from backtest_engine.backtester import BacktestEngine
+from indicators_engine import registry
+from indicators_engine.indicators_engine import IndicatorsEngine
+from parameter_optimizer.optimizer import ParameterOptimizer
+
+# DataFrame (view trên shared memory) của process con, gán một lần bởi initializer
+_worker_frames = None
+_worker_segments = None
+
+
+def indicator_above_close(df_ind, params, indicator, metric="profit"):
+    """
+    Backtest mặc định: mua khi cột chỉ báo đầu tiên (theo registry) nằm trên Close.
+    Hàm cấp module nên pickle được (dùng qua functools.partial).
+    """
+    column = registry.output_columns(indicator, params)[0]
+    if column not in df_ind.columns:
+        return 0
+    close = df_ind['Close'].squeeze()
+    signals = (df_ind[column].squeeze() > close).astype(int)
+    score = BacktestEngine(df_ind, signals).run().get(metric, 0)
+    if isinstance(score, pd.Series):
+        score = score.iloc[0]
+    return score
+
+
+def _share_frame(df):
+    """Copy các cột số của df vào một vùng shared memory, trả về (segment, thông tin dựng lại)."""
+    values = np.asfortranarray(df.to_numpy(dtype=np.float64))
+    segment = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    shared = np.ndarray(values.shape, dtype=np.float64, buffer=segment.buf, order='F')
+    shared[:] = values
+    return segment, (segment.name, values.shape, list(df.columns), df.index)
+
+
+def _attach_frame(name, shape, columns, index):
+    segment = shared_memory.SharedMemory(name=name)
+    values = np.ndarray(shape, dtype=np.float64, buffer=segment.buf, order='F')
+    values.flags.writeable = False
+    # Một khối float64: DataFrame giữ view trên shared memory, không copy
+    return segment, pd.DataFrame(values, index=index, columns=columns, copy=False)
+
+
+def _init_worker(shared):
+    global _worker_frames, _worker_segments
+    _worker_frames = {}
+    _worker_segments = []
+    for coin, meta in shared.items():
+        segment, frame = _attach_frame(*meta)
+        _worker_segments.append(segment)
+        _worker_frames[coin] = frame
+
+
+def sweep_scores(data, indicator, windows, metric="profit"):
+    """
+    Điểm của indicator_above_close cho mọi cửa sổ trong một lần: hàm *_many của engine
+    tính ma trận (nến × cửa sổ), so với Close thành ma trận tín hiệu rồi BacktestEngine.run_batch.
+    """
+    engine = IndicatorsEngine(data, copy=False)
+    block = getattr(engine, registry.get_spec(indicator).sweep)(windows)
+    close = data['Close'].to_numpy(dtype=np.float64).reshape(len(data))
+    with np.errstate(invalid="ignore"):
+        signals = (block.to_numpy() > close[:, None]).astype(np.int8)
+    results = BacktestEngine.run_batch(close, signals, periods_per_year=metrics.periods_per_year(data.index))
+    if metric not in results.columns:
+        raise ValueError(f"metric {metric!r} không có trong kết quả run_batch: {list(results.columns)}")
+    return results[metric].tolist()
+
+
+def _can_sweep(indicator, param_ranges, backtest_func, method):
+    # Quét một lần chỉ khi chấm bằng indicator_above_close trên toàn bộ lưới một tham số
+    spec = registry.get_spec(indicator)
+    return (backtest_func is None and method == "grid_search" and spec.sweep is not None
+            and len(spec.params) == 1 and list(param_ranges) == [spec.params[0][1]])
+
+
+def run_job(data, coin, indicator, param_ranges, backtest_func, metric, method, method_kwargs, store):
+    """Tối ưu một chỉ báo cho một coin, trả về một dòng của bảng kết quả."""
+    start = time.perf_counter()
+    sweep = _can_sweep(indicator, param_ranges, backtest_func, method)
+    study = None if backtest_func else f"indicator_above_close:{indicator}"
+    backtest_func = backtest_func or functools.partial(indicator_above_close, indicator=indicator, metric=metric)
+    optimizer = ParameterOptimizer([indicator], param_ranges, data, backtest_func=backtest_func, metric=metric,
+                                   store=store, study=study)
+    if sweep:
+        # Cùng khóa store với grid_search: điểm quét được lưu và dùng lại như từng lần thử
+        key = registry.get_spec(indicator).params[0][1]
+        param_sets = [{key: window} for window in param_ranges[key]]
+        scores = [None] * len(param_sets)
+        store_key = optimizer._store_key(backtest_func)
+        todo = optimizer._restore(param_sets, scores, store_key)
+        if todo:
+            positions = list(todo)
+            windows = [param_sets[i][key] for i in positions]
+            for i, score in zip(positions, sweep_scores(data, indicator, windows, metric)):
+                optimizer._finish(param_sets, scores, todo, store_key, i, score)
+        best_params, best_score = ParameterOptimizer._best(param_sets, scores)
+    else:
+        best_params, best_score = getattr(optimizer, method)(**method_kwargs)
+    return {"coin": coin, "indicator": indicator, "best_params": best_params, "best_score": best_score,
+            "seconds": time.perf_counter() - start}
+
+
+def _run_worker_job(job):
+    coin, *rest = job
+    return run_job(_worker_frames[coin], coin, *rest)
+
+
+class JobRunner:
+    def __init__(self, universe, indicator_ranges, backtest_func=None, metric="profit", method="grid_search",
+                 method_kwargs=None, n_jobs=-1, progress=None, store=None):
+        """
+        universe: dict {coin: DataFrame OHLCV} (các cột phải là số)
+        indicator_ranges: dict {tên chỉ báo (registry): param_ranges}, ví dụ {"RSI": {"RSI": range(5, 21)}}
+        backtest_func: hàm (df_ind, params) -> điểm, phải pickle được; mặc định indicator_above_close
+        metric: chỉ số tối ưu
+        method: hàm tìm kiếm của ParameterOptimizer ("grid_search", "random_search", ...)
+        method_kwargs: tham số cho hàm tìm kiếm, ví dụ {"n_iter": 50}
+        n_jobs: số process (-1: mọi CPU, 1: chạy tuần tự trong process chính)
+        progress: hàm progress(done, total) được gọi khi mỗi job xong
+        store: đường dẫn file JSONL (TrialStore) để chạy tiếp khi bị ngắt; các process ghi chung một file
+        """
+        for indicator, param_ranges in indicator_ranges.items():
+            registry.compile_plan([indicator], param_ranges)
+        self.universe = universe
+        self.indicator_ranges = indicator_ranges
+        self.backtest_func = backtest_func
+        self.metric = metric
+        self.method = method
+        self.method_kwargs = method_kwargs or {}
+        self.n_jobs = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+        self.progress = progress
+        self.store = store
+
+    def jobs(self):
+        """Mọi cặp (coin, chỉ báo), job nhiều tổ hợp tham số xếp trước để các process xong cùng lúc."""
+        jobs = [(coin, indicator, param_ranges, self.backtest_func, self.metric, self.method, self.method_kwargs,
+                 self.store)
+                for coin in self.universe for indicator, param_ranges in self.indicator_ranges.items()]
+        return sorted(jobs, key=lambda job: -math.prod(len(values) for values in job[2].values()))
+
+    def run(self, output=None):
+        """
+        Chạy mọi job, trả về DataFrame (coin, indicator, best_params, best_score, seconds)
+        theo thứ tự universe × indicator_ranges. output: đường dẫn CSV để lưu bảng kết quả.
+        """
+        jobs = self.jobs()
+        rows = []
+        if self.n_jobs > 1 and len(jobs) > 1:
+            segments = []
+            try:
+                shared = {}
+                for coin, df in self.universe.items():
+                    segment, meta = _share_frame(df)
+                    segments.append(segment)
+                    shared[coin] = meta
+                with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker,
+                                         initargs=(shared,)) as pool:
+                    futures = [pool.submit(_run_worker_job, job) for job in jobs]
+                    for future in as_completed(futures):
+                        rows.append(future.result())
+                        self._report(len(rows), len(jobs))
+            finally:
+                for segment in segments:
+                    segment.close()
+                    segment.unlink()
+        else:
+            for coin, indicator, *rest in jobs:
+                rows.append(run_job(self.universe[coin], coin, indicator, *rest))
+                self._report(len(rows), len(jobs))
+
+        order = {(coin, indicator): i for i, (coin, indicator) in
+                 enumerate((c, ind) for c in self.universe for ind in self.indicator_ranges)}
+        rows.sort(key=lambda row: order[(row["coin"], row["indicator"])])
+        table = pd.DataFrame(rows, columns=["coin", "indicator", "best_params", "best_score", "seconds"])
+        if output is not None:
+            table.to_csv(output, index=False)
+        return table
+
+    def _report(self, done, total):
+        if self.progress is not None:
+            self.progress(done, total)
@@ -1,23 +1,85 @@
+import copy
 import itertools
+import math
+import os
+import pickle
 import random
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
 import pandas as pd
 from indicators_engine.indicators_engine import IndicatorsEngine
 from backtest_engine.backtester import BacktestEngine
+from backtest_engine import metrics
+from indicators_engine import registry
+from indicators_engine.cache import fingerprint
+from parameter_optimizer.trial_store import TrialStore, params_key
+from parameter_optimizer import walk_forward as wf
+
+# Optimizer của process con, gán một lần bởi initializer (dữ liệu giá không gửi lại mỗi task)
+_worker_optimizer = None
+
+
+def _init_worker(optimizer):
+    global _worker_optimizer
+    _worker_optimizer = optimizer
+
+
+def _score_chunk(param_sets):
+    return [_worker_optimizer.evaluate(params) for params in param_sets]
+
+
+def halving_schedule(n_candidates, n_bars, eta=4, min_bars=250):
+    """
+    Lịch successive halving: danh sách (số nến, số tổ hợp) của từng vòng.
+    Vòng cuối dùng toàn bộ n_bars, mỗi vòng trước dùng 1/eta số nến của vòng sau
+    (không ít hơn min_bars); sau mỗi vòng giữ lại 1/eta tổ hợp tốt nhất.
+    """
+    rounds = 0
+    while eta ** rounds < n_candidates and n_bars / eta ** (rounds + 1) >= min_bars:
+        rounds += 1
+    schedule = []
+    for k in range(rounds + 1):
+        bars = n_bars if k == rounds else int(n_bars / eta ** (rounds - k))
+        schedule.append((bars, n_candidates))
+        n_candidates = math.ceil(n_candidates / eta)
+    return schedule
+
 
 class ParameterOptimizer:
-    def __init__(self, indicators, param_ranges, data, backtest_func=None, metric="profit"):
+    def __init__(self, indicators, param_ranges, data, backtest_func=None, metric="profit",
+                 n_jobs=1, progress=None, store=None, study=None, costs=None):
         """
-        indicators: list tên chỉ báo, ví dụ ["SMA", "RSI"]
+        indicators: list tên chỉ báo đã đăng ký trong indicators_engine.registry, ví dụ ["SMA", "RSI"]
         param_ranges: dict, ví dụ {"SMA": [10, 20, 50], "RSI": [7, 14, 21]}
         data: DataFrame giá
         backtest_func: hàm backtest nhận df_ind, trả về metric (nếu muốn custom)
         metric: tên chỉ số hiệu suất để tối ưu ("profit", "winrate", ...)
+        n_jobs: số process chấm điểm song song (1: chạy tuần tự, -1: mọi CPU).
+                backtest_func phải pickle được (hàm cấp module, không dùng lambda)
+        progress: hàm progress(done, total) được gọi ở process chính khi có kết quả
+        store: TrialStore hoặc đường dẫn file JSONL lưu (params, score) của từng lần thử;
+               chạy lại trên cùng dữ liệu sẽ bỏ qua các lần thử đã có
+        study: tên cách chấm điểm trong store (mặc định: tên backtest_func/signal_func; bắt buộc
+               khi có store mà hàm chấm là lambda, hàm lồng, functools.partial hay đối tượng
+               callable, vì các hàm này không phân biệt được qua tên)
+        costs: backtest_engine.costs.CostModel dùng khi chấm bằng run_batch (score_batch,
+               metrics_batch, genetic_search, successive_halving, walk_forward)
         """
         self.indicators = indicators
         self.param_ranges = param_ranges
+        # Dịch danh sách chỉ báo thành call plan một lần (báo lỗi ngay nếu thiếu tham số)
+        self._plan = registry.compile_plan(indicators, param_ranges)
         self.data = data
         self.backtest_func = backtest_func or self.default_backtest_func
         self.metric = metric
+        self.n_jobs = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+        self.progress = progress
+        self.store = TrialStore(store) if isinstance(store, (str, os.PathLike)) else store
+        self.study = study
+        self.costs = costs
+        # (data, fingerprint) của lần hash gần nhất: mỗi vòng tìm kiếm không hash lại toàn bộ dữ liệu
+        self._fingerprint = None
 
     def default_backtest_func(self, df_ind, params):
         import pandas as pd
@@ -81,75 +143,336 @@ class ParameterOptimizer:
             score = score.iloc[0]
         return score
 
-    def grid_search(self):
-        keys = list(self.param_ranges.keys())
-        values = [self.param_ranges[k] for k in keys]
+    def compute_indicators(self, engine, params):
+        """Tính các chỉ báo trong self.indicators với bộ tham số params trên engine."""
+        return registry.run_plan(engine, self._plan, params)
+
+    def evaluate(self, params):
+        """Tính chỉ báo với bộ tham số params rồi backtest, trả về điểm."""
+        engine = self.compute_indicators(IndicatorsEngine(self.data, copy=False), params)
+        df_ind = engine.get_df()
+        return self.backtest_func(df_ind, params)
+
+    def metrics_batch(self, param_sets, signal_func):
+        """
+        Mọi chỉ số (metrics.METRICS) của nhiều bộ tham số bằng một lần BacktestEngine.run_batch:
+        mọi chỉ báo tính trên cùng một engine (tham số trùng chỉ tính một lần),
+        signal_func(df_ind, params) trả về Series tín hiệu của từng bộ tham số.
+        Trả về DataFrame mỗi dòng một bộ tham số (cùng thứ tự param_sets); đổi mục tiêu
+        chỉ cần chọn cột khác, không phải backtest lại.
+        """
+        param_sets = list(param_sets)
+        engine = IndicatorsEngine(self.data, copy=False)
+        for params in param_sets:
+            self.compute_indicators(engine, params)
+        df_ind = engine.get_df()
+        signals = wf.signal_matrix(df_ind, param_sets, signal_func)
+        return BacktestEngine.run_batch(df_ind['Close'].to_numpy(dtype=np.float64).reshape(len(df_ind)), signals,
+                                        periods_per_year=metrics.periods_per_year(self.data.index),
+                                        costs=self.costs)
+
+    def score_batch(self, param_sets, signal_func):
+        """
+        Điểm (cột self.metric của metrics_batch) của nhiều bộ tham số, đúng thứ tự param_sets.
+        Có store thì bộ tham số đã lưu không chấm lại.
+        """
+        param_sets = list(param_sets)
+        scores = [None] * len(param_sets)
+        key = self._store_key(signal_func, kind="batch")
+        todo = self._restore(param_sets, scores, key)
+        if not todo:
+            return scores
+        if self.metric not in metrics.METRICS:
+            raise ValueError(f"metric {self.metric!r} không có trong kết quả run_batch: {list(metrics.METRICS)}")
+        positions = list(todo)
+        results = self.metrics_batch([param_sets[i] for i in positions], signal_func)
+        for i, score in zip(positions, results[self.metric].tolist()):
+            self._finish(param_sets, scores, todo, key, i, score)
+        return scores
+
+    def score_all(self, param_sets):
+        """
+        Điểm của từng bộ tham số, đúng thứ tự param_sets (tuần tự hoặc song song).
+        Có store thì lần thử đã lưu không chấm lại, điểm mới được ghi ngay khi có.
+        """
+        param_sets = list(param_sets)
+        total = len(param_sets)
+        scores = [None] * total
+        key = self._store_key(self.backtest_func)
+        todo = self._restore(param_sets, scores, key)
+        done = total - sum(len(same) for same in todo.values())
+        if done:
+            self._report(done, total)
+        positions = list(todo)
+        if self.n_jobs > 1 and len(positions) > 1 and self._can_parallelize():
+            chunks = self._score_parallel([param_sets[i] for i in positions])
+        else:
+            chunks = ((k, [self.evaluate(param_sets[i])]) for k, i in enumerate(positions))
+        for start, chunk_scores in chunks:
+            for i, score in zip(positions[start:start + len(chunk_scores)], chunk_scores):
+                self._finish(param_sets, scores, todo, key, i, score)
+                done += len(todo[i])
+            self._report(done, total)
+        return scores
+
+    def _score_one(self, params, key):
+        score = self.store.get(*key, params) if key is not None else None
+        if score is None:
+            score = self.evaluate(params)
+            if key is not None:
+                self.store.put(*key, params, score)
+        return score
+
+    def _store_key(self, scorer, kind="single"):
+        """(fingerprint dữ liệu, study) dùng làm khóa trong store, None nếu không có store."""
+        if self.store is None:
+            return None
+        study = f"{kind}:{self._study_name(scorer)}:{','.join(self.indicators)}:{self.metric}"
+        if kind == "batch" and self.costs is not None:
+            # Điểm chấm bằng run_batch phụ thuộc chi phí giao dịch
+            study += f":{self.costs!r}"
+        return self._data_fingerprint(), study
+
+    def _data_fingerprint(self):
+        if self._fingerprint is None or self._fingerprint[0] is not self.data:
+            hashed = pd.util.hash_pandas_object(self.data, index=True).to_numpy()
+            columns = np.frombuffer(repr(list(self.data.columns)).encode(), dtype=np.uint8)
+            self._fingerprint = (self.data, fingerprint([hashed, columns]))
+        return self._fingerprint[1]
+
+    def _study_name(self, scorer):
+        if self.study is not None:
+            return self.study
+        # Mọi lambda tên "<lambda>", mọi partial/đối tượng callable không có __qualname__ riêng:
+        # hai hàm chấm khác nhau sẽ dùng chung khóa và đọc nhầm điểm của nhau
+        name = getattr(scorer, "__qualname__", None)
+        if name is None or "<" in name:
+            raise ValueError(f"Cần truyền study khi dùng store với hàm chấm điểm {scorer!r} "
+                             "(lambda, hàm lồng, functools.partial, đối tượng callable)")
+        return name
+
+    def _restore(self, param_sets, scores, key):
+        """
+        Điền điểm đã có trong store vào scores. Trả về dict {vị trí cần chấm: mọi vị trí
+        có cùng tham số}, tham số trùng nhau chỉ chấm một lần khi có store.
+        """
+        if key is None:
+            return {i: [i] for i in range(len(param_sets))}
+        todo = {}
+        first = {}
+        for i, params in enumerate(param_sets):
+            score = self.store.get(*key, params)
+            if score is not None:
+                scores[i] = score
+            else:
+                todo.setdefault(first.setdefault(params_key(params), i), []).append(i)
+        return todo
+
+    def _finish(self, param_sets, scores, todo, key, i, score):
+        for j in todo[i]:
+            scores[j] = score
+        if key is not None:
+            self.store.put(*key, param_sets[i], score)
+
+    def _can_parallelize(self):
+        try:
+            pickle.dumps(self.backtest_func)
+        except Exception as e:
+            warnings.warn(f"backtest_func không pickle được ({e}), chạy tuần tự")
+            return False
+        return True
+
+    def _score_parallel(self, param_sets):
+        """Sinh (vị trí đầu, điểm) của từng nhóm tổ hợp theo thứ tự hoàn thành."""
+        total = len(param_sets)
+        # Mỗi task là một nhóm tổ hợp để giảm chi phí gửi/nhận giữa các process
+        size = max(1, total // (self.n_jobs * 4))
+        chunks = [param_sets[i:i + size] for i in range(0, total, size)]
+        with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_init_worker, initargs=(self,)) as pool:
+            futures = {pool.submit(_score_chunk, chunk): i * size for i, chunk in enumerate(chunks)}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def _report(self, done, total):
+        if self.progress is not None:
+            self.progress(done, total)
+
+    def __getstate__(self):
+        # progress và store chỉ dùng ở process chính (callback, file đang mở không pickle được)
+        state = dict(self.__dict__)
+        state['progress'] = None
+        state['store'] = None
+        return state
+
+    @staticmethod
+    def _best(param_sets, scores):
+        # Chọn theo thứ tự tổ hợp (bằng điểm thì giữ tổ hợp đầu tiên), không phụ thuộc số worker
         best_score = None
         best_params = None
-
-        for param_set in itertools.product(*values):
-            params = dict(zip(keys, param_set))
-            # Tính toán chỉ báo với tham số hiện tại
-            engine = IndicatorsEngine(self.data)
-            for ind in self.indicators:
-                if ind == "SMA":
-                    engine.sma(window=params["SMA"])
-                if ind == "EMA":
-                    engine.ema(window=params["EMA"])
-                if ind == "MACD":
-                    engine.macd(window_fast=params.get("MACD_fast", 12), window_slow=params.get("MACD_slow", 26))
-                if ind == "RSI":
-                    engine.rsi(window=params["RSI"])
-                if ind == "Bollinger Bands":
-                    engine.bollinger_bands(window=params["BB"])
-                if ind == "ATR":
-                    engine.atr(window=params["ATR"])
-                if ind == "CCI":
-                    engine.cci(window=params["CCI"])
-                if ind == "Stochastic":
-                    engine.stochastic(window=params["Stochastic"])
-                if ind == "ADX":
-                    engine.adx(window=params["ADX"])
-                if ind == "Williams %R":
-                    engine.williams_r(lbp=params["WilliamsR"])
-            df_ind = engine.get_df()
-            score = self.backtest_func(df_ind, params)
+        for params, score in zip(param_sets, scores):
             if (best_score is None) or (score > best_score):
                 best_score = score
                 best_params = params
         return best_params, best_score
 
+    def grid_search(self):
+        keys = list(self.param_ranges.keys())
+        values = [self.param_ranges[k] for k in keys]
+        param_sets = [dict(zip(keys, param_set)) for param_set in itertools.product(*values)]
+        return self._best(param_sets, self.score_all(param_sets))
+
     def random_search(self, n_iter=50):
         keys = list(self.param_ranges.keys())
+        # Lấy mẫu ở process chính để kết quả không phụ thuộc số worker
+        param_sets = [{k: random.choice(self.param_ranges[k]) for k in keys} for _ in range(n_iter)]
+        return self._best(param_sets, self.score_all(param_sets))
+
+    def bayesian_search(self, n_iter=30, n_initial=5, seed=None):
+        """
+        Tối ưu Bayes (Gaussian process + Expected Improvement) trên param_ranges:
+        n_initial tổ hợp ngẫu nhiên (chấm điểm song song nếu n_jobs > 1), sau đó mỗi
+        vòng chọn tổ hợp chưa thử hứa hẹn nhất. Tổng cộng tối đa n_iter lần backtest.
+        """
+        from parameter_optimizer.bayesian_optimizer import BayesianSearch
+
+        search = BayesianSearch(self.param_ranges, n_initial=n_initial, seed=seed)
+        n_iter = min(n_iter, search.total)
+        indices = search.initial()[:n_iter]
+        param_sets = [search.params(idx) for idx in indices]
+        scores = self.score_all(param_sets)
+        for idx, score in zip(indices, scores):
+            search.observe(idx, score)
+        key = self._store_key(self.backtest_func)
+        while len(scores) < n_iter:
+            idx = search.suggest()
+            params = search.params(idx)
+            score = self._score_one(params, key)
+            search.observe(idx, score)
+            param_sets.append(params)
+            scores.append(score)
+            self._report(len(scores), n_iter)
+        return self._best(param_sets, scores)
+
+    def genetic_search(self, pop_size=30, generations=20, signal_func=None, elite=2, patience=5,
+                       mutation_rate=None, seed=None):
+        """
+        Thuật toán di truyền trên param_ranges. Mỗi thế hệ được chấm điểm một lần bằng
+        score_batch (mỗi cá thể là một cột tín hiệu), giữ lại `elite` cá thể tốt nhất,
+        dừng sớm khi điểm tốt nhất không tăng sau `patience` thế hệ.
+        signal_func: hàm (df_ind, params) -> Series tín hiệu, mặc định combined_signals
+                     (MACD + RSI + Bollinger Bands)
+        """
+        from parameter_optimizer.genetic_algorithm import GeneticSearch, combined_signals
+
+        signal_func = signal_func or combined_signals
+        search = GeneticSearch(self.param_ranges, pop_size=pop_size, elite=elite,
+                               mutation_rate=mutation_rate, seed=seed)
+        population = search.initial_population()
         best_score = None
-        best_params = None
-        for _ in range(n_iter):
-            params = {k: random.choice(self.param_ranges[k]) for k in keys}
-            engine = IndicatorsEngine(self.data)
-            for ind in self.indicators:
-                if ind == "SMA":
-                    engine.sma(window=params["SMA"])
-                if ind == "EMA":
-                    engine.ema(window=params["EMA"])
-                if ind == "MACD":
-                    engine.macd(window_fast=params.get("MACD_fast", 12), window_slow=params.get("MACD_slow", 26))
-                if ind == "RSI":
-                    engine.rsi(window=params["RSI"])
-                if ind == "Bollinger Bands":
-                    engine.bollinger_bands(window=params["BB"])
-                if ind == "ATR":
-                    engine.atr(window=params["ATR"])
-                if ind == "CCI":
-                    engine.cci(window=params["CCI"])
-                if ind == "Stochastic":
-                    engine.stochastic(window=params["Stochastic"])
-                if ind == "ADX":
-                    engine.adx(window=params["ADX"])
-                if ind == "Williams %R":
-                    engine.williams_r(lbp=params["WilliamsR"])
-            df_ind = engine.get_df()
-            score = self.backtest_func(df_ind, params)
-            if (best_score is None) or (score > best_score):
-                best_score = score
-                best_params = params
-        return best_params, best_score
\ No newline at end of file
+        stale = 0
+        for generation in range(generations):
+            new = [idx for idx in dict.fromkeys(population) if idx not in search.scores]
+            if new:
+                scores = self.score_batch([search.params(idx) for idx in new], signal_func)
+                search.scores.update(zip(new, scores))
+            self._report(generation + 1, generations)
+            generation_best = max(search.scores[idx] for idx in population)
+            if best_score is None or generation_best > best_score:
+                best_score = generation_best
+                stale = 0
+            else:
+                stale += 1
+                if stale >= patience:
+                    break
+            population = search.next_generation(population)
+        evaluated = list(search.scores)
+        return self._best([search.params(idx) for idx in evaluated], [search.scores[idx] for idx in evaluated])
+
+    def successive_halving(self, eta=4, min_bars=250, signal_func=None, param_sets=None):
+        """
+        Chấm mọi tổ hợp trên đoạn đầu ngắn của self.data, giữ 1/eta tổ hợp tốt nhất rồi chấm
+        lại trên đoạn dài gấp eta lần, cho tới khi dùng toàn bộ dữ liệu (xem halving_schedule).
+        signal_func: nếu có thì mỗi vòng chấm bằng score_batch, nếu không dùng score_all
+        param_sets: danh sách tổ hợp (mặc định: toàn bộ lưới param_ranges)
+        """
+        if param_sets is None:
+            keys = list(self.param_ranges.keys())
+            values = [self.param_ranges[k] for k in keys]
+            param_sets = [dict(zip(keys, param_set)) for param_set in itertools.product(*values)]
+        candidates = list(param_sets)
+        for bars, _ in halving_schedule(len(candidates), len(self.data), eta, min_bars):
+            # Chỉ dùng dữ liệu tới nến thứ `bars`, chỉ báo cũng tính trên đoạn này
+            prefix = copy.copy(self)
+            prefix.data = self.data.iloc[:bars]
+            if signal_func is not None:
+                scores = prefix.score_batch(candidates, signal_func)
+            else:
+                scores = prefix.score_all(candidates)
+            if bars == len(self.data):
+                return self._best(candidates, scores)
+            # Sắp xếp ổn định: bằng điểm thì giữ thứ tự tổ hợp ban đầu, điểm NaN xếp cuối
+            ranks = np.nan_to_num(np.asarray(scores, dtype=np.float64), nan=-np.inf)
+            order = np.argsort(-ranks, kind="stable")
+            keep = sorted(order[:math.ceil(len(candidates) / eta)])
+            candidates = [candidates[i] for i in keep]
+
+    def walk_forward(self, train_bars, test_bars, step=None, signal_func=None, param_sets=None,
+                     initial_balance=10000):
+        """
+        Walk-forward: chọn bộ tham số tốt nhất (theo self.metric) trên cửa sổ train_bars nến,
+        giao dịch bộ đó trên test_bars nến tiếp theo, dời cửa sổ step nến (mặc định test_bars).
+        Chỉ báo và tín hiệu tính một lần trên toàn bộ dữ liệu, các fold chỉ cắt lại mảng;
+        fold chạy song song khi n_jobs > 1.
+        signal_func: hàm (df_ind, params) -> Series tín hiệu, mặc định combined_signals
+        param_sets: danh sách tổ hợp (mặc định: toàn bộ lưới param_ranges)
+        Trả về dict:
+            folds: DataFrame từng fold (mốc train/test, params, train_score, test_profit)
+            equity: Series vốn ngoài mẫu nối liền các đoạn test
+            profit: tổng lợi nhuận ngoài mẫu
+        """
+        from parameter_optimizer.genetic_algorithm import combined_signals
+
+        signal_func = signal_func or combined_signals
+        if param_sets is None:
+            keys = list(self.param_ranges.keys())
+            values = [self.param_ranges[k] for k in keys]
+            param_sets = [dict(zip(keys, param_set)) for param_set in itertools.product(*values)]
+        param_sets = list(param_sets)
+        if self.metric not in metrics.METRICS:
+            raise ValueError(f"metric {self.metric!r} không có trong kết quả run_batch: {list(metrics.METRICS)}")
+        folds = wf.fold_bounds(len(self.data), train_bars, test_bars, step or test_bars)
+        if not folds:
+            raise ValueError(f"Dữ liệu {len(self.data)} nến không đủ cho train_bars={train_bars}")
+
+        engine = IndicatorsEngine(self.data, copy=False)
+        for params in param_sets:
+            self.compute_indicators(engine, params)
+        df_ind = engine.get_df()
+        close = df_ind['Close'].to_numpy(dtype=np.float64).reshape(len(df_ind))
+        signals = wf.signal_matrix(df_ind, param_sets, signal_func)
+        ppy = metrics.periods_per_year(self.data.index)
+
+        results = [None] * len(folds)
+        if self.n_jobs > 1 and len(folds) > 1:
+            with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=wf._init_worker,
+                                     initargs=(close, signals, self.metric, ppy, self.costs,
+                                               initial_balance)) as pool:
+                futures = {pool.submit(wf._run_worker_fold, fold): i for i, fold in enumerate(folds)}
+                for done, future in enumerate(as_completed(futures), 1):
+                    results[futures[future]] = future.result()
+                    self._report(done, len(folds))
+        else:
+            for i, fold in enumerate(folds):
+                results[i] = wf.run_fold(close, signals, self.metric, fold, ppy, self.costs, initial_balance)
+                self._report(i + 1, len(folds))
+
+        index = self.data.index
+        rows = []
+        for (train_start, test_start, test_stop, segment_stop), (best, train_score, pnl) in zip(folds, results):
+            rows.append({"train_start": index[train_start], "test_start": index[test_start],
+                         "test_end": index[segment_stop - 1], "params": param_sets[best],
+                         "train_score": train_score, "test_profit": pnl.sum()})
+        segments = np.concatenate([np.arange(fold[1], fold[3]) for fold in folds])
+        pnl = np.concatenate([result[2] for result in results])
+        equity = pd.Series(initial_balance + np.cumsum(pnl), index=index[segments], name="equity")
+        return {"folds": pd.DataFrame(rows), "equity": equity, "profit": equity.iloc[-1] - initial_balance}
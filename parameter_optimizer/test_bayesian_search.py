@@ -0,0 +1,73 @@
+import time
+
+import numpy as np
+
+from backtest_engine.backtester import BacktestEngine
+from parameter_optimizer.optimizer import ParameterOptimizer
+from testing_helpers import make_ohlcv
+
+
+def bowl_score(df_ind, params):
+    """Điểm không phụ thuộc dữ liệu, tốt nhất tại SMA=60, RSI=12."""
+    return -((params["SMA"] - 60) / 10.0) ** 2 - ((params["RSI"] - 12) / 2.0) ** 2
+
+
+def crossover_profit(df_ind, params):
+    """Giữ khi SMA nhanh nằm trên EMA chậm."""
+    above = df_ind[f"SMA_{params['SMA']}"] > df_ind[f"EMA_{params['EMA']}"]
+    signals = above.astype(int) - (~above).astype(int)
+    return BacktestEngine(df_ind, signals).run()["profit"]
+
+
+class CountingBacktest:
+    def __init__(self, func):
+        self.func = func
+        self.scores = []
+
+    def __call__(self, df_ind, params):
+        score = self.func(df_ind, params)
+        self.scores.append(score)
+        return score
+
+
+def test_bayesian_search_finds_optimum_with_few_evaluations():
+    counter = CountingBacktest(bowl_score)
+    optimizer = ParameterOptimizer(["SMA"], {"SMA": range(5, 205, 5), "RSI": range(5, 31)},
+                                   make_ohlcv(300), backtest_func=counter)
+    best_params, best_score = optimizer.bayesian_search(n_iter=40, seed=0)
+    assert len(counter.scores) == 40  # lưới có 1040 tổ hợp
+    assert best_params == {"SMA": 60, "RSI": 12} and best_score == 0
+
+
+def test_bayesian_search_is_seeded_and_never_repeats():
+    results = []
+    for _ in range(2):
+        counter = CountingBacktest(bowl_score)
+        optimizer = ParameterOptimizer(["SMA"], {"SMA": [10, 20, 50, 100], "RSI": [7, 14]},
+                                       make_ohlcv(300), backtest_func=counter)
+        results.append((optimizer.bayesian_search(n_iter=50, seed=3), counter.scores))
+    assert results[0] == results[1]
+    assert len(results[0][1]) == 8  # n_iter lớn hơn lưới: mỗi tổ hợp thử đúng một lần
+
+
+def evaluations_to_reach(scores, target):
+    best = np.maximum.accumulate(np.asarray(scores, dtype=float))
+    hit = np.flatnonzero(best >= target)
+    return int(hit[0]) + 1 if hit.size else None
+
+
+if __name__ == "__main__":
+    data = make_ohlcv(5000)
+    param_ranges = {"SMA": range(5, 105, 5), "EMA": range(20, 220, 10)}
+    grid = ParameterOptimizer(["SMA", "EMA"], param_ranges, data, backtest_func=crossover_profit)
+    start = time.perf_counter()
+    grid_params, grid_score = grid.grid_search()
+    print(f"grid_search: 400 lần backtest, {time.perf_counter() - start:.1f} s | {grid_params} {grid_score:.1f}")
+    for seed in range(5):
+        counter = CountingBacktest(crossover_profit)
+        optimizer = ParameterOptimizer(["SMA", "EMA"], param_ranges, data, backtest_func=counter)
+        start = time.perf_counter()
+        params, score = optimizer.bayesian_search(n_iter=60, seed=seed)
+        needed = evaluations_to_reach(counter.scores, 0.99 * grid_score)
+        print(f"bayesian seed={seed}: {time.perf_counter() - start:.1f} s | {params} {score:.1f}"
+              f" | đạt 99% điểm grid sau {needed} lần backtest")
@@ -0,0 +1,83 @@
+import time
+
+import numpy as np
+
+from backtest_engine.backtester import BacktestEngine
+from backtest_engine.costs import CostModel
+from parameter_optimizer.genetic_algorithm import combined_signals
+from parameter_optimizer.optimizer import ParameterOptimizer
+from testing_helpers import INDICATORS, PARAM_RANGES, all_param_sets, make_ohlcv
+
+def make_optimizer(n=3000, param_ranges=PARAM_RANGES):
+    return ParameterOptimizer(INDICATORS, param_ranges, make_ohlcv(n, seed=11))
+
+
+def test_score_batch_matches_single_backtest():
+    optimizer = make_optimizer(800)
+    param_sets = all_param_sets(PARAM_RANGES)[:25]
+    batch = optimizer.score_batch(param_sets, combined_signals)
+    optimizer.backtest_func = lambda df_ind, params: BacktestEngine(df_ind, combined_signals(df_ind, params)).run()["profit"]
+    single = [optimizer.evaluate(params) for params in param_sets]
+    np.testing.assert_allclose(batch, single, rtol=1e-9, atol=1e-6)
+
+
+def test_metrics_batch_gives_every_objective():
+    optimizer = make_optimizer(800)
+    param_sets = all_param_sets(PARAM_RANGES)[:10]
+    table = optimizer.metrics_batch(param_sets, combined_signals)
+    for metric in ("sharpe", "max_drawdown", "profit_factor"):
+        optimizer.metric = metric
+        assert optimizer.score_batch(param_sets, combined_signals) == table[metric].tolist()
+
+
+def test_metrics_batch_applies_costs():
+    param_sets = all_param_sets(PARAM_RANGES)[:10]
+    free = make_optimizer(800).metrics_batch(param_sets, combined_signals)
+    optimizer = make_optimizer(800)
+    optimizer.costs = CostModel(taker_bps=10, slippage_bps=5)
+    costly = optimizer.metrics_batch(param_sets, combined_signals)
+    assert (costly["trades"] == free["trades"]).all()
+    traded = free["trades"] > 0
+    assert (costly["profit"][traded] < free["profit"][traded]).all()
+
+
+def test_genetic_search_is_seeded_and_near_grid_best():
+    param_sets = all_param_sets(PARAM_RANGES)
+    grid_best = max(make_optimizer().score_batch(param_sets, combined_signals))
+    first = make_optimizer().genetic_search(pop_size=24, generations=15, seed=7)
+    second = make_optimizer().genetic_search(pop_size=24, generations=15, seed=7)
+    assert first == second
+    assert first[1] >= 0.9 * grid_best
+
+
+def test_genetic_search_stops_on_stagnation():
+    calls = []
+
+    def flat_signals(df_ind, params):
+        calls.append(params)
+        return np.zeros(len(df_ind))
+
+    optimizer = make_optimizer(300)
+    optimizer.progress = lambda generation, total: calls.append(("generation", generation))
+    optimizer.genetic_search(pop_size=10, generations=50, signal_func=flat_signals, patience=3, seed=1)
+    generations = [c for c in calls if isinstance(c, tuple)]
+    assert len(generations) == 4  # thế hệ đầu + 3 thế hệ không cải thiện
+
+
+if __name__ == "__main__":
+    optimizer = make_optimizer(20000)
+    param_sets = all_param_sets(PARAM_RANGES)
+    start = time.perf_counter()
+    grid_scores = optimizer.score_batch(param_sets, combined_signals)
+    grid_time = time.perf_counter() - start
+    best = int(np.argmax(grid_scores))
+    print(f"Lưới {len(param_sets)} tổ hợp (score_batch): {grid_time:.1f} s | {param_sets[best]} {grid_scores[best]:.1f}")
+    counted = []
+
+    def counting_signals(df_ind, params):
+        counted.append(params)
+        return combined_signals(df_ind, params)
+
+    start = time.perf_counter()
+    params, score = optimizer.genetic_search(pop_size=40, generations=30, signal_func=counting_signals, seed=0)
+    print(f"genetic_search: {time.perf_counter() - start:.1f} s, {len(counted)} cá thể | {params} {score:.1f}")
@@ -0,0 +1,108 @@
+import functools
+import time
+
+import numpy as np
+import pytest
+
+from parameter_optimizer import job_runner
+from parameter_optimizer.job_runner import JobRunner, indicator_above_close, sweep_scores, _attach_frame, _share_frame
+from parameter_optimizer.optimizer import ParameterOptimizer
+from parameter_optimizer.trial_store import TrialStore
+from testing_helpers import make_ohlcv
+
+INDICATOR_RANGES = {"RSI": {"RSI": range(5, 21)}, "SMA": {"SMA": [10, 20, 50]}, "CCI": {"CCI": [7, 14]},
+                    "Bollinger Bands": {"BB": [14, 20]}}
+
+
+def make_universe(n_coins=3, n=800):
+    return {f"COIN{i}": make_ohlcv(n, seed=i) for i in range(n_coins)}
+
+
+def test_shared_frame_roundtrip():
+    df = make_ohlcv(100)
+    segment, meta = _share_frame(df)
+    try:
+        attached, frame = _attach_frame(*meta)
+        assert frame.equals(df)
+        assert not frame.to_numpy().flags.writeable
+        del frame
+        attached.close()
+    finally:
+        segment.close()
+        segment.unlink()
+
+
+def test_job_runner_matches_sequential_optimizers(tmp_path):
+    universe = make_universe()
+    calls = []
+    output = tmp_path / "results.csv"
+    table = JobRunner(universe, INDICATOR_RANGES, n_jobs=2,
+                      progress=lambda done, total: calls.append((done, total))).run(output=str(output))
+    assert list(zip(table["coin"], table["indicator"])) == [(c, i) for c in universe for i in INDICATOR_RANGES]
+    assert calls[-1] == (12, 12) and output.exists()
+    for row in table.itertuples():
+        optimizer = ParameterOptimizer([row.indicator], INDICATOR_RANGES[row.indicator], universe[row.coin],
+                                       backtest_func=functools.partial(indicator_above_close, indicator=row.indicator))
+        best_params, best_score = optimizer.grid_search()
+        assert row.best_params == best_params and np.isclose(row.best_score, best_score)
+    serial = JobRunner(universe, INDICATOR_RANGES, n_jobs=1).run()
+    assert serial[["coin", "indicator", "best_params", "best_score"]].equals(
+        table[["coin", "indicator", "best_params", "best_score"]])
+
+
+def test_sweep_scores_match_single_backtests():
+    data = make_ohlcv(1500, seed=2)
+    data["Close"] = data["Close"] / 300  # giá cỡ 100 để RSI có lúc nằm trên Close
+    for indicator, key in [("RSI", "RSI"), ("EMA", "EMA"), ("Williams %R", "WilliamsR")]:
+        windows = list(range(5, 21))
+        single = [ParameterOptimizer([indicator], {key: windows}, data,
+                                     backtest_func=functools.partial(indicator_above_close, indicator=indicator))
+                  .evaluate({key: w}) for w in windows]
+        np.testing.assert_allclose(sweep_scores(data, indicator, windows), single, atol=1e-9)
+
+
+def test_sweep_scores_are_stored(tmp_path, monkeypatch):
+    path = str(tmp_path / "trials.jsonl")
+    universe = make_universe(2, 600)
+    ranges = {"RSI": {"RSI": range(5, 21)}}
+    table = JobRunner(universe, ranges, n_jobs=1, store=path).run()
+    assert len(TrialStore(path)) == 2 * 16
+    # Chạy lại: mọi điểm lấy từ store, không quét lại
+    monkeypatch.setattr(job_runner, "sweep_scores", lambda *args, **kwargs: pytest.fail("quét lại"))
+    again = JobRunner(universe, ranges, n_jobs=1, store=path).run()
+    assert again[["best_params", "best_score"]].equals(table[["best_params", "best_score"]])
+    # Cùng khóa với grid_search từng lần thử của ParameterOptimizer
+    optimizer = ParameterOptimizer(["RSI"], ranges["RSI"], universe["COIN0"], backtest_func=pytest.fail,
+                                   store=path, study="indicator_above_close:RSI")
+    assert optimizer.grid_search() == (table["best_params"][0], table["best_score"][0])
+
+
+def test_job_runner_validates_indicator_ranges():
+    try:
+        JobRunner(make_universe(1), {"Bollinger Bands": {"RSI": [14]}})
+    except ValueError as e:
+        assert "BB" in str(e)
+    else:
+        raise AssertionError("thiếu tham số BB phải báo lỗi")
+
+
+if __name__ == "__main__":
+    import os
+
+    data = make_ohlcv(20000)
+    windows = list(range(5, 21))
+    start = time.perf_counter()
+    ParameterOptimizer(["RSI"], {"RSI": windows}, data,
+                       backtest_func=functools.partial(indicator_above_close, indicator="RSI")).grid_search()
+    grid_time = time.perf_counter() - start
+    start = time.perf_counter()
+    sweep_scores(data, "RSI", windows)
+    print(f"RSI {windows[0]}..{windows[-1]} × {len(data)} nến: grid_search {grid_time:.2f} s,"
+          f" rsi_many + run_batch {time.perf_counter() - start:.3f} s")
+
+    universe = make_universe(11, 2000)
+    ranges = {"RSI": {"RSI": range(5, 21)}, "EMA": {"EMA": range(5, 105, 5)}, "ADX": {"ADX": [7, 14, 21]}}
+    for n_jobs in sorted({1, 2, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        table = JobRunner(universe, ranges, n_jobs=n_jobs).run()
+        print(f"n_jobs={n_jobs}: {len(table)} job trong {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,58 @@
+import os
+import time
+import warnings
+
+from parameter_optimizer.optimizer import ParameterOptimizer
+from testing_helpers import make_ohlcv, sma_profit
+
+
+def make_optimizer(n_jobs=1, progress=None, n=3000):
+    return ParameterOptimizer(
+        indicators=["SMA", "RSI"],
+        param_ranges={"SMA": range(5, 50, 5), "RSI": [7, 14]},
+        data=make_ohlcv(n),
+        backtest_func=sma_profit,
+        n_jobs=n_jobs,
+        progress=progress,
+    )
+
+
+def test_parallel_grid_matches_serial():
+    serial = make_optimizer()
+    param_sets = [{"SMA": w, "RSI": r} for w in range(5, 50, 5) for r in (7, 14)]
+    calls = []
+    parallel = make_optimizer(n_jobs=2, progress=lambda done, total: calls.append((done, total)))
+    assert parallel.score_all(param_sets) == serial.score_all(param_sets)
+    calls.clear()
+    assert parallel.grid_search() == serial.grid_search()
+    assert calls[-1] == (18, 18)
+    assert [done for done, _ in calls] == sorted(done for done, _ in calls)
+
+
+def test_parallel_random_search_is_deterministic():
+    import random
+    random.seed(1)
+    serial = make_optimizer().random_search(n_iter=12)
+    random.seed(1)
+    parallel = make_optimizer(n_jobs=3).random_search(n_iter=12)
+    assert parallel == serial
+
+
+def test_unpicklable_backtest_falls_back_to_serial():
+    optimizer = make_optimizer(n_jobs=2, n=500)
+    optimizer.backtest_func = lambda df_ind, params: sma_profit(df_ind, params)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        best_params, best_score = optimizer.grid_search()
+    assert any("tuần tự" in str(w.message) for w in caught)
+    assert best_params is not None
+
+
+if __name__ == "__main__":
+    data = make_ohlcv(20000)
+    param_ranges = {"SMA": range(5, 205, 5), "RSI": range(5, 21)}
+    for n_jobs in (1, max(2, os.cpu_count())):
+        optimizer = ParameterOptimizer(["SMA", "RSI"], param_ranges, data, backtest_func=sma_profit, n_jobs=n_jobs)
+        start = time.perf_counter()
+        best = optimizer.grid_search()
+        print(f"n_jobs={n_jobs}: {time.perf_counter() - start:.2f} s | {best}")
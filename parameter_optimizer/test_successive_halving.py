@@ -0,0 +1,64 @@
+import time
+
+import numpy as np
+
+from parameter_optimizer.genetic_algorithm import combined_signals
+from parameter_optimizer.optimizer import ParameterOptimizer, halving_schedule
+from testing_helpers import INDICATORS, PARAM_RANGES, all_param_sets, make_ohlcv
+
+
+def test_halving_schedule_cuts_bars_on_large_grid():
+    schedule = halving_schedule(1000, 20000, eta=4, min_bars=250)
+    assert schedule[-1][0] == 20000
+    assert [c for _, c in schedule] == [1000, 250, 63, 16]
+    assert all(bars >= 250 for bars, _ in schedule)
+    total = sum(bars * count for bars, count in schedule)
+    assert total * 10 <= 1000 * 20000
+
+
+def test_halving_schedule_short_data_is_plain_grid():
+    assert halving_schedule(1000, 300, eta=4, min_bars=250) == [(300, 1000)]
+    assert halving_schedule(1, 20000) == [(20000, 1)]
+
+
+def test_successive_halving_uses_prefixes_and_finds_best():
+    seen = []
+
+    def prefix_score(df_ind, params):
+        seen.append((len(df_ind), params["SMA"]))
+        return -abs(params["SMA"] - 40) + (np.nan if params["SMA"] == 5 else 0)
+
+    optimizer = ParameterOptimizer(["SMA"], {"SMA": range(5, 85, 5)}, make_ohlcv(2000), backtest_func=prefix_score)
+    best_params, best_score = optimizer.successive_halving(eta=2, min_bars=200)
+    assert best_params == {"SMA": 40} and best_score == 0
+    lengths = [n for n, _ in seen]
+    assert lengths == sorted(lengths) and lengths[-1] == 2000 and lengths[0] == 250
+    assert [n for n, _ in seen].count(2000) == 2
+
+
+def test_successive_halving_with_signal_func_near_grid_best():
+    optimizer = ParameterOptimizer(INDICATORS, PARAM_RANGES, make_ohlcv(4000, seed=11))
+    param_sets = all_param_sets(PARAM_RANGES)
+    grid_scores = optimizer.score_batch(param_sets, combined_signals)
+    params, score = optimizer.successive_halving(signal_func=combined_signals, param_sets=param_sets)
+    assert score == grid_scores[param_sets.index(params)]
+    assert score >= np.quantile(grid_scores, 0.75)
+
+
+if __name__ == "__main__":
+    data = make_ohlcv(20000, seed=11)
+    ranges = dict(PARAM_RANGES, RSI=[7, 10, 14, 21, 28], BB=[14, 20, 26, 32])
+    param_sets = all_param_sets(ranges)[:1000]
+    optimizer = ParameterOptimizer(INDICATORS, ranges, data)
+    start = time.perf_counter()
+    grid_scores = optimizer.score_batch(param_sets, combined_signals)
+    grid_time = time.perf_counter() - start
+    best = int(np.argmax(grid_scores))
+    print(f"Lưới {len(param_sets)} tổ hợp × {len(data)} nến: {grid_time:.1f} s | {param_sets[best]} {grid_scores[best]:.1f}")
+    schedule = halving_schedule(len(param_sets), len(data))
+    bars = sum(b * c for b, c in schedule)
+    start = time.perf_counter()
+    params, score = optimizer.successive_halving(signal_func=combined_signals, param_sets=param_sets)
+    rank = int((np.asarray(grid_scores) > score).sum()) + 1
+    print(f"successive_halving {schedule}: {time.perf_counter() - start:.1f} s, "
+          f"ít hơn {len(param_sets) * len(data) / bars:.1f} lần số nến | {params} {score:.1f} (hạng {rank})")
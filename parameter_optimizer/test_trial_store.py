@@ -0,0 +1,142 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from parameter_optimizer.genetic_algorithm import combined_signals
+from parameter_optimizer.optimizer import ParameterOptimizer
+from parameter_optimizer.trial_store import TrialStore
+from testing_helpers import INDICATORS, PARAM_RANGES, all_param_sets, make_ohlcv, sma_profit
+
+PARAM_SETS = [{"SMA": w} for w in range(5, 50, 5)]
+
+
+class CrashingBacktest:
+    """Backtest đếm số lần gọi, ném lỗi ở lần thứ crash_at (giả lập process bị ngắt)."""
+
+    def __init__(self, crash_at=None):
+        self.calls = []
+        self.crash_at = crash_at
+
+    def __call__(self, df_ind, params):
+        if len(self.calls) + 1 == self.crash_at:
+            raise KeyboardInterrupt
+        self.calls.append(params)
+        return sma_profit(df_ind, params)
+
+
+SIGNAL_CALLS = []
+
+
+def counted_signals(df_ind, params):
+    """combined_signals, ghi lại các bộ tham số đã chấm vào SIGNAL_CALLS."""
+    SIGNAL_CALLS.append(params)
+    return combined_signals(df_ind, params)
+
+
+def make_optimizer(store, backtest_func, data=None, **kwargs):
+    return ParameterOptimizer(["SMA"], {"SMA": range(5, 50, 5)}, make_ohlcv(1000) if data is None else data,
+                              backtest_func=backtest_func, store=store, study="sma_profit", **kwargs)
+
+
+def test_trial_store_roundtrip_and_truncated_line(tmp_path):
+    path = tmp_path / "trials.jsonl"
+    store = TrialStore(str(path))
+    store.put("fp", "study", {"SMA": np.int64(10), "RSI": 14}, np.float64(1.5))
+    store.put("fp", "study", {"RSI": 14, "SMA": 10}, 99.0)  # đã có: bỏ qua
+    with open(path, "a") as f:
+        f.write('{"data": "fp", "study": "stu')  # dòng ghi dở
+    reopened = TrialStore(str(path))
+    assert len(reopened) == 1 and reopened.get("fp", "study", {"RSI": 14, "SMA": 10}) == 1.5
+    assert reopened.get("other", "study", {"RSI": 14, "SMA": 10}) is None
+    reopened.put("fp", "study", {"SMA": 20}, 2.0)
+    assert TrialStore(str(path)).get("fp", "study", {"SMA": 20}) == 2.0
+
+
+def test_resume_skips_finished_trials(tmp_path):
+    path = str(tmp_path / "trials.jsonl")
+    reference = make_optimizer(None, sma_profit).score_all(PARAM_SETS)
+    crashing = CrashingBacktest(crash_at=4)
+    try:
+        make_optimizer(path, crashing).grid_search()
+    except KeyboardInterrupt:
+        pass
+    assert len(TrialStore(path)) == 3
+    resumed = CrashingBacktest()
+    calls = []
+    optimizer = make_optimizer(path, resumed, progress=lambda done, total: calls.append(done))
+    assert optimizer.score_all(PARAM_SETS + PARAM_SETS[:2]) == reference + reference[:2]
+    assert resumed.calls == PARAM_SETS[3:]
+    assert calls[0] == 5 and calls[-1] == len(PARAM_SETS) + 2
+    # Dữ liệu khác: fingerprint khác, phải chấm lại
+    other = CrashingBacktest()
+    make_optimizer(path, other, data=make_ohlcv(1000, seed=5)).score_all(PARAM_SETS[:2])
+    assert len(other.calls) == 2
+
+
+def test_parallel_and_batch_scores_are_stored(tmp_path):
+    path = str(tmp_path / "trials.jsonl")
+    serial = make_optimizer(None, sma_profit).score_all(PARAM_SETS)
+    assert make_optimizer(path, sma_profit, n_jobs=2).score_all(PARAM_SETS) == serial
+    assert make_optimizer(path, CrashingBacktest(crash_at=1)).score_all(PARAM_SETS) == serial
+
+    data = make_ohlcv(800, seed=11)
+    param_sets = all_param_sets(PARAM_RANGES)[:20]
+    optimizer = ParameterOptimizer(INDICATORS, PARAM_RANGES, data, store=path)
+    first = optimizer.score_batch(param_sets, combined_signals)
+    SIGNAL_CALLS.clear()
+    counted = ParameterOptimizer(INDICATORS, PARAM_RANGES, data, store=path)
+    again = counted.score_batch(param_sets + all_param_sets(PARAM_RANGES)[20:22], counted_signals)
+    assert again[:20] == first and len(SIGNAL_CALLS) == 22  # signal_func khác tên: study khác
+    assert counted.score_batch(param_sets, combined_signals) == first
+
+
+def test_anonymous_scorers_need_study(tmp_path):
+    path = str(tmp_path / "trials.jsonl")
+    data = make_ohlcv(300)
+    for scorer in (lambda df_ind, params: 1.0, CrashingBacktest()):
+        optimizer = ParameterOptimizer(["SMA"], {"SMA": [5, 10]}, data, backtest_func=scorer, store=path)
+        with pytest.raises(ValueError):
+            optimizer.grid_search()
+    with pytest.raises(ValueError):
+        ParameterOptimizer(INDICATORS, PARAM_RANGES, data, store=path).score_batch(
+            all_param_sets(PARAM_RANGES)[:2], lambda df_ind, params: combined_signals(df_ind, params))
+    # Hai lambda khác nhau trên cùng store: mỗi study một bộ điểm
+    first = ParameterOptimizer(["SMA"], {"SMA": [5, 10]}, data, backtest_func=lambda df_ind, params: 1.0,
+                               store=path, study="one")
+    second = ParameterOptimizer(["SMA"], {"SMA": [5, 10]}, data, backtest_func=lambda df_ind, params: 2.0,
+                                store=path, study="two")
+    assert first.grid_search() == ({"SMA": 5}, 1.0)
+    assert second.grid_search() == ({"SMA": 5}, 2.0)
+    assert len(TrialStore(path)) == 4
+    # Không có store thì lambda dùng bình thường
+    assert ParameterOptimizer(["SMA"], {"SMA": [5]}, data, backtest_func=lambda df_ind, params: 3.0).grid_search() \
+        == ({"SMA": 5}, 3.0)
+
+
+def test_data_hashed_once_per_search(tmp_path, monkeypatch):
+    hash_pandas_object = pd.util.hash_pandas_object
+    hashed = []
+    monkeypatch.setattr(pd.util, "hash_pandas_object",
+                        lambda *args, **kwargs: hashed.append(1) or hash_pandas_object(*args, **kwargs))
+    optimizer = make_optimizer(str(tmp_path / "trials.jsonl"), sma_profit)
+    optimizer.bayesian_search(n_iter=8, n_initial=3, seed=0)
+    assert len(TrialStore(optimizer.store.path)) == 8 and len(hashed) == 1
+    # Dữ liệu khác (successive_halving gán data mới cho bản copy): hash lại
+    optimizer.data = optimizer.data.iloc[:500]
+    optimizer.score_all(PARAM_SETS[:2])
+    assert len(hashed) == 2
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    path = tempfile.mktemp(suffix=".jsonl")
+    data = make_ohlcv(20000, seed=11)
+    param_sets = all_param_sets(PARAM_RANGES)
+    for label in ("lần đầu", "chạy lại"):
+        optimizer = ParameterOptimizer(INDICATORS, PARAM_RANGES, data, store=path)
+        start = time.perf_counter()
+        optimizer.score_batch(param_sets, combined_signals)
+        print(f"score_batch {len(param_sets)} tổ hợp ({label}): {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,101 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine.backtester import BacktestEngine
+from backtest_engine.costs import CostModel
+from indicators_engine.indicators_engine import IndicatorsEngine
+from parameter_optimizer.genetic_algorithm import combined_signals
+from parameter_optimizer.optimizer import ParameterOptimizer
+from parameter_optimizer.walk_forward import fold_bounds
+from testing_helpers import INDICATORS, PARAM_RANGES, all_param_sets, make_ohlcv
+
+SMALL_RANGES = {"MACD_fast": [8, 12], "MACD_slow": [26, 34], "MACD_sign": [9], "RSI": [7, 14], "BB": [20]}
+
+
+def test_fold_bounds():
+    assert fold_bounds(100, 50, 20, 20) == [(0, 50, 70, 70), (20, 70, 90, 90), (40, 90, 100, 100)]
+    # step < test_bars: đoạn nối liền của mỗi fold dừng ở test_start của fold sau
+    assert fold_bounds(100, 60, 30, 20) == [(0, 60, 90, 80), (20, 80, 100, 100)]
+    assert fold_bounds(50, 50, 10, 10) == []
+
+
+def test_walk_forward_matches_per_fold_backtest():
+    data = make_ohlcv(1500, seed=3)
+    calls = []
+
+    def counting_signals(df_ind, params):
+        calls.append(params)
+        return combined_signals(df_ind, params)
+
+    optimizer = ParameterOptimizer(INDICATORS, SMALL_RANGES, data)
+    result = optimizer.walk_forward(600, 200, signal_func=counting_signals)
+    param_sets = all_param_sets(SMALL_RANGES)
+    assert len(calls) == len(param_sets)  # tín hiệu chỉ tính một lần cho mọi fold
+
+    engine = IndicatorsEngine(data)
+    for params in param_sets:
+        optimizer.compute_indicators(engine, params)
+    df_ind = engine.get_df()
+    folds = result["folds"]
+    assert len(folds) == 5
+    for row in folds.itertuples():
+        train = df_ind.loc[row.train_start:row.test_start].iloc[:-1]
+        train_scores = [BacktestEngine(train, combined_signals(train, p)).run()["profit"] for p in param_sets]
+        assert row.params == param_sets[int(np.argmax(train_scores))]
+        test = df_ind.loc[row.test_start:row.test_end]
+        expected = BacktestEngine(test, combined_signals(test, row.params)).run()["profit"]
+        assert np.isclose(row.test_profit, expected)
+    equity = result["equity"]
+    assert equity.index.equals(data.index[600:])
+    assert np.isclose(result["profit"], folds["test_profit"].sum())
+
+
+def test_walk_forward_parallel_matches_serial():
+    data = make_ohlcv(1200, seed=4)
+    serial = ParameterOptimizer(INDICATORS, SMALL_RANGES, data).walk_forward(400, 150, step=100)
+    parallel = ParameterOptimizer(INDICATORS, SMALL_RANGES, data, n_jobs=2).walk_forward(400, 150, step=100)
+    pd.testing.assert_frame_equal(serial["folds"], parallel["folds"])
+    pd.testing.assert_series_equal(serial["equity"], parallel["equity"])
+
+
+def test_walk_forward_uses_initial_balance():
+    data = make_ohlcv(1200, seed=5)
+    costs = CostModel(taker_bps=10, sizing="equity", size=0.5)
+    results = {}
+    for balance in (1000, 10000):
+        for n_jobs in (1, 2):
+            optimizer = ParameterOptimizer(INDICATORS, SMALL_RANGES, data, metric="max_drawdown", costs=costs,
+                                           n_jobs=n_jobs)
+            results[balance, n_jobs] = optimizer.walk_forward(400, 150, step=100, initial_balance=balance)
+    small, large = results[1000, 1], results[10000, 1]
+    # Khối lượng theo % vốn: lãi/lỗ tỉ lệ với vốn ban đầu, drawdown train không đổi
+    assert np.isclose(large["profit"], 10 * small["profit"])
+    assert np.allclose(large["folds"]["test_profit"], 10 * small["folds"]["test_profit"])
+    assert np.allclose(large["folds"]["train_score"], small["folds"]["train_score"])
+    assert small["folds"]["params"].tolist() == large["folds"]["params"].tolist()
+    pd.testing.assert_series_equal(small["equity"], results[1000, 2]["equity"])
+    # Giữ 1 đơn vị: cùng lãi/lỗ tuyệt đối nên drawdown train trên vốn nhỏ sâu hơn
+    optimizer = ParameterOptimizer(INDICATORS, SMALL_RANGES, data, metric="max_drawdown")
+    small = optimizer.walk_forward(400, 150, step=100, initial_balance=1000)["folds"]["train_score"]
+    large = optimizer.walk_forward(400, 150, step=100, initial_balance=10000)["folds"]["train_score"]
+    assert (small < large).all()
+
+
+if __name__ == "__main__":
+    data = make_ohlcv(20000, seed=11)
+    param_sets = all_param_sets(PARAM_RANGES)
+    train_bars, test_bars = 4000, 1000
+    folds = fold_bounds(len(data), train_bars, test_bars, test_bars)
+    optimizer = ParameterOptimizer(INDICATORS, PARAM_RANGES, data)
+    start = time.perf_counter()
+    for train_start, test_start, _, _ in folds[:2]:
+        window = ParameterOptimizer(INDICATORS, PARAM_RANGES, data.iloc[train_start:test_start])
+        window.score_batch(param_sets, combined_signals)
+    per_fold = (time.perf_counter() - start) / 2
+    print(f"Tính lại chỉ báo mỗi fold: ~{per_fold * len(folds):.1f} s cho {len(folds)} fold (ước tính)")
+    start = time.perf_counter()
+    result = optimizer.walk_forward(train_bars, test_bars, param_sets=param_sets)
+    print(f"walk_forward {len(folds)} fold × {len(param_sets)} tổ hợp: {time.perf_counter() - start:.1f} s"
+          f" | lợi nhuận ngoài mẫu {result['profit']:.1f}")
@@ -0,0 +1,71 @@
+"""
+Lưu kết quả từng lần thử (params, score) của ParameterOptimizer xuống đĩa.
+
+File JSONL chỉ ghi thêm: mỗi dòng một lần thử, ghi ngay khi có điểm. Chạy lại với cùng
+dữ liệu (cùng fingerprint) và cùng cách chấm điểm (study) sẽ bỏ qua các lần thử đã có,
+nên các lượt tối ưu dài (nhiều coin) bị ngắt giữa chừng có thể chạy tiếp.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+
+def _json_default(value):
+    # Giá trị numpy (np.int64, np.float64...) trong params/score
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Không ghi được {type(value).__name__} vào trial store")
+
+
+def params_key(params):
+    """Chuỗi JSON (khóa sắp xếp) định danh một bộ tham số."""
+    return json.dumps(params, sort_keys=True, default=_json_default)
+
+
+class TrialStore:
+    def __init__(self, path):
+        """
+        path: đường dẫn file JSONL (tạo mới nếu chưa có)
+        """
+        self.path = path
+        self._scores = {}
+        self._lock = threading.Lock()
+        self._needs_newline = False
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    self._needs_newline = not line.endswith("\n")
+                    try:
+                        trial = json.loads(line)
+                    except ValueError:
+                        # Dòng cuối bị cắt dở khi process bị ngắt giữa lúc ghi
+                        continue
+                    key = (trial["data"], trial["study"], params_key(trial["params"]))
+                    self._scores[key] = trial["score"]
+
+    def get(self, data_fingerprint, study, params):
+        """Điểm đã lưu của params, hoặc None nếu chưa thử."""
+        return self._scores.get((data_fingerprint, study, params_key(params)))
+
+    def put(self, data_fingerprint, study, params, score):
+        """Ghi một lần thử vào cuối file (bỏ qua nếu đã có)."""
+        key = (data_fingerprint, study, params_key(params))
+        score = score.item() if isinstance(score, np.generic) else score
+        with self._lock:
+            if key in self._scores:
+                return
+            line = json.dumps({"data": data_fingerprint, "study": study, "params": params, "score": score},
+                              sort_keys=True, default=_json_default)
+            # Mỗi dòng ghi bằng một lần write ở chế độ append: nhiều process (JobRunner)
+            # có thể ghi chung một file
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(("\n" if self._needs_newline else "") + line + "\n")
+            self._needs_newline = False
+            self._scores[key] = score
+
+    def __len__(self):
+        return len(self._scores)
+
@@ -0,0 +1,72 @@
+"""
+Walk-forward cho ParameterOptimizer.walk_forward.
+
+Chỉ báo và tín hiệu của mọi bộ tham số được tính một lần trên toàn bộ dữ liệu (chỉ báo chỉ
+dùng dữ liệu quá khứ nên giá trị tại mỗi nến không đổi khi cắt cửa sổ). Mỗi fold chỉ cắt
+ma trận tín hiệu: chọn bộ tham số tốt nhất trên cửa sổ train bằng BacktestEngine.run_batch,
+rồi giao dịch bộ đó trên cửa sổ test ngay sau.
+"""
+
+import numpy as np
+
+from backtest_engine.backtester import BacktestEngine, positions_from_signals
+
+# Mảng dùng chung của process con, gán một lần bởi initializer
+_worker_arrays = None
+
+
+def fold_bounds(n_bars, train_bars, test_bars, step):
+    """
+    Danh sách fold (train_start, test_start, test_stop, segment_stop). Đoạn [test_start, segment_stop)
+    là phần của fold trong đường vốn nối liền (không chồng lên test của fold sau).
+    """
+    if train_bars <= 0 or test_bars <= 0 or step <= 0:
+        raise ValueError("train_bars, test_bars và step phải lớn hơn 0")
+    folds = []
+    start = 0
+    while start + train_bars < n_bars:
+        test_start = start + train_bars
+        folds.append((start, test_start, min(test_start + test_bars, n_bars)))
+        start += step
+    return [(train_start, test_start, test_stop,
+             min(test_stop, folds[i + 1][1]) if i + 1 < len(folds) else test_stop)
+            for i, (train_start, test_start, test_stop) in enumerate(folds)]
+
+
+def signal_matrix(df_ind, param_sets, signal_func):
+    """Ma trận tín hiệu (nến × bộ tham số) kiểu int8: 1 mua, -1 bán, 0 còn lại."""
+    signals = np.empty((len(df_ind), len(param_sets)), dtype=np.int8)
+    for j, params in enumerate(param_sets):
+        column = np.asarray(signal_func(df_ind, params), dtype=np.float64).reshape(len(df_ind))
+        signals[:, j] = (column == 1).astype(np.int8) - (column == -1)
+    return signals
+
+
+def run_fold(close, signals, metric, fold, periods_per_year=365, costs=None, initial_balance=10000):
+    """
+    Chấm mọi bộ tham số trên cửa sổ train, chọn bộ tốt nhất (bằng điểm thì lấy bộ đầu tiên)
+    và trả về (cột được chọn, điểm train, lãi/lỗ từng nến trên đoạn ngoài mẫu của fold).
+    costs: CostModel áp dụng cả khi chấm train và khi giao dịch đoạn test
+    (sizing="equity" tính khối lượng theo vốn ban đầu của từng fold).
+    initial_balance: vốn ban đầu khi chấm train (drawdown, Sharpe...) và khi giao dịch đoạn test
+    """
+    train_start, test_start, _, segment_stop = fold
+    results = BacktestEngine.run_batch(close[train_start:test_start], signals[train_start:test_start],
+                                       initial_balance, periods_per_year, costs)
+    scores = np.nan_to_num(results[metric].to_numpy(dtype=np.float64), nan=-np.inf)
+    best = int(np.argmax(scores))
+    # Fold mới bắt đầu không giữ vị thế, vị thế còn mở được tính tới nến cuối của đoạn
+    position = positions_from_signals(signals[test_start:segment_stop, best])
+    pnl, _, _ = BacktestEngine.pnl(close[test_start:segment_stop, None], position[:, None], initial_balance,
+                                   costs)
+    return best, float(results[metric].iloc[best]), pnl[:, 0]
+
+
+def _init_worker(close, signals, metric, periods_per_year, costs=None, initial_balance=10000):
+    global _worker_arrays
+    _worker_arrays = (close, signals, metric, periods_per_year, costs, initial_balance)
+
+
+def _run_worker_fold(fold):
+    close, signals, metric, periods_per_year, costs, initial_balance = _worker_arrays
+    return run_fold(close, signals, metric, fold, periods_per_year, costs, initial_balance)
@@ -5,7 +5,7 @@ import plotly.express as px
 from datetime import datetime, timedelta
 import sys
 import os
-import yfinance as yf
+from market_data.ohlcv_store import get_store
 import asyncio
 import aiohttp
 import requests
@@ -279,8 +279,7 @@ def get_historical_prices_top10(symbols_list, period="1y"):
             ticker = ticker_map.get(symbol, f'{symbol}-USD')
             
             # Get data from yfinance
-            stock = yf.Ticker(ticker)
-            hist = stock.history(period=period)
+            hist = get_store().history(ticker, period=period)
             
             if not hist.empty:
                 historical_data[symbol] = {
@@ -642,8 +641,7 @@ def show_crypto_dashboard():
             ticker = ticker_map.get(selected_coin, f'{selected_coin}-USD')
             
             with st.spinner(f"Loading {selected_coin} chart..."):
-                stock = yf.Ticker(ticker)
-                hist = stock.history(period=time_period)
+                hist = get_store().history(ticker, period=time_period)
                 
                 if not hist.empty:
                     fig = go.Figure()
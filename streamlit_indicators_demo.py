@@ -57,28 +57,22 @@ for ind in selected_indicators:
         indicator_params[ind] = windows
 
 # 2. Tính toán các chỉ báo đã chọn với tham số động
+# Các chỉ báo nhiều cửa sổ được tính một lần cho cả danh sách window
+many_methods = {
+    "SMA": engine.sma_many,
+    "EMA": engine.ema_many,
+    "RSI": engine.rsi_many,
+    "ATR": engine.atr_many,
+    "CCI": engine.cci_many,
+    "Williams %R": engine.williams_r_many,
+}
 for ind, params in indicator_params.items():
-    if ind == "SMA":
-        for w in params:
-            engine.sma(window=w)
-    elif ind == "EMA":
-        for w in params:
-            engine.ema(window=w)
-    elif ind == "RSI":
-        for w in params:
-            engine.rsi(window=w)
-    elif ind == "ATR":
-        for w in params:
-            engine.atr(window=w)
-    elif ind == "CCI":
-        for w in params:
-            engine.cci(window=w)
+    if ind in many_methods:
+        if params:
+            engine.add_columns(many_methods[ind](windows=params))
     elif ind == "ADX":
         for w in params:
             engine.adx(window=w)
-    elif ind == "Williams %R":
-        for w in params:
-            engine.williams_r(lbp=w)
     elif ind == "MACD":
         for fast, slow in params:
             engine.macd(window_fast=fast, window_slow=slow)
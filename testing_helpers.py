@@ -0,0 +1,151 @@
+"""
+Dữ liệu giả lập và hàm đối chiếu dùng chung cho test và benchmark của các module
+(indicators_engine, backtest_engine, parameter_optimizer).
+"""
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine.backtester import BacktestEngine
+
+
+# Chỉ báo
+def make_ohlcv(n=2000, seed=0):
+    """Dữ liệu giá giả lập (random walk) cho test, index theo giờ."""
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = close * np.exp(rng.normal(0, 0.003, n))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.004, n)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.004, n)))
+    volume = rng.lognormal(10, 1, n)
+    index = pd.date_range("2015-01-01", periods=n, freq="h")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+
+
+def compute_all(engine):
+    """15 chỉ báo mà dashboard tính cho mỗi coin."""
+    engine.sma(window=20)
+    engine.sma(window=50)
+    engine.ema(window=20)
+    engine.rsi(window=14)
+    engine.macd()
+    engine.stochastic()
+    engine.cci()
+    engine.bollinger_bands()
+    engine.atr()
+    engine.obv()
+    engine.volume_oscillator()
+    engine.chaikin_money_flow()
+    engine.ichimoku()
+    engine.adx()
+    engine.williams_r()
+    return engine.get_df()
+
+
+def assert_frames_match(expected, actual):
+    """Cùng cột, cùng vị trí NaN, giá trị lệch không quá 1e-6 (tương đối)."""
+    assert list(expected.columns) == list(actual.columns)
+    for col in expected.columns:
+        x = expected[col].to_numpy(dtype=float)
+        y = actual[col].to_numpy(dtype=float)
+        assert np.array_equal(np.isnan(x), np.isnan(y)), col
+        valid = ~np.isnan(x)
+        if valid.any():
+            scale = np.max(np.abs(x[valid]))
+            np.testing.assert_allclose(y[valid], x[valid], rtol=1e-6, atol=1e-6 * scale, err_msg=col)
+
+
+# Backtest
+def make_prices(n=2000, seed=0):
+    """Giá Close giả lập (random walk), index theo giờ."""
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    index = pd.date_range("2015-01-01", periods=n, freq="h")
+    return pd.DataFrame({"Close": close}, index=index)
+
+
+def make_signals(df, values=(-1, 0, 1), seed=0):
+    """Tín hiệu ngẫu nhiên lấy từ values, cùng index với df."""
+    rng = np.random.default_rng(seed)
+    return pd.Series(rng.choice(values, len(df)), index=df.index)
+
+
+def make_ohlc(n=2000, seed=0):
+    """High/Low/Close giả lập: High/Low bao Close của nến này và nến trước."""
+    rng = np.random.default_rng(seed)
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    spread = np.abs(rng.normal(0, 0.006, (2, n)))
+    previous = np.concatenate([[close[0]], close[:-1]])
+    high = np.maximum(close, previous) * (1 + spread[0])
+    low = np.minimum(close, previous) * (1 - spread[1])
+    index = pd.date_range("2015-01-01", periods=n, freq="h")
+    return pd.DataFrame({"High": high, "Low": low, "Close": close}, index=index)
+
+
+def loop_trade_pnl(df, signals, mode="long", stop_loss=None, take_profit=None, trailing_stop=None):
+    """Vòng lặp từng nến để đối chiếu: trả về danh sách lãi/lỗ từng lệnh (1 đơn vị)."""
+    close, high, low = (df[c].to_numpy() for c in ("Close", "High", "Low"))
+    signals = np.asarray(signals)
+    trades, side, entry, peak = [], 0, 0.0, 0.0
+    for t in range(len(close)):
+        stopped = False
+        if side:
+            # Stop kiểm tra trong nến, trước tín hiệu lúc đóng cửa
+            level = -np.inf
+            if stop_loss is not None:
+                level = entry * (1 - stop_loss) if side == 1 else -entry * (1 + stop_loss)
+            if trailing_stop is not None:
+                trail = peak * (1 - trailing_stop) if side == 1 else -peak * (1 + trailing_stop)
+                level = max(level, trail)
+            adverse, favorable = (low[t], high[t]) if side == 1 else (-high[t], -low[t])
+            target = np.inf
+            if take_profit is not None:
+                target = entry * (1 + take_profit) if side == 1 else -entry * (1 - take_profit)
+            if adverse <= level:
+                trades.append(side * (side * min(level, favorable)) - side * entry)
+                stopped = True
+            elif favorable >= target:
+                trades.append(side * (side * max(target, adverse)) - side * entry)
+                stopped = True
+            if stopped:
+                side = 0
+            else:
+                peak = max(peak, high[t]) if side == 1 else min(peak, low[t])
+        if stopped:
+            continue
+        signal = signals[t]
+        if side and signal == -side:
+            trades.append(side * (close[t] - entry))
+            side = 0
+            if mode == "long":
+                continue
+        if not side and (signal == 1 or (mode == "long_short" and signal == -1)):
+            side, entry, peak = int(signal), close[t], close[t]
+    if side:
+        trades.append(side * (close[-1] - entry))
+    return np.array(trades)
+
+
+# Tối ưu tham số
+INDICATORS = ["MACD", "RSI", "Bollinger Bands"]
+PARAM_RANGES = {
+    "MACD_fast": range(6, 18, 2),
+    "MACD_slow": range(20, 44, 4),
+    "MACD_sign": range(5, 13, 2),
+    "RSI": [7, 14, 21],
+    "BB": [14, 20, 26],
+}
+
+
+def all_param_sets(param_ranges):
+    """Mọi tổ hợp của lưới param_ranges (thứ tự như itertools.product)."""
+    keys = list(param_ranges)
+    grids = np.meshgrid(*[list(param_ranges[k]) for k in keys], indexing="ij")
+    return [dict(zip(keys, (int(g) for g in row))) for row in np.stack([g.ravel() for g in grids], axis=1)]
+
+
+def sma_profit(df_ind, params):
+    """Backtest cấp module (pickle được): mua khi Close vượt SMA, bán khi cắt xuống."""
+    above = df_ind["Close"] > df_ind[f"SMA_{params['SMA']}"]
+    signals = above.astype(int) - (~above).astype(int)
+    return BacktestEngine(df_ind, signals).run()["profit"]